@@ -0,0 +1,126 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure host -> DUT -> host latency of the echo host test over a pty
+
+The DUT is a thread on the master side of a pty pair that answers __sync
+and mirrors every 'echo' KV pair, like the greentea echo test does.
+conn_process runs on the slave side, and the EchoTest host test drives the
+exchange. Each latency is the time from EchoTest.send_kv() to its callback.
+
+Usage: python benchmarks/conn_proxy_echo_latency.py [round trips]
+"""
+
+import os
+import re
+import sys
+import threading
+from time import time
+
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from mbed_os_tools.test.host_tests.echo import EchoTest
+from mbed_os_tools.test.host_tests_conn_proxy.conn_proxy import conn_process
+
+KV_REGEX = re.compile(rb"\{\{([\w\d_-]+);([^\}]+)\}\}")
+
+
+def fake_dut(master):
+    buff = b""
+    while True:
+        try:
+            data = os.read(master, 4096)
+        except OSError:
+            return
+        buff += data
+        lines = buff.split(b"\n")
+        buff = lines.pop()
+        for line in lines:
+            for key, value in KV_REGEX.findall(line):
+                if key in (b"__sync", b"echo"):
+                    os.write(master, b"{{%s;%s}}\n" % (key, value))
+
+
+def main(round_trips):
+    master, slave = os.openpty()
+    slave_name = os.ttyname(slave)
+    # Reading the master fails with EIO while nothing has the slave open
+    dut = threading.Thread(target=fake_dut, args=(master,))
+    dut.daemon = True
+    dut.start()
+
+    event_queue = Queue()
+    dut_event_queue = Queue()
+    config = {
+        "port": slave_name,
+        "baudrate": 115200,
+        "skip_reset": True,
+        "sync_behavior": 1,
+        "sync_timeout": 5,
+    }
+    conn = threading.Thread(
+        target=conn_process, args=(event_queue, dut_event_queue, config)
+    )
+    conn.daemon = True
+    conn.start()
+
+    host_test = EchoTest()
+    host_test.setup_communication(event_queue, dut_event_queue, config)
+    host_test.setup()
+    callbacks = host_test.get_callbacks()
+
+    latencies = []
+    sent_at = [None]
+    send_kv = host_test.send_kv
+
+    def timed_send_kv(key, value):
+        sent_at[0] = time()
+        send_kv(key, value)
+
+    host_test.send_kv = timed_send_kv
+    while True:
+        key, value, _ = event_queue.get(timeout=10)
+        if key == "__sync":
+            # Start the exchange the way the DUT side of the test does
+            os.write(master, b"{{echo_count;%d}}\n" % round_trips)
+        elif key in callbacks:
+            if key == "echo":
+                latencies.append(time() - sent_at[0])
+            callbacks[key](key, value, time())
+            if len(latencies) == round_trips:
+                break
+
+    dut_event_queue.put(("__host_test_finished", True, time()))
+    conn.join()
+    os.close(slave)
+    os.close(master)
+    assert host_test.result()
+
+    latencies.sort()
+    print(
+        "echo round trip: median %.3f ms  p99 %.3f ms  (%d round trips)"
+        % (
+            latencies[len(latencies) // 2] * 1e3,
+            latencies[int(len(latencies) * 0.99)] * 1e3,
+            round_trips,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
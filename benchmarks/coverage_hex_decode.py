@@ -0,0 +1,84 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure the throughput of the GCOV payload decoding
+
+A dot compressed hex payload of the given size is generated, with runs of
+zeros like the counters of a .gcda file. It is decoded with the previous
+implementation of coverage_pack_hex_payload(), which built the binary data
+from a list of int(s, 16), then with the current one. The payload is last
+decoded and written to a file by coverage_dump_hex_payload().
+
+Usage: python benchmarks/coverage_hex_decode.py [payload MB]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+from time import time
+
+from mbed_os_tools.test import mbed_coverage_api
+
+
+def generated_payload(size):
+    rng = random.Random(1)
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.5:
+            part = "." * rng.randint(1, 16)
+        else:
+            part = "%08x" % rng.getrandbits(32)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)
+
+
+def previous_pack_hex_payload(payload):
+    payload = payload.replace('.', '00')
+    hex_pairs = map(''.join, zip(*[iter(payload)] * 2))
+    return bytearray([int(s, 16) for s in hex_pairs])
+
+
+def dump_hex_payload(tmp_dir, payload):
+    path = os.path.join(tmp_dir, "a.gcda")
+    return mbed_coverage_api.coverage_dump_hex_payload(tmp_dir, path, payload)
+
+
+def main(size_mb):
+    payload = generated_payload(int(size_mb * 1e6))
+    print("%.1f MB payload" % (len(payload) / 1e6))
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        results = []
+        for name, decode in (
+            ("int(s, 16) per byte", previous_pack_hex_payload),
+            ("coverage_pack_hex_payload", mbed_coverage_api.coverage_pack_hex_payload),
+            ("coverage_dump_hex_payload", lambda p: dump_hex_payload(tmp_dir, p)),
+        ):
+            start = time()
+            results.append(decode(payload))
+            elapsed = time() - start
+            rate = len(payload) / 1e6 / elapsed
+            print("%-26s %8.3f s %8.1f MB/s" % (name, elapsed, rate))
+        assert results[0] == results[1] and len(results[0]) == results[2]
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,47 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare the ways the Linux detector can list FAT mounts
+
+Usage: python benchmarks/detect_mount_table.py [iterations]
+"""
+
+import sys
+import timeit
+
+from mbed_os_tools.detect.linux import MbedLsToolsLinuxGeneric
+from mbed_os_tools.detect.mountinfo import MountTable, parse_mountinfo
+
+
+def main(iterations):
+    mbeds = MbedLsToolsLinuxGeneric(skip_retarget=True)
+    table = MountTable()
+
+    def uncached():
+        with open(table.path, "rb") as f:
+            return parse_mountinfo(f.read())
+
+    cases = [
+        ("'mount' subprocess", lambda: list(mbeds._fat_mounts_cli())),
+        ("mountinfo, parsed every call", uncached),
+        ("mountinfo, cached", table.fat_mounts),
+    ]
+    for name, func in cases:
+        total = timeit.timeit(func, number=iterations)
+        print("%-30s %10.1f us/call" % (name, total / iterations * 1e6))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
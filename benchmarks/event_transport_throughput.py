@@ -0,0 +1,78 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare event transports from the conn process to the host process
+
+A child process sends '__rxd_line' events in chunks of lines, the way
+conn_process does for each serial read. The parent receives them the way
+DefaultTestSelector.run_test does. The multiprocessing.Queue transport
+sends one event per put(). The EventPipe transport sends one message per
+chunk with put_many().
+
+Usage: python benchmarks/event_transport_throughput.py [lines] [lines per read]
+"""
+
+import sys
+from multiprocessing import Process, Queue
+from time import time
+
+from mbed_os_tools.test.host_tests_conn_proxy.event_pipe import EventPipe
+
+LINE = ">>> Running case #1: 'Basic test'... value=1234567"
+
+
+def produce(event_queue, lines, chunk):
+    sent = 0
+    while sent < lines:
+        events = [("__rxd_line", LINE, time()) for _ in range(min(chunk, lines - sent))]
+        if hasattr(event_queue, "put_many"):
+            event_queue.put_many(events)
+        else:
+            for event in events:
+                event_queue.put(event)
+        sent += len(events)
+    event_queue.put(("__exit", 0, time()))
+
+
+def measure(event_queue, lines, chunk):
+    p = Process(target=produce, args=(event_queue, lines, chunk))
+    start = time()
+    p.start()
+    received = 0
+    while True:
+        key, _, _ = event_queue.get(timeout=30)
+        if key == "__exit":
+            break
+        received += 1
+    elapsed = time() - start
+    p.join()
+    assert received == lines
+    return lines / elapsed
+
+
+def main(lines, chunk):
+    rate = measure(Queue(), lines, chunk)
+    print("multiprocessing.Queue: %9.0f lines/s" % rate)
+    event_queue = EventPipe()
+    rate = measure(event_queue, lines, chunk)
+    event_queue.close()
+    print("EventPipe:             %9.0f lines/s" % rate)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 40,
+    )
@@ -0,0 +1,123 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Simulate the wall time of a test run on a mixed-platform rack
+
+Devices are simulated: a test takes its duration plus FLASH_TIME when the
+device has to be flashed with a different image. Two strategies are
+compared:
+
+* per build: builds run one after another, each on the devices of its
+  platform, tests in test specification order (what greentea does)
+* TestScheduler: all jobs dealt to per-device queues up front, a device
+  with an empty queue steals from the compatible device with the most work
+
+Usage: python benchmarks/greentea_scheduler_wall_time.py [seed]
+"""
+
+import heapq
+import random
+import sys
+
+from mbed_os_tools.test.mbed_greentea_scheduler import TestJob, TestScheduler
+
+FLASH_TIME = 8.0
+RACK = {"K64F": 4, "NUCLEO_F429ZI": 3, "NRF52840_DK": 2, "DISCO_L475VG_IOT01A": 1}
+TOOLCHAINS = ["GCC_ARM", "ARM"]
+TESTS_PER_BUILD = 60
+# Share of the tests run twice in a build, e.g. with a different configuration
+REPEATED_TESTS = 0.1
+
+
+def make_rack():
+    return [
+        {"platform_name": platform, "target_id": "%s_%d" % (platform, i)}
+        for platform, count in sorted(RACK.items())
+        for i in range(count)
+    ]
+
+
+def make_builds(rng):
+    """! Returns list of (build name, platform, [(test name, image, duration)]) """
+    durations = {}
+    builds = []
+    for platform in sorted(RACK):
+        for toolchain in TOOLCHAINS:
+            name = "%s-%s" % (platform, toolchain)
+            tests = []
+            for i in range(TESTS_PER_BUILD):
+                test_name = "tests-%d" % i
+                # Most tests are short, a few take minutes
+                duration = durations.setdefault(
+                    test_name, min(rng.lognormvariate(2.5, 1.0), 600)
+                )
+                image = "%s/%s.bin" % (name, test_name)
+                tests.append((test_name, image, duration))
+                if rng.random() < REPEATED_TESTS:
+                    tests.append((test_name + "-repeat", image, duration))
+            builds.append((name, platform, tests))
+    return builds
+
+
+def simulate_per_build(rack, builds):
+    now = 0.0
+    for name, platform, tests in builds:
+        muts = [mut for mut in rack if mut["platform_name"] == platform]
+        # Devices are reflashed for every test
+        free_at = [now] * len(muts)
+        for _, _, duration in tests:
+            index = free_at.index(min(free_at))
+            free_at[index] += FLASH_TIME + duration
+        now = max(free_at)
+    return now
+
+
+def simulate_scheduler(rack, builds):
+    jobs = [
+        TestJob(name, test_name, platform, image, duration)
+        for name, platform, tests in builds
+        for test_name, image, duration in tests
+    ]
+    scheduler = TestScheduler(rack, jobs)
+    flashed = {}
+    events = [(0.0, i) for i in range(len(rack))]
+    end = 0.0
+    while events:
+        now, i = heapq.heappop(events)
+        mut = rack[i]
+        job = scheduler.next_job(mut)
+        if job is None:
+            end = max(end, now)
+            continue
+        flash = 0.0 if flashed.get(i) == job.image_path else FLASH_TIME
+        flashed[i] = job.image_path
+        heapq.heappush(events, (now + flash + job.expected_duration, i))
+    return end
+
+
+def main(seed):
+    rng = random.Random(seed)
+    rack = make_rack()
+    builds = make_builds(rng)
+    jobs = sum(len(tests) for _, _, tests in builds)
+    total = sum(FLASH_TIME + d for _, _, tests in builds for _, _, d in tests)
+    print("%d devices, %d builds, %d jobs, %.0f device-minutes of work"
+          % (len(rack), len(builds), jobs, total / 60))
+    print("per build:     %6.1f min" % (simulate_per_build(rack, builds) / 60))
+    print("TestScheduler: %6.1f min" % (simulate_scheduler(rack, builds) / 60))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
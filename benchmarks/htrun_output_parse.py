@@ -0,0 +1,95 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure the time to extract test results from mbedhtrun output
+
+A utest-like mbedhtrun output with the given number of test cases is
+generated, each test case printing a few lines of its own. Results are
+extracted with the get_*() functions greentea calls on the complete output,
+then with one HtrunOutputParser fed line by line.
+
+Usage: python benchmarks/htrun_output_parse.py [test cases] [lines per case]
+"""
+
+import sys
+from time import time
+
+from mbed_os_tools.test import mbed_test_api
+
+
+def generated_output(cases, lines_per_case):
+    out = ["[1.00][CONN][RXD] {{__testcase_count;%d}}\n" % cases]
+    for i in range(cases):
+        out.append("[1.00][CONN][RXD] {{__testcase_name;Test case %d}}\n" % i)
+    for i in range(cases):
+        name = "Test case %d" % i
+        out.append("[2.00][CONN][RXD] >>> Running case #%d: '%s'...\n" % (i + 1, name))
+        out.append(
+            "[2.00][CONN][INF] found KV pair in stream: "
+            "{{__testcase_start;%s}}, queued...\n" % name
+        )
+        out.append("[2.00][CONN][RXD] {{__testcase_start;%s}}\n" % name)
+        for j in range(lines_per_case):
+            out.append(
+                "[2.01][CONN][RXD] step %d of test case %d, value=%d\n" % (j, i, i * j)
+            )
+        out.append(
+            "[2.02][CONN][INF] found KV pair in stream: "
+            "{{__testcase_finish;%s;1;0}}, queued...\n" % name
+        )
+        out.append("[2.02][CONN][RXD] {{__testcase_finish;%s;1;0}}\n" % name)
+        out.append("[2.03][CONN][RXD] >>> '%s': 1 passed, 0 failed\n" % name)
+    out.append("[3.00][CONN][RXD] {{__testcase_summary;%d;0}}\n" % cases)
+    out.append("[3.00][CONN][RXD] {{max_heap_usage;2284}}\n")
+    out.append("[3.00][HTST][INF] {{result;success}}\n")
+    return out
+
+
+def extract_functions(lines):
+    output = "".join(lines)
+    mbed_test_api.get_test_result(output)
+    mbed_test_api.get_testcase_summary(output)
+    mbed_test_api.get_memory_metrics(output)
+    return mbed_test_api.get_testcase_result(output)
+
+
+def extract_parser(lines):
+    parser = mbed_test_api.HtrunOutputParser()
+    for line in lines:
+        parser.feed(line)
+    parser.test_result()
+    parser.testcase_summary()
+    parser.memory_metrics()
+    return parser.testcase_result()
+
+
+def main(cases, lines_per_case):
+    lines = generated_output(cases, lines_per_case)
+    size = sum(len(line) for line in lines)
+    print("%d test cases, %d lines, %.1f MB" % (cases, len(lines), size / 1e6))
+    for name, extract in (
+        ("get_*() functions", extract_functions),
+        ("HtrunOutputParser", extract_parser),
+    ):
+        start = time()
+        extract(lines)
+        print("%-18s %8.2f s" % (name, time() - start))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
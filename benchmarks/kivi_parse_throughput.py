@@ -0,0 +1,78 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure KiViBufferWalker throughput replaying serial logs
+
+Each log is fed to the parser in chunks: the largest read conn_process asks
+the serial port for, and a small read like the ones returned as soon as data
+arrives on a 115200 baud port. Without log files, a utest-like log with one
+KV pair per five lines is generated.
+
+Usage: python benchmarks/kivi_parse_throughput.py [serial log ...]
+"""
+
+import sys
+from time import time
+
+from mbed_os_tools.test.host_tests_conn_proxy.conn_proxy import KiViBufferWalker
+
+CHUNK_SIZES = (2304, 64)
+
+
+def generated_log(lines=200000):
+    out = []
+    for i in range(lines):
+        if i % 5 == 0:
+            out.append("{{__testcase_finish;Test case %d;1;0}}\r\n" % i)
+        else:
+            out.append(
+                ">>> Running case #%d: 'Test case %d'... value=%d\r\n" % (i, i, i * 7)
+            )
+    return "".join(out).encode("utf-8")
+
+
+def measure(log, chunk_size):
+    chunks = [log[i:i + chunk_size] for i in range(0, len(log), chunk_size)]
+    walker = KiViBufferWalker()
+    kvs = 0
+    start = time()
+    for chunk in chunks:
+        walker.append(chunk)
+        while walker.search():
+            walker.pop_kv()
+            kvs += 1
+    elapsed = time() - start
+    return len(log) / elapsed / 1e6, kvs
+
+
+def main(paths):
+    if paths:
+        logs = []
+        for path in paths:
+            with open(path, "rb") as f:
+                logs.append((path, f.read()))
+    else:
+        logs = [("generated", generated_log())]
+    for name, log in logs:
+        for chunk_size in CHUNK_SIZES:
+            rate, kvs = measure(log, chunk_size)
+            print(
+                "%s, %d byte reads: %.1f MB/s (%d bytes, %d KV pairs)"
+                % (name, chunk_size, rate, len(log), kvs)
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time PlatformDatabase construction and cold/warm get()
+
+Usage: python benchmarks/platform_database_get.py [iterations]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+from mbed_os_tools.detect.platform_database import (
+    DEFAULT_PLATFORM_DB,
+    PlatformDatabase,
+)
+
+
+def main(iterations):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        mocks = os.path.join(tmp_dir, "mock.json")
+        platforms = os.path.join(tmp_dir, "platforms.json")
+        with open(mocks, "w") as out:
+            json.dump({"daplink": {"9999": "MOCKED"}}, out)
+        with open(platforms, "w") as out:
+            json.dump(DEFAULT_PLATFORM_DB, out)
+        files = [mocks, platforms]
+        ids = list(DEFAULT_PLATFORM_DB["daplink"])
+
+        def construct():
+            return PlatformDatabase(files, primary_database=mocks)
+
+        def cold_get():
+            construct().get(ids[-1], device_type="daplink", verbose_data=True)
+
+        plat_db = construct()
+        plat_db.get(ids[0])
+
+        def warm_get():
+            for id in ids:
+                plat_db.get(id, device_type="daplink", verbose_data=True)
+
+        cases = [
+            ("construct", construct, 1),
+            ("construct + first get()", cold_get, 1),
+            ("warm get()", warm_get, len(ids)),
+        ]
+        for name, func, calls in cases:
+            total = timeit.timeit(func, number=iterations)
+            print("%-25s %10.2f us/call" % (name, total / iterations / calls * 1e6))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,102 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Measure ResultsStore query times over many stored runs
+
+Runs with a few builds, test suites and test cases each are stored in a
+temporary database, then the queries of the store are timed.
+
+Usage: python benchmarks/results_store_query.py [runs]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+from time import time
+
+from mbed_os_tools.test.mbed_results_store import ResultsStore
+
+BUILDS = ["K64F-GCC_ARM", "K64F-ARM", "NUCLEO_F429ZI-GCC_ARM", "NRF52840_DK-GCC_ARM"]
+SUITES = 10
+TESTCASES = 5
+
+
+def make_run(rng):
+    result = {}
+    for build in BUILDS:
+        result[build] = {}
+        for i in range(SUITES):
+            testcases = {}
+            for j in range(TESTCASES):
+                failed = int(rng.random() < 0.02)
+                testcases["case-%d" % j] = {
+                    "result_text": "FAIL" if failed else "OK",
+                    "passed": 1 - failed,
+                    "failed": failed,
+                    "duration": rng.lognormvariate(0, 1),
+                }
+            result[build]["tests-%d" % i] = {
+                "platform_name": build.split("-")[0],
+                "single_test_result": "OK",
+                "elapsed_time": 10.0,
+                "memory_metrics": {"max_heap": rng.randint(1000, 3000)},
+                "testcase_result": testcases,
+            }
+    return result
+
+
+def timed(name, function, *args, **kwargs):
+    start = time()
+    function(*args, **kwargs)
+    print("%-40s %8.1f ms" % (name, (time() - start) * 1000))
+
+
+def main(runs):
+    rng = random.Random(1)
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        store = ResultsStore(os.path.join(tmp_dir, "results.db"))
+        start = time()
+        for _ in range(runs):
+            store.add_run(make_run(rng))
+        rows = store.query("SELECT COUNT(*) FROM testcases")[0][0]
+        print("%d runs, %d rows stored in %.1f s" % (runs, rows, time() - start))
+        timed(
+            "failure_rate_by_platform(last_runs=100)",
+            store.failure_rate_by_platform,
+            last_runs=100,
+        )
+        timed(
+            "slowest_testcases(last_runs=100)",
+            store.slowest_testcases,
+            last_runs=100,
+        )
+        timed(
+            "memory_metrics('tests-1', last_runs=100)",
+            store.memory_metrics,
+            "tests-1",
+            last_runs=100,
+        )
+        timed("failure_rate_by_platform()", store.failure_rate_by_platform)
+        timed("slowest_testcases()", store.slowest_testcases)
+        store.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,85 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare the read modes of SerialConnectorPrimitive on a pty pair
+
+A thread on the master side of the pty echoes every line back, like a DUT
+answering key-value messages. Round trips are measured from write() to the
+reply being read.
+
+Usage: python benchmarks/serial_read_latency.py [round trips]
+"""
+
+import os
+import sys
+import threading
+import time
+
+from mbed_os_tools.test.host_tests_conn_proxy.conn_primitive_serial import (
+    SerialConnectorPrimitive,
+)
+
+
+def echo(master, stop):
+    while not stop.is_set():
+        try:
+            data = os.read(master, 4096)
+        except OSError:
+            return
+        os.write(master, data)
+
+
+def measure(mode, round_trips):
+    master, slave = os.openpty()
+    slave_name = os.ttyname(slave)
+    os.close(slave)
+    stop = threading.Event()
+    echo_thread = threading.Thread(target=echo, args=(master, stop))
+    echo_thread.daemon = True
+    echo_thread.start()
+    config = {"skip_reset": True, "serial_read_mode": mode}
+    connector = SerialConnectorPrimitive("SERI", slave_name, 115200, config=config)
+
+    latencies = []
+    for i in range(round_trips):
+        payload = "{{echo;%d}}\n" % i
+        expected = payload.encode("utf-8")
+        start = time.time()
+        connector.write(payload)
+        data = b""
+        while len(data) < len(expected):
+            data += connector.read(2304) or b""
+        latencies.append(time.time() - start)
+    connector.finish()
+    stop.set()
+    os.close(master)
+    return sorted(latencies)
+
+
+def main(round_trips):
+    for mode in ("sleep", "select"):
+        latencies = measure(mode, round_trips)
+        print(
+            "%-7s median %7.3f ms  p99 %7.3f ms"
+            % (
+                mode,
+                latencies[len(latencies) // 2] * 1e3,
+                latencies[int(len(latencies) * 0.99)] * 1e3,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
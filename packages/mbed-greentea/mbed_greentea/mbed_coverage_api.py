@@ -20,4 +20,5 @@ Author: Przemyslaw Wirkus <Przemyslaw.wirkus@arm.com>
 from mbed_os_tools.test.mbed_coverage_api import (
     coverage_pack_hex_payload,
     coverage_dump_file,
+    coverage_dump_hex_payload,
 )
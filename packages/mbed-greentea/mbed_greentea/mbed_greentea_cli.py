@@ -48,10 +48,12 @@ from mbed_os_tools.test.mbed_test_api import (
 from mbed_os_tools.test.mbed_report_api import (
     exporter_text,
     exporter_testcase_text,
-    exporter_json,
-    exporter_testcase_junit,
-    exporter_html,
     exporter_memory_metrics_csv,
+    export_to_results_store,
+    HtmlReportWriter,
+    JsonReportWriter,
+    JUnitReportWriter,
+    ReportWriterGroup,
 )
 
 from mbed_os_tools.test.mbed_greentea_log import gt_logger
@@ -63,7 +65,10 @@ from mbed_os_tools.test.mbed_greentea_dlm import (
     greentea_clean_kettle,
 )
 
+from mbed_os_tools.test.mbed_duration_store import DurationStore
 from mbed_os_tools.test.mbed_greentea_hooks import GreenteaHooks
+from mbed_os_tools.test.mbed_greentea_scheduler import TestJob, TestScheduler
+from mbed_os_tools.test.mbed_htrun_worker import HtrunWorker
 from mbed_os_tools.test.tests_spec import TestBinary
 from mbed_os_tools.test.mbed_target_info import get_platform_property
 
@@ -286,10 +291,38 @@ def main():
                       type=int,
                       help='retry count for individual test failure. By default, there is no retry')
 
+    parser.add_option('', '--htrun-in-process',
+                    dest='htrun_in_process',
+                    default=False,
+                    action="store_true",
+                    help='Run mbedhtrun in this process instead of starting it for each test')
+
+    parser.add_option('', '--htrun-worker',
+                    dest='htrun_worker',
+                    default=False,
+                    action="store_true",
+                    help='Run mbedhtrun in one long-lived process per device instead of starting it for each test')
+
+    parser.add_option('', '--work-stealing',
+                    dest='work_stealing',
+                    default=False,
+                    action="store_true",
+                    help='Queue the tests of all targets first, then run them on all devices at once. Each device gets its own queue of tests, longest first, devices with no tests left take tests from the others')
+
+    parser.add_option('', '--adaptive-timeout',
+                    dest='adaptive_timeout',
+                    default=False,
+                    action="store_true",
+                    help='Set the timeout of each test from its past durations instead of the timeout the test sets')
+
     parser.add_option('', '--report-memory-metrics-csv',
                     dest='report_memory_metrics_csv_file_name',
                     help='You can log test suite memory metrics in the form of a CSV file')
 
+    parser.add_option('', '--report-results-store',
+                    dest='report_results_store_file_name',
+                    help='You can add test case results to a SQLite database of results across runs')
+
     parser.add_option('', '--yotta-registry',
                     dest='yotta_search_for_mbed_target',
                     default=False,
@@ -375,7 +408,7 @@ def main():
 
     return(cli_ret)
 
-def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path, greentea_hooks):
+def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path, greentea_hooks, duration_store=None, report_writers=None):
     test_exec_retcode = 0
     test_platforms_match = 0
     test_report = {}
@@ -389,6 +422,9 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
     copy_method = get_platform_property(micro, "copy_method")
     reset_method = get_platform_property(micro, "reset_method")
 
+    # One worker per device runs all the tests of this thread, it's a daemon process
+    htrun_worker = HtrunWorker(name=mut['target_id']) if opts.htrun_worker else None
+
     while not test_queue.empty():
         try:
             test = test_queue.get(False)
@@ -396,6 +432,12 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
             gt_logger.gt_log_err(str(e))
             break
 
+        if isinstance(test, TestJob):
+            # Handed out by TestScheduler (--work-stealing), tests of any build of the platform
+            test = test.test
+            build, build_path = test['build'], test['build_path']
+            port = "{}:{}".format(mut['serial_port'], test['baud_rate'])
+
         test_result = 'SKIPPED'
 
         if opts.copy_method:
@@ -409,6 +451,11 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
         verbose = opts.verbose_test_result_only
         enum_host_tests_path = get_local_host_tests_dir(opts.enum_host_tests)
 
+        test_suite_name = test['test_bin'].lower()
+        test_timeout = None
+        if duration_store and opts.adaptive_timeout:
+            test_timeout = duration_store.timeout(test_suite_name, micro, None, image_path=test['image_path'])
+
         test_platforms_match += 1
         host_test_result = run_host_test(test['image_path'],
                                          disk,
@@ -430,6 +477,9 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
                                          tags=opts.tags,
                                          retry_count=opts.retry_count,
                                          polling_timeout=opts.polling_timeout,
+                                         in_process=opts.htrun_in_process,
+                                         htrun_worker=htrun_worker,
+                                         test_timeout=test_timeout,
                                          verbose=verbose)
 
         # Some error in htrun, abort test execution
@@ -440,7 +490,7 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
             break
 
         # If execution was successful 'run_host_test' return tuple with results
-        single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics = host_test_result
+        single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics, single_test_output_path = host_test_result
         test_result = single_test_result
 
         build_path_abs = os.path.abspath(build_path)
@@ -462,8 +512,18 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
                 }
                 greentea_hooks.run_hook_ext('hook_test_end', format)
 
+        if duration_store and single_test_result in [TEST_RESULT_OK, TEST_RESULT_FAIL]:
+            # Tests which didn't run to the end would skew the history
+            duration_store.record(build,
+                                  test_suite_name,
+                                  micro,
+                                  single_testduration,
+                                  image_path=test['image_path'],
+                                  result=single_test_result,
+                                  testcases=dict((name, tc.get('duration', 0.0))
+                                                 for name, tc in result_test_cases.items()))
+
         # Update report for optional reporting feature
-        test_suite_name = test['test_bin'].lower()
         if build not in test_report:
             test_report[build] = {}
 
@@ -533,6 +593,8 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
         # Test report build for whole binary
         test_report[build][test_suite_name]['single_test_result'] = single_test_result
         test_report[build][test_suite_name]['single_test_output'] = single_test_output
+        if single_test_output_path:
+            test_report[build][test_suite_name]['single_test_output_path'] = single_test_output_path
         test_report[build][test_suite_name]['elapsed_time'] = single_testduration
         test_report[build][test_suite_name]['platform_name'] = micro
         test_report[build][test_suite_name]['copy_method'] = copy_method
@@ -544,6 +606,10 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
         test_report[build][test_suite_name]['image_path'] = test['image_path']
         test_report[build][test_suite_name]['test_bin_name'] = os.path.basename(test['image_path'])
 
+        if report_writers:
+            # Rendered now, the report files are written when all tests are done
+            report_writers.add_test_suite(build, test_suite_name, test_report[build][test_suite_name])
+
         passes_cnt, failures_cnt = 0, 0
         for tc_name in sorted(result_test_cases.keys()):
             gt_logger.gt_log_tab("test case: '%s' %s %s in %.2f sec"% (tc_name,
@@ -573,6 +639,11 @@ def run_test_thread(test_result_queue, test_queue, opts, mut, build, build_path,
             print()
             print(single_test_output)
 
+    if htrun_worker is not None:
+        htrun_worker.stop()
+    if duration_store:
+        duration_store.close()
+
     #greentea_release_target_id(mut['target_id'], gt_instance_uuid)
     test_result_queue.put({'test_platforms_match': test_platforms_match,
                            'test_exec_retcode': test_exec_retcode,
@@ -668,7 +739,7 @@ def main_cli(opts, args, gt_instance_uuid=None):
             return host_test_result
 
         # If execution was successful 'run_host_test' return tuple with results
-        single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics = host_test_result
+        single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics, single_test_output_path = host_test_result
         status = TEST_RESULTS.index(single_test_result) if single_test_result in TEST_RESULTS else -1
         return (status)
 
@@ -748,6 +819,33 @@ def main_cli(opts, args, gt_instance_uuid=None):
     test_result_queue = Queue() # used to store results of each thread
     execute_threads = []        # list of threads to run test cases
 
+    # Past test durations, test threads record each test in it
+    duration_store = None
+    if opts.adaptive_timeout or opts.work_stealing:
+        try:
+            duration_store = DurationStore()
+        except Exception as e:
+            gt_logger.gt_log_warn("test durations will not be recorded: %s"% str(e))
+
+    # JUNIT, JSON and HTML reports get each test suite as soon as it's done
+    report_writers = None
+    if not opts.only_build_tests:
+        writers = []
+        if opts.report_junit_file_name:
+            # This test specification will be used by JUnit exporter to populate TestSuite.properties (useful meta-data for Viewer)
+            test_suite_properties = {}
+            for test_build in test_spec.get_test_builds():
+                test_build_properties = get_test_build_properties(test_spec, test_build.get_name())
+                if test_build_properties:
+                    test_suite_properties[test_build.get_name()] = test_build_properties
+            writers.append(JUnitReportWriter(opts.report_junit_file_name, test_suite_properties=test_suite_properties))
+        if opts.report_json_file_name:
+            writers.append(JsonReportWriter(opts.report_json_file_name))
+        if opts.report_html_file_name:
+            writers.append(HtmlReportWriter(opts.report_html_file_name))
+        if writers:
+            report_writers = ReportWriterGroup(writers)
+
     # Values used to generate random seed for test execution order shuffle
     SHUFFLE_SEED_ROUND = 10 # Value used to round float random seed
     shuffle_random_seed = round(random.random(), SHUFFLE_SEED_ROUND)
@@ -756,6 +854,52 @@ def main_cli(opts, args, gt_instance_uuid=None):
     if opts.shuffle_test_seed:
         shuffle_random_seed = round(float(opts.shuffle_test_seed), SHUFFLE_SEED_ROUND)
 
+    def execute_test_threads(execute_threads):
+        """! Runs test threads and merges their partial test reports into test_report
+        @return Tuple of (tests run, failed tests), None if a thread didn't report
+        """
+        platforms_match, exec_retcode = 0, 0
+        gt_logger.gt_log_tab("use %s instance%s of execution threads for testing"% (len(execute_threads),
+            's' if len(execute_threads) != 1 else str()), print_text=verbose)
+        for t in execute_threads:
+            t.daemon = True
+            t.start()
+
+        # merge partial test reports from different threads to final test report
+        for t in execute_threads:
+            try:
+                # We can't block forever here since that prevents KeyboardInterrupts
+                # from being propagated correctly. Therefore, we just join with a
+                # timeout of 0.1 seconds until the thread isn't alive anymore.
+                # A time of 0.1 seconds is a fairly arbitrary choice. It needs
+                # to balance CPU utilization and responsiveness to keyboard interrupts.
+                # Checking 10 times a second seems to be stable and responsive.
+                while t.is_alive():
+                    t.join(0.1)
+
+                test_return_data = test_result_queue.get(False)
+            except Exception as e:
+                # No test report generated
+                gt_logger.gt_log_err("could not generate test report" + str(e))
+                return None
+
+            platforms_match += test_return_data['test_platforms_match']
+            exec_retcode += test_return_data['test_exec_retcode']
+            partial_test_report = test_return_data['test_report']
+            # todo: find better solution, maybe use extend
+            for report_key in partial_test_report.keys():
+                if report_key not in test_report:
+                    test_report[report_key] = {}
+                    test_report.update(partial_test_report)
+                else:
+                    test_report[report_key].update(partial_test_report[report_key])
+        return platforms_match, exec_retcode
+
+    # With --work-stealing, tests of all builds are queued first and run
+    # by one TestScheduler over the devices of all platforms
+    scheduler_jobs = []
+    scheduler_muts = []
+
     ### Testing procedures, for each target, for each target's compatible platform
     # In case we are using test spec (switch --test-spec) command line option -t <list_of_targets>
     # is used to enumerate builds from test spec we are supplying
@@ -846,7 +990,7 @@ def main_cli(opts, args, gt_instance_uuid=None):
                     return host_test_result
 
                 # If execution was successful 'run_host_test' return tuple with results
-                single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics = host_test_result
+                single_test_result, single_test_output, single_testduration, single_timeout, result_test_cases, test_cases_summary, memory_metrics, single_test_output_path = host_test_result
                 status = TEST_RESULTS.index(single_test_result) if single_test_result in TEST_RESULTS else -1
                 if single_test_result != TEST_RESULT_OK:
                     test_exec_retcode += 1
@@ -869,6 +1013,8 @@ def main_cli(opts, args, gt_instance_uuid=None):
                 # We want to shuffle test names randomly
                 random.shuffle(filtered_ctest_test_list_keys, lambda: shuffle_random_seed)
 
+            # Work stealing queues take the longest tests first
+            expected_durations = duration_store.expected_durations(platform_name) if duration_store and opts.work_stealing else {}
             for test_name in filtered_ctest_test_list_keys:
                 image_path = filtered_ctest_test_list[test_name].get_binary(binary_type=TestBinary.BIN_TYPE_BOOTABLE).get_path()
                 compare_log = filtered_ctest_test_list[test_name].get_binary(binary_type=TestBinary.BIN_TYPE_BOOTABLE).get_compare_log()
@@ -876,52 +1022,36 @@ def main_cli(opts, args, gt_instance_uuid=None):
                     gt_logger.gt_log_err("Failed to find test binary for test %s flash method %s" % (test_name, 'usb'))
                 else:
                     test = {"test_bin": test_name, "image_path": image_path, "compare_log": compare_log}
-                    test_queue.put(test)
+                    if opts.work_stealing:
+                        # Run after all builds are queued, on any device of the platform
+                        test.update({"build": build, "build_path": build_path, "baud_rate": baudrate})
+                        expected_duration = expected_durations.get((platform_name, test_name.lower()))
+                        scheduler_jobs.append(TestJob(build, test_name, platform_name, image_path, expected_duration, test=test))
+                    else:
+                        test_queue.put(test)
+
+            if opts.work_stealing:
+                for mut in muts_to_test[:parallel_test_exec]:
+                    if mut not in scheduler_muts:
+                        scheduler_muts.append(mut)
+                continue
 
             number_of_threads = 0
             for mut in muts_to_test:
                 # Experimental, parallel test execution
                 if number_of_threads < parallel_test_exec:
-                    args = (test_result_queue, test_queue, opts, mut, build, build_path, greentea_hooks)
+                    args = (test_result_queue, test_queue, opts, mut, build, build_path, greentea_hooks, duration_store, report_writers)
                     t = Thread(target=run_test_thread, args=args)
                     execute_threads.append(t)
                     number_of_threads += 1
 
-        gt_logger.gt_log_tab("use %s instance%s of execution threads for testing"% (len(execute_threads),
-            's' if len(execute_threads) != 1 else str()), print_text=verbose)
-        for t in execute_threads:
-            t.daemon = True
-            t.start()
-
-        # merge partial test reports from different threads to final test report
-        for t in execute_threads:
-            try:
-                # We can't block forever here since that prevents KeyboardInterrupts
-                # from being propagated correctly. Therefore, we just join with a
-                # timeout of 0.1 seconds until the thread isn't alive anymore.
-                # A time of 0.1 seconds is a fairly arbitrary choice. It needs
-                # to balance CPU utilization and responsiveness to keyboard interrupts.
-                # Checking 10 times a second seems to be stable and responsive.
-                while t.is_alive():
-                    t.join(0.1)
-
-                test_return_data = test_result_queue.get(False)
-            except Exception as e:
-                # No test report generated
-                gt_logger.gt_log_err("could not generate test report" + str(e))
+        if not opts.work_stealing:
+            thread_results = execute_test_threads(execute_threads)
+            if thread_results is None:
                 test_exec_retcode += -1000
                 return test_exec_retcode
-
-            test_platforms_match += test_return_data['test_platforms_match']
-            test_exec_retcode += test_return_data['test_exec_retcode']
-            partial_test_report = test_return_data['test_report']
-            # todo: find better solution, maybe use extend
-            for report_key in partial_test_report.keys():
-                if report_key not in test_report:
-                    test_report[report_key] = {}
-                    test_report.update(partial_test_report)
-                else:
-                    test_report[report_key].update(partial_test_report[report_key])
+            test_platforms_match += thread_results[0]
+            test_exec_retcode += thread_results[1]
 
         execute_threads = []
 
@@ -931,6 +1061,24 @@ def main_cli(opts, args, gt_instance_uuid=None):
 
         gt_logger.gt_log("all tests finished!")
 
+    if scheduler_jobs:
+        # Each device gets its own queue of tests and takes from the others' when it's empty
+        scheduler = TestScheduler(scheduler_muts, scheduler_jobs)
+        gt_logger.gt_log("running %d test%s of all targets on %d device%s"% (
+            len(scheduler_jobs), "s" if len(scheduler_jobs) != 1 else "",
+            len(scheduler_muts), "s" if len(scheduler_muts) != 1 else ""))
+        execute_threads = []
+        for mut in scheduler_muts:
+            args = (test_result_queue, scheduler.queue(mut), opts, mut, None, None, greentea_hooks, duration_store, report_writers)
+            execute_threads.append(Thread(target=run_test_thread, args=args))
+        thread_results = execute_test_threads(execute_threads)
+        if thread_results is None:
+            test_exec_retcode += -1000
+            return test_exec_retcode
+        test_platforms_match += thread_results[0]
+        test_exec_retcode += thread_results[1]
+        gt_logger.gt_log("all tests finished!")
+
     # We will execute post test hooks on tests
     for build_name in test_report:
         test_name_list = []    # All test case names for particular yotta target
@@ -988,17 +1136,15 @@ def main_cli(opts, args, gt_instance_uuid=None):
                 return False
             return True
 
-        # Reports to JUNIT file
-        if opts.report_junit_file_name:
-            gt_logger.gt_log("exporting to JUNIT file '%s'..."% gt_logger.gt_bright(opts.report_junit_file_name))
-            # This test specification will be used by JUnit exporter to populate TestSuite.properties (useful meta-data for Viewer)
-            test_suite_properties = {}
-            for target_name in test_report:
-                test_build_properties = get_test_build_properties(test_spec, target_name)
-                if test_build_properties:
-                    test_suite_properties[target_name] = test_build_properties
-            junit_report = exporter_testcase_junit(test_report, test_suite_properties = test_suite_properties)
-            dump_report_to_text_file(opts.report_junit_file_name, junit_report)
+        # Reports to JUNIT, JSON and HTML files, test suites were added as they completed
+        if report_writers:
+            if opts.report_junit_file_name:
+                gt_logger.gt_log("exporting to JUNIT file '%s'..."% gt_logger.gt_bright(opts.report_junit_file_name))
+            if opts.report_json_file_name:
+                gt_logger.gt_log("exporting to JSON '%s'..."% gt_logger.gt_bright(opts.report_json_file_name))
+            if opts.report_html_file_name:
+                gt_logger.gt_log("exporting to HTML file '%s'..."% gt_logger.gt_bright(opts.report_html_file_name))
+            report_writers.close()
 
         # Reports to text file
         if opts.report_text_file_name:
@@ -1009,20 +1155,6 @@ def main_cli(opts, args, gt_instance_uuid=None):
             text_final_report = '\n'.join([text_report, text_results, text_testcase_report, text_testcase_results])
             dump_report_to_text_file(opts.report_text_file_name, text_final_report)
 
-        # Reports to JSON file
-        if opts.report_json_file_name:
-            # We will not print summary and json report together
-            gt_logger.gt_log("exporting to JSON '%s'..."% gt_logger.gt_bright(opts.report_json_file_name))
-            json_report = exporter_json(test_report)
-            dump_report_to_text_file(opts.report_json_file_name, json_report)
-
-        # Reports to HTML file
-        if opts.report_html_file_name:
-            gt_logger.gt_log("exporting to HTML file '%s'..."% gt_logger.gt_bright(opts.report_html_file_name))
-            # Generate a HTML page displaying all of the results
-            html_report = exporter_html(test_report)
-            dump_report_to_text_file(opts.report_html_file_name, html_report)
-
         # Memory metrics to CSV file
         if opts.report_memory_metrics_csv_file_name:
             gt_logger.gt_log("exporting memory metrics to CSV file '%s'..."% gt_logger.gt_bright(opts.report_memory_metrics_csv_file_name))
@@ -1030,6 +1162,12 @@ def main_cli(opts, args, gt_instance_uuid=None):
             memory_metrics_csv_report = exporter_memory_metrics_csv(test_report)
             dump_report_to_text_file(opts.report_memory_metrics_csv_file_name, memory_metrics_csv_report)
 
+        # Results to results store database
+        if opts.report_results_store_file_name:
+            gt_logger.gt_log("exporting to results store '%s'..."% gt_logger.gt_bright(opts.report_results_store_file_name))
+            # Adds this run to the ones already stored, see mbed_results_store
+            export_to_results_store(opts.report_results_store_file_name, test_report)
+
         # Final summary
         if test_report:
             # Test suite report
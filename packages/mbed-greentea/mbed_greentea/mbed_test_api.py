@@ -36,9 +36,12 @@ from mbed_os_tools.test.mbed_test_api import (
     TEST_RESULTS,
     TEST_RESULT_MAPPING,
     RUN_HOST_TEST_POPEN_ERROR,
+    HtrunOutputCapture,
+    HtrunOutputParser,
     get_test_result,
     run_command,
     run_htrun,
+    run_htrun_in_process,
     get_testcase_count_and_names,
     get_testcase_utest,
     get_coverage_data,
@@ -79,7 +82,10 @@ def run_host_test(image_path,
                   polling_timeout=None,
                   retry_count=1,
                   tags=None,
-                  run_app=None):
+                  run_app=None,
+                  in_process=False,
+                  htrun_worker=None,
+                  test_timeout=None):
     """! This function runs host test supervisor (executes mbedhtrun) and checks output from host test process.
     @param image_path Path to binary file for flashing
     @param disk Currently mounted mbed-enabled devices disk (mount point)
@@ -99,10 +105,15 @@ def run_host_test(image_path,
     @param tags Filter list of available devices under test to only run on devices with the provided list
            of tags  [tag-filters tag1,tag]
     @param run_app Run application mode flag (we run application and grab serial port data)
+    @param in_process Run mbedhtrun as a library call in this process instead of a subprocess
+    @param htrun_worker HtrunWorker running mbedhtrun for this device, instead of a subprocess per test
+    @param test_timeout Timeout in sec of the test instead of the one set by the DUT, e.g. from DurationStore
     @param digest_source if None mbedhtrun will be executed. If 'stdin',
            stdin will be used via StdInObserver or file (if
            file name was given as switch option)
-    @return Tuple with test results, test output, test duration times, test case results, and memory metrics.
+    @return Tuple with test results, test output, test duration times, test case results, memory metrics
+            and the path of the log file with the whole output. Test output is the end of the output
+            if it was written to a log file, the path is None if it wasn't.
             Return int > 0 if running mbedhtrun process failed.
             Retrun int < 0 if something went wrong during mbedhtrun execution.
     """
@@ -227,15 +238,37 @@ def run_host_test(image_path,
         cmd += ["--tag-filters", tags]
     if polling_timeout:
         cmd += ["-P", str(polling_timeout)]
+    if test_timeout:
+        cmd += ["--test-timeout", str(test_timeout)]
 
     gt_logger.gt_log_tab("calling mbedhtrun: %s" % " ".join(cmd), print_text=verbose)
     gt_logger.gt_log("mbed-host-test-runner: started")
 
+    # In-process runs save starting a Python interpreter for each test
+    run = run_htrun_in_process if in_process else run_htrun
+    # Long output goes to a log file named after the test, see HtrunOutputCapture
+    log_prefix = "htrun-%s-" % os.path.splitext(os.path.basename(image_path))[0]
+    capture = None
     for retry in range(1, 1 + retry_count):
+        if capture is not None:
+            # Only the output of the last try is reported
+            capture.remove()
+        capture = HtrunOutputCapture(prefix=log_prefix)
+        # Results are parsed while mbedhtrun runs, GCOV files written as they come.
+        # Like the report, they are taken from the printable output only.
+        parser = HtrunOutputParser(coverage_build_path=build_path, printable_only=True)
         start_time = time()
-        returncode, htrun_output = run_htrun(cmd, verbose)
+        if htrun_worker is not None:
+            # The worker feeds a copy of the parser and sends it back with the
+            # tail of the output, long output stays in the worker's log file
+            job = htrun_worker.run(cmd, verbose, parser=parser, prefix=log_prefix)
+            returncode, parser = job.returncode, job.parser
+            capture = HtrunOutputCapture.from_log(job.output, job.output_path)
+        else:
+            returncode, capture = run(cmd, verbose, parser=parser, capture=capture)
         end_time = time()
         if returncode < 0:
+            capture.remove()
             return returncode
         elif returncode == 0:
             break
@@ -244,11 +277,10 @@ def run_host_test(image_path,
         gt_logger.gt_log("{} failed after {} count".format(cmd, retry_count))
 
     testcase_duration = end_time - start_time   # Test case duration from reset to {end}
-    htrun_output = get_printable_string(htrun_output)
-    result = get_test_result(htrun_output)
-    result_test_cases = get_testcase_result(htrun_output)
-    test_cases_summary = get_testcase_summary(htrun_output)
-    max_heap, reserved_heap, thread_stack_info = get_memory_metrics(htrun_output)
+    result = parser.test_result()
+    result_test_cases = parser.testcase_result()
+    test_cases_summary = parser.testcase_summary()
+    max_heap, reserved_heap, thread_stack_info = parser.memory_metrics()
 
     thread_stack_summary = []
 
@@ -261,7 +293,12 @@ def run_host_test(image_path,
         "thread_stack_info": thread_stack_info,
         "thread_stack_summary": thread_stack_summary
     }
-    get_coverage_data(build_path, htrun_output)
+    parser.dump_coverage_data(build_path)
+    if capture.spilled():
+        # Reports reference the log file for the rest
+        htrun_output = get_printable_string(capture.tail())
+    else:
+        htrun_output = get_printable_string(capture.getvalue())
 
     gt_logger.gt_log("mbed-host-test-runner: stopped and returned '%s'"% result, print_text=verbose)
-    return (result, htrun_output, testcase_duration, duration, result_test_cases, test_cases_summary, memory_metrics)
+    return (result, htrun_output, testcase_duration, duration, result_test_cases, test_cases_summary, memory_metrics, capture.path)
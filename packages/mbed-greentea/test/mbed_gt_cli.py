@@ -15,9 +15,24 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
+import optparse
+import os
+import shutil
 import six
+import tempfile
 import sys
 import unittest
+from mock import patch
+try:
+    from Queue import Queue
+except ImportError:
+    # Python 3
+    from queue import Queue
+
+from mbed_os_tools.test.mbed_duration_store import DurationStore
+from mbed_os_tools.test.mbed_greentea_scheduler import TestJob, TestScheduler
+from mbed_os_tools.test.mbed_report_api import ReportWriterGroup
 
 from mbed_greentea import mbed_greentea_cli
 from mbed_greentea.tests_spec import TestSpec
@@ -147,5 +162,163 @@ class GreenteaCliFunctionality(unittest.TestCase):
         expected = set(['mbed-drivers-test-c_strings', 'mbed-drivers-test-generic_tests'])
         self.assertEqual(set(test_list.keys()), expected)
 
+    def run_test_thread_opts(self, **kwargs):
+        opts = dict(
+            copy_method=None, reset_method=None, verbose_test_result_only=False,
+            enum_host_tests=None, digest_source=None, json_test_configuration=None,
+            global_resource_mgr=None, fast_model_connection=None, num_sync_packtes=None,
+            tags=None, retry_count=1, polling_timeout=None, htrun_in_process=False,
+            htrun_worker=False, adaptive_timeout=False, report_fails=False)
+        opts.update(kwargs)
+        return optparse.Values(opts)
+
+    def test_run_test_thread_work_stealing(self):
+        k64f_1 = {"platform_name": "K64F", "target_id": "0240_1", "mount_point": "/mnt/1",
+                  "serial_port": "/dev/ttyACM0", "baud_rate": 9600}
+        k64f_2 = dict(k64f_1, target_id="0240_2")
+        # Tests of two builds, for the same platform
+        jobs = [TestJob(build, name, "K64F", name + ".bin",
+                        test={"test_bin": name, "image_path": name + ".bin", "compare_log": None,
+                              "build": build, "build_path": "./.build/" + build, "baud_rate": 115200})
+                for build, name in (("K64F-ARM", "a"), ("K64F-ARM", "b"), ("K64F-GCC_ARM", "c"))]
+        scheduler = TestScheduler([k64f_1, k64f_2], jobs)
+        opts = self.run_test_thread_opts()
+        result = ("OK", "", 1.0, 10, {}, None, {}, None)
+        result_queue = Queue()
+        with patch("mbed_greentea.mbed_greentea_cli.get_platform_property", return_value=None), \
+             patch("mbed_greentea.mbed_greentea_cli.run_host_test", return_value=result) as _run_host_test:
+            # The only running device takes the other device's tests too
+            mbed_greentea_cli.run_test_thread(result_queue, scheduler.queue(k64f_1), opts, k64f_1,
+                                              None, None, None)
+        calls = sorted(c[0][:4] for c in _run_host_test.call_args_list)
+        self.assertEqual(calls, [
+            ("a.bin", "/mnt/1", "/dev/ttyACM0:115200", "./.build/K64F-ARM"),
+            ("b.bin", "/mnt/1", "/dev/ttyACM0:115200", "./.build/K64F-ARM"),
+            ("c.bin", "/mnt/1", "/dev/ttyACM0:115200", "./.build/K64F-GCC_ARM"),
+        ])
+        report = result_queue.get(False)
+        self.assertEqual(report["test_platforms_match"], 3)
+        self.assertEqual(sorted(report["test_report"]["K64F-ARM"]), ["a", "b"])
+        self.assertEqual(sorted(report["test_report"]["K64F-GCC_ARM"]), ["c"])
+
+    def test_run_test_thread_durations(self):
+        mut = {"platform_name": "K64F", "target_id": "0240_1", "mount_point": "/mnt/1",
+               "serial_port": "/dev/ttyACM0", "baud_rate": 9600}
+        test_queue = Queue()
+        for _ in range(2):
+            test_queue.put({"test_bin": "Tests-A", "image_path": "a.bin", "compare_log": None})
+        result = ("OK", "", 20.0, 10, {"case-1": {"duration": 5.0}}, (1, 0), {}, None)
+        tmp_dir = tempfile.mkdtemp()
+        store = DurationStore(os.path.join(tmp_dir, "durations.db"))
+        try:
+            with patch("mbed_greentea.mbed_greentea_cli.get_platform_property", return_value=None), \
+                 patch("mbed_greentea.mbed_greentea_cli.run_host_test", return_value=result) as _run_host_test:
+                mbed_greentea_cli.run_test_thread(Queue(), test_queue, self.run_test_thread_opts(adaptive_timeout=True),
+                                                  mut, "K64F-ARM", "./.build/K64F/ARM", None, store)
+            # Recorded after the first test, used for the timeout of the second
+            timeouts = [c[1]["test_timeout"] for c in _run_host_test.call_args_list]
+            self.assertEqual(timeouts, [None, store.timeout("tests-a", "K64F", None)])
+            self.assertEqual(store.durations("tests-a", "K64F"), [20.0, 20.0])
+            self.assertEqual(store.durations("tests-a", "K64F", "case-1"), [5.0, 5.0])
+        finally:
+            store.close()
+            shutil.rmtree(tmp_dir)
+
+    def main_cli_opts(self, *args):
+        with patch.object(sys, "argv", ["mbedgt"] + list(args)), \
+             patch("mbed_greentea.mbed_greentea_cli.get_hello_string", return_value=""), \
+             patch("mbed_greentea.mbed_greentea_cli.main_cli", return_value=0) as _main_cli:
+            mbed_greentea_cli.main()
+        return _main_cli.call_args[0][0]
+
+    def test_main_cli_no_duration_store(self):
+        opts = self.main_cli_opts()
+        test_spec = TestSpec()
+        test_spec.parse(test_spec_def)
+        devices = [{"platform_name": "K64F", "target_id": "0240_1", "mount_point": "/mnt/1",
+                    "serial_port": "/dev/ttyACM0"}]
+        result = ("OK", "", 1.0, 10, {}, None, {}, None)
+        with patch("mbed_greentea.mbed_greentea_cli.get_test_spec", return_value=(test_spec, 0)), \
+             patch("mbed_os_tools.detect.create") as _create, \
+             patch("mbed_greentea.mbed_greentea_cli.DurationStore") as _store, \
+             patch("mbed_greentea.mbed_greentea_cli.get_platform_property", return_value=None), \
+             patch("mbed_greentea.mbed_greentea_cli.run_host_test", return_value=result) as _run_host_test:
+            _create.return_value.list_mbeds.return_value = devices
+            self.assertEqual(mbed_greentea_cli.main_cli(opts, []), 0)
+        # Durations are only recorded for --adaptive-timeout and --work-stealing
+        _store.assert_not_called()
+        self.assertEqual(_run_host_test.call_count, 2)
+
+    def test_main_cli_report_writers(self):
+        tmp_dir = tempfile.mkdtemp()
+        paths = [os.path.join(tmp_dir, "report" + ext) for ext in (".xml", ".json", ".html")]
+        opts = self.main_cli_opts("--report-junit", paths[0], "--report-json", paths[1],
+                                  "--report-html", paths[2])
+        test_spec = TestSpec()
+        test_spec.parse(test_spec_def)
+        devices = [{"platform_name": "K64F", "target_id": "0240_1", "mount_point": "/mnt/1",
+                    "serial_port": "/dev/ttyACM0"}]
+        result = ("OK", "", 1.0, 10, {}, None, {}, None)
+        try:
+            with patch("mbed_greentea.mbed_greentea_cli.get_test_spec", return_value=(test_spec, 0)), \
+                 patch("mbed_os_tools.detect.create") as _create, \
+                 patch("mbed_greentea.mbed_greentea_cli.get_platform_property", return_value=None), \
+                 patch("mbed_greentea.mbed_greentea_cli.run_host_test", return_value=result), \
+                 patch("mbed_greentea.mbed_greentea_cli.ReportWriterGroup", wraps=ReportWriterGroup) as _group:
+                _create.return_value.list_mbeds.return_value = devices
+                self.assertEqual(mbed_greentea_cli.main_cli(opts, []), 0)
+
+            # The test threads added each test suite to the reports when it was done
+            self.assertEqual(_group.call_count, 1)
+            with open(paths[1]) as f:
+                report = json.load(f)
+            self.assertEqual(len(report["K64F-ARM"]), 2)
+            from xml.etree import ElementTree as ET
+            self.assertEqual(ET.parse(paths[0]).getroot().attrib["tests"], "2")
+            with open(paths[2]) as f:
+                self.assertTrue(f.read().endswith("</html>"))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_main_cli_work_stealing(self):
+        opts = self.main_cli_opts("--work-stealing")
+
+        test_spec = TestSpec()
+        test_spec.parse(test_spec_def)
+        # A second build for the same platform and a build for another one
+        gcc_build = dict(test_spec_def["builds"]["K64F-ARM"], toolchain="GCC_ARM")
+        nrf_build = dict(test_spec_def["builds"]["K64F-ARM"], platform="NRF51_DK")
+        test_spec.parse({"builds": {"K64F-GCC_ARM": gcc_build, "NRF51_DK-ARM": nrf_build}})
+        devices = [
+            {"platform_name": "K64F", "target_id": "0240_1", "mount_point": "/mnt/1",
+             "serial_port": "/dev/ttyACM0"},
+            {"platform_name": "NRF51_DK", "target_id": "1100_1", "mount_point": "/mnt/2",
+             "serial_port": "/dev/ttyACM1"},
+        ]
+        result = ("OK", "", 1.0, 10, {}, None, {}, None)
+        tmp_dir = tempfile.mkdtemp()
+        store = DurationStore(os.path.join(tmp_dir, "durations.db"))
+        try:
+            with patch("mbed_greentea.mbed_greentea_cli.get_test_spec", return_value=(test_spec, 0)), \
+                 patch("mbed_os_tools.detect.create") as _create, \
+                 patch("mbed_greentea.mbed_greentea_cli.DurationStore", return_value=store), \
+                 patch("mbed_greentea.mbed_greentea_cli.get_platform_property", return_value=None), \
+                 patch("mbed_greentea.mbed_greentea_cli.TestScheduler", wraps=TestScheduler) as _scheduler, \
+                 patch("mbed_greentea.mbed_greentea_cli.run_host_test", return_value=result) as _run_host_test:
+                _create.return_value.list_mbeds.return_value = devices
+                self.assertEqual(mbed_greentea_cli.main_cli(opts, []), 0)
+        finally:
+            store.close()
+            shutil.rmtree(tmp_dir)
+
+        # One scheduler over the devices and tests of all builds
+        self.assertEqual(_scheduler.call_count, 1)
+        muts, jobs = _scheduler.call_args[0]
+        self.assertEqual(sorted(mut["target_id"] for mut in muts), ["0240_1", "1100_1"])
+        self.assertEqual(sorted(set(job.build_name for job in jobs)),
+                         ["K64F-ARM", "K64F-GCC_ARM", "NRF51_DK-ARM"])
+        self.assertEqual(len(jobs), 6)
+        self.assertEqual(_run_host_test.call_count, 6)
+
 if __name__ == '__main__':
     unittest.main()
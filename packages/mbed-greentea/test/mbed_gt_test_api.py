@@ -15,7 +15,11 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import os
+import tempfile
 import unittest
+from mock import MagicMock, patch
+from mbed_os_tools.test.mbed_htrun_worker import HtrunResult
 from mbed_greentea import mbed_test_api
 
 
@@ -591,5 +595,156 @@ Plugin info: HostTestPluginBase::BasePlugin: Waiting up to 60 sec for '024000003
         result = mbed_test_api.get_testcase_result(self.OUTPUT_STARTTAG_MISSING)
         self.assertEqual(result['DNS query']['utest_log'], "__testcase_start tag not found.")
 
+    def test_run_host_test_in_process(self):
+        output = "[1.00][HTST][INF] {{result;success}}\n"
+
+        def run(cmd, verbose, parser, capture):
+            capture.write(output)
+            parser.feed(output)
+            return 0, capture
+
+        with patch("mbed_greentea.mbed_test_api.run_htrun") as _run_htrun, \
+             patch("mbed_greentea.mbed_test_api.run_htrun_in_process") as _in_process:
+            _in_process.side_effect = run
+            result = mbed_test_api.run_host_test("BUILD/tests/K64F/GCC_ARM/test.bin",
+                                                 "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                                 "0240", micro="K64F", in_process=True)
+        _run_htrun.assert_not_called()
+        cmd = _in_process.call_args[0][0]
+        self.assertEqual(cmd[0], "mbedhtrun")
+        self.assertIn("0240", cmd)
+        self.assertEqual(result[0], mbed_test_api.TEST_RESULT_OK)
+        self.assertEqual(result[1], output)
+        self.assertIsNone(result[7])
+
+    def test_run_host_test_htrun_worker(self):
+        output = "[1.00][HTST][INF] {{result;success}}\n"
+
+        def run(cmd, verbose, parser, prefix):
+            parser.feed(output)
+            return HtrunResult(0, output, 1.0, mbed_test_api.TEST_RESULT_OK, {}, parser)
+
+        worker = MagicMock()
+        worker.run.side_effect = run
+        with patch("mbed_greentea.mbed_test_api.run_htrun") as _run_htrun:
+            result = mbed_test_api.run_host_test("test.bin", "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                                 "0240", micro="K64F", htrun_worker=worker,
+                                                 test_timeout=42)
+        self.assertFalse(_run_htrun.called)
+        cmd = worker.run.call_args[0][0]
+        self.assertEqual(cmd[0], "mbedhtrun")
+        self.assertEqual(cmd[-2:], ["--test-timeout", "42"])
+        # Results come from the printable output, as they did from get_printable_string()
+        self.assertTrue(worker.run.call_args[1]["parser"].printable_only)
+        self.assertEqual(result[0], mbed_test_api.TEST_RESULT_OK)
+        self.assertEqual(result[1], output)
+
+    def test_run_host_test_htrun_worker_log_file(self):
+        paths = []
+
+        def run(cmd, verbose, parser, prefix):
+            # The worker spilled the output to a log file and sent back the tail
+            fd, path = tempfile.mkstemp(prefix=prefix, suffix=".log")
+            with os.fdopen(fd, "w") as f:
+                f.write("[1.00][CONN][RXD] start\n[1.00][HTST][INF] {{result;failure}}\n")
+            paths.append(path)
+            parser.feed("[1.00][HTST][INF] {{result;failure}}\n")
+            return HtrunResult(1, "[1.00][HTST][INF] {{result;failure}}\n", 1.0,
+                               mbed_test_api.TEST_RESULT_FAIL, {}, parser, path)
+
+        worker = MagicMock()
+        worker.run.side_effect = run
+        result = mbed_test_api.run_host_test("test.bin", "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                             "0240", micro="K64F", htrun_worker=worker, retry_count=2)
+        try:
+            self.assertEqual(worker.run.call_args[1]["prefix"], "htrun-test-")
+            self.assertEqual(result[0], mbed_test_api.TEST_RESULT_FAIL)
+            self.assertEqual(result[1], "[1.00][HTST][INF] {{result;failure}}\n")
+            # Only the log of the last try is kept
+            self.assertEqual(result[7], paths[-1])
+            self.assertFalse(os.path.exists(paths[0]))
+            self.assertTrue(os.path.exists(paths[1]))
+        finally:
+            os.remove(paths[-1])
+
+    def test_run_host_test_popen_error(self):
+        output = "[1.00][HTST][INF] {{result;success}}\n"
+        returncodes = [mbed_test_api.RUN_HOST_TEST_POPEN_ERROR, 0]
+
+        def run(cmd, verbose, parser, capture):
+            returncode = returncodes.pop(0)
+            if returncode == 0:
+                capture.write(output)
+                parser.feed(output)
+            capture.close()
+            return returncode, capture
+
+        # A failed start is retried like a failed test
+        with patch("mbed_greentea.mbed_test_api.run_htrun", side_effect=run):
+            result = mbed_test_api.run_host_test("test.bin", "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                                 "0240", micro="K64F", retry_count=2)
+        self.assertEqual(result[0], mbed_test_api.TEST_RESULT_OK)
+
+        # And reported as a test result, not as an error aborting the run
+        returncodes = [mbed_test_api.RUN_HOST_TEST_POPEN_ERROR]
+        with patch("mbed_greentea.mbed_test_api.run_htrun", side_effect=run):
+            result = mbed_test_api.run_host_test("test.bin", "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                                 "0240", micro="K64F")
+        self.assertEqual(result[0], mbed_test_api.TEST_RESULT_TIMEOUT)
+
+    def test_run_host_test_htrun_worker_died(self):
+        output = "[1.00][HTST][INF] {{result;success}}\n"
+        results = [None, output]
+
+        def run(cmd, verbose, parser, prefix):
+            job_output = results.pop(0)
+            if job_output is None:
+                # See HtrunWorker.run(), the next job starts a new worker
+                return HtrunResult(mbed_test_api.RUN_HOST_TEST_POPEN_ERROR, "", 0.0,
+                                   mbed_test_api.TEST_RESULT_ERROR, {}, parser)
+            parser.feed(job_output)
+            return HtrunResult(0, job_output, 1.0, mbed_test_api.TEST_RESULT_OK, {}, parser)
+
+        worker = MagicMock()
+        worker.run.side_effect = run
+        result = mbed_test_api.run_host_test("test.bin", "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                             "0240", micro="K64F", htrun_worker=worker, retry_count=2)
+        self.assertEqual(worker.run.call_count, 2)
+        self.assertEqual(result[0], mbed_test_api.TEST_RESULT_OK)
+
+    def test_run_host_test_output_file(self):
+        lines = ["[1.00][CONN][RXD] %06d\n" % i for i in range(50000)]
+        lines.append("[1.00][CONN][INF] found KV pair in stream: {{__testcase_start;C1}}, queued...\n")
+        lines.append("[2.00][CONN][INF] found KV pair in stream: {{__testcase_finish;C1;1;0}}, queued...\n")
+        lines.append("[2.00][HTST][INF] {{result;success}}\n")
+
+        def run(cmd, verbose, parser, capture):
+            for line in lines:
+                capture.write(line)
+                parser.feed(line)
+            capture.close()
+            return 0, capture
+
+        # Results come from the parser, the whole output isn't read back
+        with patch("mbed_greentea.mbed_test_api.run_htrun", side_effect=run), \
+             patch.object(mbed_test_api.HtrunOutputCapture, "getvalue") as _getvalue:
+            result = mbed_test_api.run_host_test("BUILD/tests/K64F/GCC_ARM/test.bin",
+                                                 "/mnt/DAPLINK", "/dev/ttyACM0", ".",
+                                                 "0240", micro="K64F")
+        path = result[7]
+        try:
+            self.assertEqual(result[0], mbed_test_api.TEST_RESULT_OK)
+            self.assertEqual(result[4]["C1"]["result_text"], "OK")
+            self.assertEqual(result[4]["C1"]["duration"], 1.0)
+            self.assertFalse(_getvalue.called)
+            self.assertIn("htrun-test-", os.path.basename(path))
+            with open(path) as f:
+                self.assertEqual(f.read(), "".join(lines))
+            # Only the end of the output is kept in memory
+            self.assertLess(len(result[1]), len("".join(lines)))
+            self.assertTrue("".join(lines).endswith(result[1]))
+        finally:
+            os.remove(path)
+
 if __name__ == '__main__':
     unittest.main()
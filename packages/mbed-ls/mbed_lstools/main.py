@@ -148,6 +148,11 @@ def parse_cli(to_parse):
         '-u', '--list-unmounted', dest='list_unmounted', default=False,
         action='store_true',
         help='list mbeds, regardless of whether they are mounted or not')
+    parser.add_argument(
+        '--device-cache', dest='device_cache', default=False,
+        action='store_true',
+        help='reuse files read from mounted devices across runs until they'
+        ' are remounted')
     parser.add_argument(
         '-d', '--debug', dest='debug', default=False, action="store_true",
         help='outputs extra debug information useful when creating issues!')
@@ -187,7 +192,8 @@ def mbedls_main():
 
     mbeds = create(skip_retarget=args.skip_retarget,
                    list_unmounted=args.list_unmounted,
-                   force_mock=args.command is mock_platform)
+                   force_mock=args.command is mock_platform,
+                   device_cache=args.device_cache)
 
     if mbeds is None:
         logger.critical('This platform is not supported! Pull requests welcome at github.com/ARMmbed/mbed-ls')
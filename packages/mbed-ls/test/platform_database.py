@@ -75,6 +75,8 @@ class EmptyPlatformDatabaseTests(unittest.TestCase):
             stringio = MagicMock()
             _open.side_effect = (IOError("Bogus"), stringio)
             self.pdb = PlatformDatabase([LOCAL_PLATFORM_DATABASE])
+            # The database is loaded on first use
+            self.pdb.get("1234")
             stringio.__enter__.return_value.write.assert_called_with(
                 unicode(json.dumps(DEFAULT_PLATFORM_DB)))
             self.pdb.add("1234", "MYTARGET")
@@ -100,6 +102,7 @@ class EmptyPlatformDatabaseTests(unittest.TestCase):
             _open.return_value.__enter__.return_value = file_mock
             _getmtime.side_effect = (0, 1000000)
             self.pdb = PlatformDatabase([LOCAL_PLATFORM_DATABASE])
+            self.pdb.get("1234")
             file_mock.write.assert_called_with(
                 unicode(json.dumps(DEFAULT_PLATFORM_DB)))
 
@@ -227,10 +230,11 @@ class OverriddenPlatformDatabaseTests(unittest.TestCase):
         self.assertIn(('0123', 'Overriding_Platform'), list(self.pdb.items()))
         self.assertEqual(set(self.pdb.all_ids()), set(['0123']))
         self.assertEqual(self.pdb.get('0123'), 'Overriding_Platform')
-        self.overriding_db.seek(0)
-        self.assertEqual(self.overriding_db.read(),
-                         json.dumps(dict([('daplink', dict([('0123', 'Overriding_Platform')]))]))
-                         .encode('utf-8'))
+        # The file is replaced rather than written in place
+        with open(self.overriding_db_path, 'rb') as overriding_db:
+            self.assertEqual(overriding_db.read(),
+                             json.dumps(dict([('daplink', dict([('0123', 'Overriding_Platform')]))]))
+                             .encode('utf-8'))
         self.assertBaseUnchanged()
 
     def test_remove_override(self):
@@ -32,6 +32,15 @@ but it's already delivered as part of the mbed SDK's test suite and a command
 line tool (see below).
 """
 
+import sys
+
 from .main import create
+from .watcher import watch
 
 create = create
+watch = watch
+
+if sys.version_info >= (3, 5):
+    from .aio import async_create
+
+    async_create = async_create
@@ -0,0 +1,172 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""asyncio interface to mbed-ls (Python 3 only)
+
+Usage:
+    mbeds = detect.async_create()
+    devices = await mbeds.list_mbeds()
+    device = await mbeds.wait_for_mount(target_id, timeout=60)
+"""
+
+import asyncio
+import functools
+
+from .main import create
+from .watcher import DeviceWatcher
+
+import logging
+
+logger = logging.getLogger("mbedls.aio")
+logger.addHandler(logging.NullHandler())
+del logging
+
+
+class AsyncMbedLsTools(object):
+    """Coroutine versions of the detector's listing functions
+
+    Listing runs in an executor using the wrapped detector, so results are
+    the same dicts the synchronous API returns, including the concurrent
+    file system probes. Waiters don't poll: they sleep on an asyncio event
+    that a DeviceWatcher sets each time it re-lists devices after a hardware
+    change.
+    """
+
+    def __init__(self, mbeds, executor=None, event_source=None):
+        """! ctor
+        @param mbeds Detector object returned by mbed_os_tools.detect.create()
+        @param executor Executor running the blocking calls, None uses the
+          event loop's default executor
+        @param event_source Event source for the DeviceWatcher, defaults to
+          the best source available on this host
+        """
+        self.mbeds = mbeds
+        self.executor = executor
+        self.event_source = event_source
+        self._watcher = None
+        # Created on first use, inside the event loop that uses it
+        self._watcher_lock = None
+
+    def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def list_mbeds(self, **kwargs):
+        """! List details of connected devices
+        @param kwargs Keyword arguments of MbedLsToolsBase.list_mbeds()
+        @return List of device structures
+        """
+        return await self._run(self.mbeds.list_mbeds, **kwargs)
+
+    async def find_by_location(self, location, **kwargs):
+        """! Find the device plugged into a physical USB port
+        @param kwargs Keyword arguments of MbedLsToolsBase.list_mbeds()
+        @return Device structure, or None
+        """
+        return await self._run(self.mbeds.find_by_location, location, **kwargs)
+
+    def _lock(self):
+        if self._watcher_lock is None:
+            self._watcher_lock = asyncio.Lock()
+        return self._watcher_lock
+
+    async def _get_watcher(self):
+        async with self._lock():
+            if self._watcher is None:
+                watcher = DeviceWatcher(self.mbeds, self.event_source)
+                # The initial listing blocks
+                await self._run(watcher.start)
+                self._watcher = watcher
+            return self._watcher
+
+    async def wait_for(self, target_id, predicate=None, timeout=None):
+        """! Wait until a device with 'target_id' satisfies 'predicate'
+        @param target_id Target ID of the device to wait for
+        @param predicate Function that is passed the device, should return True
+          when the device is in the expected state
+        @param timeout Maximum time to wait in seconds, None waits forever
+        @return Copy of the matching device, or None on timeout
+        """
+        watcher = await self._get_watcher()
+        loop = asyncio.get_event_loop()
+        changed = asyncio.Event()
+
+        def on_refresh(devices):
+            loop.call_soon_threadsafe(changed.set)
+
+        watcher.add_listener(on_refresh)
+        deadline = None if timeout is None else loop.time() + timeout
+        try:
+            while True:
+                changed.clear()
+                device = watcher.wait_for(target_id, predicate, timeout=0)
+                if device is not None:
+                    return dict(device)
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return None
+                try:
+                    await asyncio.wait_for(changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+        finally:
+            watcher.remove_listener(on_refresh)
+
+    async def wait_for_mount(self, target_id, timeout=None):
+        """! Wait until the device with 'target_id' is mounted
+        @return Copy of the device, or None on timeout
+        """
+        return await self.wait_for(
+            target_id, lambda d: d.get("mount_point") is not None, timeout
+        )
+
+    async def wait_for_serial(self, target_id, timeout=None):
+        """! Wait until the device with 'target_id' has a serial port
+        @return Copy of the device, or None on timeout
+        """
+        return await self.wait_for(
+            target_id, lambda d: d.get("serial_port") is not None, timeout
+        )
+
+    async def close(self):
+        """! Stop watching for device changes"""
+        async with self._lock():
+            if self._watcher is not None:
+                await self._run(self._watcher.stop)
+                self._watcher = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+
+def async_create(mbeds=None, executor=None, **kwargs):
+    """! Create an asyncio interface to mbed-ls
+    @param mbeds Detector to wrap, defaults to a cached
+      mbed_os_tools.detect.create(**kwargs)
+    @param executor Executor running the blocking calls
+    @return AsyncMbedLsTools object, or None if the host OS is not supported
+    """
+    if mbeds is None:
+        mbeds = create(cached=True, **kwargs)
+        if mbeds is None:
+            return None
+    return AsyncMbedLsTools(mbeds, executor)
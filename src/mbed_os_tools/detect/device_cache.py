@@ -0,0 +1,139 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent cache of information parsed from files on device mount points"""
+
+import json
+import os
+import tempfile
+import threading
+from io import open
+from os.path import dirname, join
+from appdirs import user_data_dir
+
+import logging
+
+logger = logging.getLogger("mbedls.device_cache")
+logger.addHandler(logging.NullHandler())
+del logging
+
+try:
+    unicode
+except NameError:
+    unicode = str
+
+LOCAL_DEVICE_CACHE = join(user_data_dir("mbedls"), "devices.json")
+
+
+def _replace(src, dst):
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2
+        if os.name == "nt" and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class DeviceCache(object):
+    """Parsed content of mbed.htm and DETAILS.TXT, keyed by USB id
+
+    Each entry remembers the mount generation it was read from. A device that
+    has been remounted since has a new generation and its entry is replaced
+    on the next read, so there is at most one entry per USB id.
+    """
+
+    def __init__(self, path=LOCAL_DEVICE_CACHE):
+        self.path = path
+        self._entries = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding="utf-8") as cache_in:
+                    self._entries = json.load(cache_in)
+            except (IOError, ValueError) as e:
+                logger.debug("Not using device cache %s: %s", self.path, e)
+                self._entries = {}
+        return self._entries
+
+    def get(self, usb_id, generation, name):
+        """! Look up a cached file
+        @param usb_id USB id (target_id_usb_id) of the device
+        @param generation JSON-compatible list identifying the current mount
+        @param name Name of the file on the device
+        @return Tuple (found, value)
+        """
+        with self._lock:
+            entry = self._load().get(usb_id)
+            if entry and entry["generation"] == generation and name in entry["files"]:
+                return True, entry["files"][name]
+        return False, None
+
+    def set(self, usb_id, generation, name, value):
+        """! Store the parsed content of a file
+        @param value JSON-compatible value
+        """
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(usb_id)
+            if not entry or entry["generation"] != generation:
+                entry = {"generation": generation, "files": {}}
+                entries[usb_id] = entry
+            entry["files"][name] = value
+            self._dirty = True
+
+    def save(self):
+        """! Write the cache to disk if it changed
+        @details The file is replaced atomically, concurrent writers can only
+          lose each other's entries, which are then read again from the devices
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(dirname(self.path))
+            except OSError:
+                pass
+            try:
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=dirname(self.path), prefix=".devices-", suffix=".tmp"
+                )
+            except (IOError, OSError) as e:
+                logger.debug("Could not save device cache %s: %s", self.path, e)
+                return
+            try:
+                with open(fd, "w", encoding="utf-8") as out:
+                    out.write(unicode(json.dumps(self._entries)))
+                _replace(tmp_path, self.path)
+                self._dirty = False
+            except (IOError, OSError) as e:
+                logger.debug("Could not save device cache %s: %s", self.path, e)
+                os.remove(tmp_path)
+
+
+_device_cache = None
+_device_cache_lock = threading.Lock()
+
+
+def get_device_cache():
+    """! Return the process-wide DeviceCache"""
+    global _device_cache
+    with _device_cache_lock:
+        if _device_cache is None:
+            _device_cache = DeviceCache()
+        return _device_cache
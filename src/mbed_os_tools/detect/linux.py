@@ -17,6 +17,8 @@ import re
 import os
 
 from .lstools_base import MbedLsToolsBase
+from .mountinfo import get_mount_table
+from .sysfs import get_usb_topology
 
 import logging
 
@@ -48,6 +50,40 @@ class MbedLsToolsLinuxGeneric(MbedLsToolsBase):
         self.udp = re.compile(r"^[0-9]+-[0-9]+[^:\s]*$")
 
     def find_candidates(self):
+        topology = get_usb_topology()
+        if topology is None:
+            return self._find_candidates_by_id()
+
+        mount_ids = dict(self._fat_mounts())
+        logger.debug("Mount mapping %r", mount_ids)
+        candidates = []
+        for usb_device in topology.devices():
+            disks = usb_device.block_devices
+            if not disks or not usb_device.serial:
+                continue
+            ttys = usb_device.tty_devices
+            # The file system is on the whole disk, or on one of its partitions
+            mount_point = None
+            for name in [disks[0]] + usb_device.partitions(disks[0]):
+                mount_point = mount_ids.get(os.path.join("/dev", name))
+                if mount_point:
+                    break
+            candidates.append(
+                {
+                    "mount_point": mount_point,
+                    "serial_port": os.path.join("/dev", ttys[0]) if ttys else None,
+                    "target_id_usb_id": usb_device.serial,
+                    "vendor_id": usb_device.vendor_id,
+                    "product_id": usb_device.product_id,
+                    "location": usb_device.port_path,
+                }
+            )
+        return candidates
+
+    def _find_candidates_by_id(self):
+        """! Match disks to serial ports by their /dev/*/by-id names
+        @details Used when sysfs is not available
+        """
         disk_ids = self._dev_by_id("disk")
         serial_ids = self._dev_by_id("serial")
         mount_ids = dict(self._fat_mounts())
@@ -65,6 +101,24 @@ class MbedLsToolsLinuxGeneric(MbedLsToolsBase):
             for disk_uuid, disk_dev in disk_ids.items()
         ]
 
+    def _mount_generation(self, mount_point):
+        """! Identify the current mount of 'mount_point'
+        @return [mount id, st_dev, st_ino] or None
+        @details The kernel gives every mount a new id, so it changes when a
+          device is remounted, for example after flashing
+        """
+        mount_table = get_mount_table()
+        if mount_table is None:
+            return None
+        mount_id = mount_table.mount_id(mount_point)
+        if mount_id is None:
+            return None
+        try:
+            st = os.stat(mount_point)
+        except OSError:
+            return None
+        return [mount_id, st.st_dev, st.st_ino]
+
     def _dev_by_id(self, device_type):
         """! Get a dict, USBID -> device, for a device class
         @param device_type The type of devices to search. For exmaple, "serial"
@@ -91,6 +145,17 @@ class MbedLsToolsLinuxGeneric(MbedLsToolsBase):
             return {}
 
     def _fat_mounts(self):
+        """! Lists mounted devices with vfat file system (potential mbeds)
+        @result Returns list of all mounted vfat devices
+        @details Reads /proc/self/mountinfo, falls back to the 'mount' command
+          when it is not available
+        """
+        mount_table = get_mount_table()
+        if mount_table is None:
+            return self._fat_mounts_cli()
+        return mount_table.fat_mounts()
+
+    def _fat_mounts_cli(self):
         """! Lists mounted devices with vfat file system (potential mbeds)
         @result Returns list of all mounted vfat devices
         @details Uses Linux shell command: 'mount'
@@ -17,16 +17,23 @@ import re
 from abc import ABCMeta, abstractmethod
 from io import open
 from json import load
-from os import listdir
+from os import getpid, listdir
 from os.path import expanduser, isfile, join, exists, isdir
+from copy import deepcopy
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+from time import time
 import logging
 import functools
 import json
 
-from .platform_database import (
+from .device_cache import get_device_cache
+from .platform_database import (  # noqa: F401
     PlatformDatabase,
     LOCAL_PLATFORM_DATABASE,
     LOCAL_MOCKS_DATABASE,
+    shared_platform_database,
 )
 from future.utils import with_metaclass
 
@@ -73,6 +80,10 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
     DETAILS_TXT_NAME = "DETAILS.TXT"
     MBED_HTM_NAME = "mbed.htm"
 
+    # Concurrent reads of files from device mount points
+    FS_PROBE_WORKERS = 8
+    FS_PROBE_TIMEOUT = 10
+
     VENDOR_ID_DEVICE_TYPE_MAP = {
         "0483": "stlink",
         "0d28": "daplink",
@@ -82,6 +93,10 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
 
     def __init__(self, list_unmounted=False, **kwargs):
         """ ctor
+        @param list_unmounted List devices that are not mounted
+        @param device_cache DeviceCache object, or True for the process-wide
+          one, that keeps files parsed from mount points across listings.
+          Off by default
         """
         self.retarget_data = {}  # Used to retarget mbed-enabled platform properties
 
@@ -93,9 +108,28 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
         elif isfile(LOCAL_MOCKS_DATABASE):
             platform_dbs.append(LOCAL_MOCKS_DATABASE)
         platform_dbs.append(LOCAL_PLATFORM_DATABASE)
-        self.plat_db = PlatformDatabase(platform_dbs, primary_database=platform_dbs[0])
+        self.plat_db = shared_platform_database(
+            platform_dbs, primary_database=platform_dbs[0]
+        )
         self.list_unmounted = list_unmounted
 
+        # Recent list_mbeds() results, see the 'max_age' parameter
+        self._snapshots = {}
+        self._snapshots_lock = Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Mount point probes, see _update_devices_from_fs()
+        self._fs_probe_lock = Lock()
+        # Number of running or queued probes by mount point, in this process
+        self._fs_probes_running = {}
+        self._fs_probes_pid = getpid()
+
+        # Parsed device files are reused while a device stays mounted
+        self.device_cache = kwargs.get("device_cache") or None
+        if self.device_cache is True:
+            self.device_cache = get_device_cache()
+
         if "skip_retarget" not in kwargs or not kwargs["skip_retarget"]:
             self.retarget()
 
@@ -106,6 +140,7 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
         Note: Should not open any files
 
         @return A dict with the keys 'mount_point', 'serial_port' and 'target_id_usb_id'
+          and optionally 'location', the physical USB port of the device
         """
         raise NotImplementedError
 
@@ -115,6 +150,7 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
         filter_function=None,
         unique_names=False,
         read_details_txt=False,
+        max_age=None,
     ):
         """ List details of connected devices
         @return Returns list of structures with detailed info about each mbed
@@ -127,16 +163,68 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
           'platform_unique_name' member of the output dict
         @param read_details_txt A boolean controlling the presense of the
           output dict attributes read from other files present on the 'mount_point'
+        @param max_age If set, a result listed at most 'max_age' seconds ago with
+          the same arguments and a 'max_age' is returned without touching the
+          host. If None (default), devices are always listed again and the
+          result is not kept. Ignored when 'filter_function' is given
         @details Function returns list of dictionaries with mbed attributes
           'mount_point', TargetID name etc.
         Function returns mbed list with platform names if possible
         """
+        if filter_function:
+            return self._list_mbeds(
+                fs_interaction, filter_function, unique_names, read_details_txt
+            )
+
+        key = (fs_interaction, unique_names, read_details_txt)
+        if max_age is not None:
+            with self._snapshots_lock:
+                snapshot = self._snapshots.get(key)
+                if snapshot and time() - snapshot[0] <= max_age:
+                    self.cache_hits += 1
+                    return deepcopy(snapshot[1])
+                self.cache_misses += 1
+
+        listed_at = time()
+        result = self._list_mbeds(fs_interaction, None, unique_names, read_details_txt)
+        if max_age is not None:
+            # Only callers accepting snapshots pay for the copy
+            with self._snapshots_lock:
+                self._snapshots[key] = (listed_at, deepcopy(result))
+        return result
+
+    def find_by_location(self, location, **kwargs):
+        """ Find the device plugged into a physical USB port
+        @param location Value of the 'location' member of a list_mbeds() result,
+          for example "1-1.2.6" on Linux
+        @param kwargs Keyword arguments passed along to list_mbeds()
+        @return Device structure, or None if no device is connected there
+        @details The location stays the same when a device re-enumerates, for
+          example after flashing, while its serial port and mount point may not
+        """
+        if location is None:
+            return None
+        for device in self.list_mbeds(**kwargs):
+            if device["location"] == location:
+                return device
+        return None
+
+    def invalidate_snapshots(self):
+        """ Forget all results stored for list_mbeds(max_age=...)
+        """
+        with self._snapshots_lock:
+            self._snapshots.clear()
+
+    def _list_mbeds(
+        self, fs_interaction, filter_function, unique_names, read_details_txt
+    ):
         platform_count = {}
         candidates = list(self.find_candidates())
         logger.debug("Candidates for display %r", candidates)
-        result = []
+        devices = []
         for device in candidates:
             device["device_type"] = self._detect_device_type(device)
+            device.setdefault("location", None)
             if (
                 not device["mount_point"]
                 or not self.mount_point_ready(device["mount_point"])
@@ -154,73 +242,218 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
                     verbose_data=True,
                 )
                 device.update(platform_data or {"platform_name": None})
-                maybe_device = {
-                    FSInteraction.BeforeFilter: self._fs_before_id_check,
-                    FSInteraction.AfterFilter: self._fs_after_id_check,
-                    FSInteraction.Never: self._fs_never,
-                }[fs_interaction](device, filter_function, read_details_txt)
-                if maybe_device and (
-                    maybe_device["mount_point"] or self.list_unmounted
-                ):
-                    if unique_names:
-                        name = device["platform_name"]
-                        platform_count.setdefault(name, -1)
-                        platform_count[name] += 1
-                        device["platform_name_unique"] = "%s[%d]" % (
-                            name,
-                            platform_count[name],
-                        )
-                    try:
-                        device.update(self.retarget_data[device["target_id"]])
-                        logger.debug(
-                            "retargeting %s with %r",
-                            device["target_id"],
-                            self.retarget_data[device["target_id"]],
-                        )
-                    except KeyError:
-                        pass
-
-                    # This is done for API compatibility, would prefer for this to
-                    # just be None
-                    device["device_type"] = (
-                        device["device_type"] if device["device_type"] else "unknown"
+                devices.append(device)
+
+        devices = {
+            FSInteraction.BeforeFilter: self._fs_before_id_check,
+            FSInteraction.AfterFilter: self._fs_after_id_check,
+            FSInteraction.Never: self._fs_never,
+        }[fs_interaction](devices, filter_function, read_details_txt)
+
+        result = []
+        for device in devices:
+            if device["mount_point"] or self.list_unmounted:
+                if unique_names:
+                    name = device["platform_name"]
+                    platform_count.setdefault(name, -1)
+                    platform_count[name] += 1
+                    device["platform_name_unique"] = "%s[%d]" % (
+                        name,
+                        platform_count[name],
                     )
-                    result.append(maybe_device)
+                try:
+                    device.update(self.retarget_data[device["target_id"]])
+                    logger.debug(
+                        "retargeting %s with %r",
+                        device["target_id"],
+                        self.retarget_data[device["target_id"]],
+                    )
+                except KeyError:
+                    pass
+
+                # This is done for API compatibility, would prefer for this to
+                # just be None
+                device["device_type"] = (
+                    device["device_type"] if device["device_type"] else "unknown"
+                )
+                result.append(device)
 
         return result
 
-    def _fs_never(self, device, filter_function, read_details_txt):
-        """Filter device without touching the file system of the device"""
-        device["target_id"] = device["target_id_usb_id"]
-        device["target_id_mbed_htm"] = None
-        if not filter_function or filter_function(device):
-            return device
-        else:
-            return None
+    def _fs_never(self, devices, filter_function, read_details_txt):
+        """Filter devices without touching the file system of the devices"""
+        for device in devices:
+            device["target_id"] = device["target_id_usb_id"]
+            device["target_id_mbed_htm"] = None
+        return [d for d in devices if not filter_function or filter_function(d)]
 
-    def _fs_before_id_check(self, device, filter_function, read_details_txt):
-        """Filter device after touching the file system of the device.
+    def _fs_before_id_check(self, devices, filter_function, read_details_txt):
+        """Filter devices after touching the file system of the devices.
         Said another way: Touch the file system before filtering
         """
+        for device in devices:
+            device["target_id"] = device["target_id_usb_id"]
+        self._update_devices_from_fs(devices, read_details_txt)
+        return [d for d in devices if not filter_function or filter_function(d)]
 
-        device["target_id"] = device["target_id_usb_id"]
-        self._update_device_from_fs(device, read_details_txt)
-        if not filter_function or filter_function(device):
-            return device
-        else:
-            return None
-
-    def _fs_after_id_check(self, device, filter_function, read_details_txt):
-        """Filter device before touching the file system of the device.
+    def _fs_after_id_check(self, devices, filter_function, read_details_txt):
+        """Filter devices before touching the file system of the devices.
         Said another way: Touch the file system after filtering
         """
-        device["target_id"] = device["target_id_usb_id"]
-        device["target_id_mbed_htm"] = None
-        if not filter_function or filter_function(device):
-            self._update_device_from_fs(device, read_details_txt)
-            return device
-        else:
-            return None
+        for device in devices:
+            device["target_id"] = device["target_id_usb_id"]
+            device["target_id_mbed_htm"] = None
+        devices = [d for d in devices if not filter_function or filter_function(d)]
+        self._update_devices_from_fs(devices, read_details_txt)
+        return devices
+
+    def _probe_device_fs(self, device, read_details_txt, state):
+        """ Run _update_device_from_fs on a copy of 'device'
+        A probe that times out can't modify the device afterwards.
+        @param state Dictionary shared with _update_devices_from_fs(), its
+          'state' is 'queued' until the probe starts or is cancelled
+        @return Updated copy of the device, None if the probe was cancelled
+        """
+        with self._fs_probe_lock:
+            if state["state"] == "cancelled":
+                return None
+            state["state"] = "started"
+        try:
+            probe = dict(device)
+            self._update_device_from_fs(probe, read_details_txt)
+            return probe
+        finally:
+            with self._fs_probe_lock:
+                self._probe_done(device["mount_point"])
+
+    def _probe_done(self, mount_point):
+        """ Forget a probe of 'mount_point', called with _fs_probe_lock held
+        """
+        count = self._fs_probes_running.pop(mount_point, 0) - 1
+        if count > 0:
+            self._fs_probes_running[mount_point] = count
+
+    def _update_devices_from_fs(self, devices, read_details_txt):
+        """ Updates the devices information based on files from their 'mount_point'
+            @param devices List of dictionaries containing device information
+            @param read_details_txt A boolean controlling the presense of the
+              output dict attributes read from other files present on the 'mount_point'
+            @details Mass storage reads are slow, so devices are probed
+              concurrently by up to FS_PROBE_WORKERS threads. All probes
+              share one FS_PROBE_TIMEOUT deadline. A device whose probe didn't
+              finish by then, whose probe was still queued behind hung ones,
+              or whose probe from an earlier listing still runs, is marked
+              with 'degraded' and keeps the information available without
+              its files. The threads exit once their probes return, hung
+              ones included.
+        """
+        mounted = [d for d in devices if d.get("mount_point")]
+        if not mounted:
+            return
+
+        deadline = time() + self.FS_PROBE_TIMEOUT
+        pool = ThreadPool(min(self.FS_PROBE_WORKERS, len(mounted)))
+        try:
+            self._wait_fs_probes(pool, mounted, read_details_txt, deadline)
+        finally:
+            # No new probes, the pool threads exit when the running ones return
+            pool.close()
+        if self.device_cache:
+            self.device_cache.save()
+
+    def _wait_fs_probes(self, pool, mounted, read_details_txt, deadline):
+        """ Probe the mount points of 'mounted' devices in 'pool' until 'deadline'
+        """
+        with self._fs_probe_lock:
+            if self._fs_probes_pid != getpid():
+                # Probes of the parent process don't run in a forked child
+                self._fs_probes_running = {}
+                self._fs_probes_pid = getpid()
+            # Mount points still probed by earlier listings
+            busy = set(self._fs_probes_running)
+        probes = []
+        for device in mounted:
+            mount_point = device["mount_point"]
+            if mount_point in busy:
+                # Don't queue another probe behind one that hangs already
+                logger.warning(
+                    'Still reading files from mount point "%s", marking device '
+                    "as degraded",
+                    mount_point,
+                )
+                device["degraded"] = True
+                continue
+            state = {"state": "queued"}
+            with self._fs_probe_lock:
+                self._fs_probes_running[mount_point] = (
+                    self._fs_probes_running.get(mount_point, 0) + 1
+                )
+            probes.append(
+                (
+                    device,
+                    state,
+                    pool.apply_async(
+                        self._probe_device_fs, (device, read_details_txt, state)
+                    ),
+                )
+            )
+
+        for device, state, probe in probes:
+            try:
+                result = probe.get(max(0, deadline - time()))
+            except TimeoutError:
+                with self._fs_probe_lock:
+                    started = state["state"] == "started"
+                    if not started:
+                        state["state"] = "cancelled"
+                        self._probe_done(device["mount_point"])
+                if started:
+                    logger.warning(
+                        'Reading files from mount point "%s" timed out after %s '
+                        "seconds, marking device as degraded",
+                        device["mount_point"],
+                        self.FS_PROBE_TIMEOUT,
+                    )
+                else:
+                    logger.warning(
+                        'Files of mount point "%s" not read, all probe threads '
+                        "are busy with unresponsive devices, marking device as "
+                        "degraded",
+                        device["mount_point"],
+                    )
+                # Only the USB ID information is known, like for a hung probe
+                device["degraded"] = True
+                continue
+            if result is not None:
+                device.update(result)
+
+    def _mount_generation(self, mount_point):
+        """ Identify the current mount of 'mount_point'
+            @return JSON-compatible list that changes when the device is
+              remounted, or None if the host can't tell. Files of devices
+              without a mount generation are never cached
+        """
+        return None
+
+    def _read_device_file(self, device, name, reader):
+        """ Read a file from the device mount point through the device cache
+            @param device Dictionary containing device information
+            @param name Name of the file, used as cache key
+            @param reader Function that is passed the mount point and returns the
+              parsed, JSON-compatible content of the file
+        """
+        if not self.device_cache:
+            return reader(device["mount_point"])
+        generation = self._mount_generation(device["mount_point"])
+        if generation is None:
+            return reader(device["mount_point"])
+
+        usb_id = device["target_id_usb_id"]
+        found, value = self.device_cache.get(usb_id, generation, name)
+        if not found:
+            value = reader(device["mount_point"])
+            self.device_cache.set(usb_id, generation, name, value)
+        return value
 
     def _update_device_from_fs(self, device, read_details_txt):
         """ Updates the device information based on files from its 'mount_point'
@@ -232,7 +465,9 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
             return
 
         try:
-            directory_entries = listdir(device["mount_point"])
+            # Cached as well, as "." so that it can't clash with a file name:
+            # a warm listing doesn't list the mount point again
+            directory_entries = self._read_device_file(device, ".", listdir)
             device["directory_entries"] = directory_entries
             device["target_id"] = device["target_id_usb_id"]
 
@@ -284,7 +519,10 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
             read_details_txt
             and self.DETAILS_TXT_NAME.lower() in lowercase_directory_entries
         ):
-            details_txt = self._details_txt(device["mount_point"]) or {}
+            details_txt = (
+                self._read_device_file(device, self.DETAILS_TXT_NAME, self._details_txt)
+                or {}
+            )
             device.update(
                 {
                     "daplink_%s" % f.lower().replace(" ", "_"): v
@@ -348,7 +586,9 @@ class MbedLsToolsBase(with_metaclass(ABCMeta, object)):
         """Set the 'target_id', 'target_id_mbed_htm', 'platform_name' and
         'daplink_*' attributes by reading from mbed.htm on the device
         """
-        htm_target_id, daplink_info = self._read_htm_ids(device["mount_point"])
+        htm_target_id, daplink_info = self._read_device_file(
+            device, self.MBED_HTM_NAME, self._read_htm_ids
+        )
         if daplink_info:
             device.update(
                 {
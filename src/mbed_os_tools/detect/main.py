@@ -17,6 +17,7 @@
 import os
 import sys
 import platform
+import threading
 
 # Make sure that any global generic setup is run
 from . import lstools_base  # noqa: F401
@@ -28,13 +29,26 @@ logger.addHandler(logging.NullHandler())
 del logging
 
 
-def create(**kwargs):
+_cached_detectors = {}
+_cached_detectors_lock = threading.Lock()
+
+
+def create(cached=False, **kwargs):
     """! Factory used to create host OS specific mbed-lstools object
 
+    :param cached: if True, return the process-wide object created with the same
+      keyword arguments instead of a new one
     :param kwargs: keyword arguments to pass along to the constructors
     @return Returns MbedLsTools object or None if host OS is not supported
 
     """
+    if cached:
+        key = repr(sorted(kwargs.items()))
+        with _cached_detectors_lock:
+            if key not in _cached_detectors:
+                _cached_detectors[key] = create(**kwargs)
+            return _cached_detectors[key]
+
     result = None
     mbed_os = mbed_os_support()
     if mbed_os is not None:
@@ -87,18 +101,24 @@ def mbed_lstools_os_info():
 
 
 def mock_platform(mbeds, args):
-    for token in args.mock.split(","):
-        if ":" in token:
-            oper = "+"  # Default
-            mid, platform_name = token.split(":")
-            if mid and mid[0] in ["+", "-"]:
-                oper = mid[0]  # Operation (character)
-                mid = mid[1:]  # We remove operation character
-            mbeds.mock_manufacture_id(mid, platform_name, oper=oper)
-        elif token and token[0] in ["-", "!"]:
-            # Operations where do not specify data after colon: --mock=-1234,-7678
-            oper = token[0]
-            mid = token[1:]
-            mbeds.mock_manufacture_id(mid, "dummy", oper=oper)
-        else:
-            logger.error("Could not parse mock from token: '%s'", token)
+    # All mocks are written to the mock database at once
+    try:
+        with mbeds.plat_db.transaction():
+            for token in args.mock.split(","):
+                if ":" in token:
+                    oper = "+"  # Default
+                    mid, platform_name = token.split(":")
+                    if mid and mid[0] in ["+", "-"]:
+                        oper = mid[0]  # Operation (character)
+                        mid = mid[1:]  # We remove operation character
+                    mbeds.mock_manufacture_id(mid, platform_name, oper=oper)
+                elif token and token[0] in ["-", "!"]:
+                    # Operations where do not specify data after colon:
+                    # --mock=-1234,-7678
+                    oper = token[0]
+                    mid = token[1:]
+                    mbeds.mock_manufacture_id(mid, "dummy", oper=oper)
+                else:
+                    logger.error("Could not parse mock from token: '%s'", token)
+    except IOError as e:
+        logger.error("Mocks not saved: %s", e)
@@ -0,0 +1,186 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reader for the Linux /proc/self/mountinfo mount table"""
+
+import os
+import re
+import select
+import threading
+from collections import namedtuple
+from io import open
+
+import logging
+
+logger = logging.getLogger("mbedls.mountinfo")
+logger.addHandler(logging.NullHandler())
+del logging
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+FAT_FILESYSTEMS = frozenset(["vfat", "msdos"])
+
+Mount = namedtuple("Mount", ["mount_id", "source", "mount_point", "fstype"])
+
+_octal_escape = re.compile(r"\\([0-7]{3})")
+
+
+def unescape(field):
+    """! Decode the octal escapes the kernel uses for ' ', '\\t', '\\n' and '\\\\'
+    @param field Field of a mountinfo line
+    @return Field with escape sequences replaced
+    """
+    return _octal_escape.sub(lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(data):
+    """! Parse the content of a mountinfo file
+    @param data Content of the file as bytes
+    @return List of Mount tuples
+    @details Each line has the form:
+      36 35 98:0 /mnt1 /mnt2 rw,noatime master:1 - ext3 /dev/root rw
+      The number of optional fields before '-' varies.
+    """
+    result = []
+    for line in data.decode("utf-8", "replace").splitlines():
+        fields = line.split(" ")
+        try:
+            separator = fields.index("-", 6)
+            mount_id, mount_point = int(fields[0]), fields[4]
+            fstype, source = fields[separator + 1], fields[separator + 2]
+        except (ValueError, IndexError):
+            logger.debug("Skipping malformed mountinfo line %r", line)
+            continue
+        result.append(
+            Mount(mount_id, unescape(source), unescape(mount_point), fstype)
+        )
+    return result
+
+
+class MountTable(object):
+    """Cached view of a mountinfo file
+
+    The kernel flags an open mountinfo file with POLLPRI when the mount table
+    changes, so a zero-timeout poll tells whether the cached table is stale.
+    Unchanged tables are never re-read.
+    """
+
+    def __init__(self, path=MOUNTINFO_PATH):
+        self.path = path
+        self.reads = 0
+        self._lock = threading.Lock()
+        self._mounts = None
+        self._file = None
+        self._poller = None
+        self._pid = None
+        self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def _close_file(self):
+        if self._poller is not None and self._file is not None:
+            try:
+                self._poller.unregister(self._file.fileno())
+            except (KeyError, ValueError):
+                pass
+        self._poller = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """! Close the mountinfo file, the next mounts() call reopens it """
+        # __del__ may run on an object whose __init__ failed
+        if getattr(self, "_lock", None) is None:
+            return
+        with self._lock:
+            self._close_file()
+            self._mounts = None
+
+    def _open(self):
+        self._close_file()
+        self._file = open(self.path, "rb")
+        self._pid = os.getpid()
+        self._mounts = None
+        if hasattr(select, "poll"):
+            self._poller = select.poll()
+            self._poller.register(self._file.fileno(), select.POLLPRI)
+
+    def _stale(self):
+        if self._mounts is None or self._poller is None:
+            return True
+        # POLLERR and POLLPRI are only raised when the table changed
+        return bool(self._poller.poll(0))
+
+    def mounts(self):
+        """! List all mounts
+        @return List of Mount tuples
+        """
+        with self._lock:
+            if self._file is None or self._pid != os.getpid():
+                # Closed, or forked: /proc/self referred to the parent process
+                self._open()
+            if self._stale():
+                self._file.seek(0)
+                self._mounts = parse_mountinfo(self._file.read())
+                self.reads += 1
+            return self._mounts
+
+    def mount_id(self, mount_point):
+        """! Return the id of the mount at 'mount_point'
+        @return Mount id, or None if nothing is mounted there
+        @details The kernel assigns a new id every time a file system is
+          mounted, so the id changes when a device is remounted
+        """
+        for mount in reversed(self.mounts()):
+            if mount.mount_point == mount_point:
+                return mount.mount_id
+        return None
+
+    def fat_mounts(self):
+        """! List mounted devices with a FAT file system (potential mbeds)
+        @return List of (device, mount point) tuples
+        """
+        return [
+            (m.source, m.mount_point)
+            for m in self.mounts()
+            if m.fstype in FAT_FILESYSTEMS
+        ]
+
+
+_mount_tables = {}
+_mount_tables_lock = threading.Lock()
+
+
+def get_mount_table(path=MOUNTINFO_PATH):
+    """! Return the process-wide MountTable for 'path'
+    @return MountTable object, or None if the file can't be read
+    """
+    with _mount_tables_lock:
+        table = _mount_tables.get(path)
+        if table is None:
+            try:
+                table = MountTable(path)
+            except (IOError, OSError) as e:
+                logger.debug("Could not open %s: %s", path, e)
+                return None
+            _mount_tables[path] = table
+        return table
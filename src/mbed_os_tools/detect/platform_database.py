@@ -18,14 +18,20 @@
 import datetime
 import json
 import re
+import tempfile
+import threading
+import time
 from collections import OrderedDict, defaultdict
-from copy import copy
+from contextlib import contextmanager
+from copy import copy, deepcopy
 from io import open
-from os import makedirs
+from os import chmod, makedirs, remove, stat, umask
 from os.path import join, dirname, getmtime
 from appdirs import user_data_dir
 from fasteners import InterProcessLock
 
+from .device_cache import _replace
+
 import logging
 
 logger = logging.getLogger("mbedls.platform_database")
@@ -439,23 +445,105 @@ def _overwrite_or_open(db):
             return {}
 
 
+def _file_mode(path):
+    """Permissions of the file at 'path', or the ones open() gives a new file"""
+    try:
+        return stat(path).st_mode & 0o7777
+    except OSError:
+        mask = umask(0)
+        umask(mask)
+        return 0o666 & ~mask
+
+
 class PlatformDatabase(object):
     """Represents a union of multiple platform database files.
     Handles inter-process synchronization of database files.
+
+    The files are only read on first use. Lookups go through a single index,
+    (device_type, id) -> entry, merged once from all files so that earlier
+    files take precedence over later ones.
+
+    Files written by other processes are picked up on the next lookup after
+    RELOAD_CHECK_INTERVAL seconds, unless this object has unsaved changes.
+
+    Objects returned by shared_platform_database() use the files parsed
+    once for the whole process, and copy them on their first change, so
+    that changes made through one object never show in the others.
     """
 
     target_id_pattern = re.compile(r"^[a-fA-F0-9]{4}$")
 
-    def __init__(self, database_files, primary_database=None):
+    # Seconds between checks of the database files for changes
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, database_files, primary_database=None, shared=False):
         """Construct a PlatformDatabase object from a series of platform database
         files
+
+        If 'shared' is True, the parsed files are shared with the other shared
+        objects for the same files until this object is changed
         """
         self._prim_db = primary_database
         if not self._prim_db and len(database_files) == 1:
             self._prim_db = database_files[0]
-        self._dbs = OrderedDict()
-        self._keys = defaultdict(set)
-        for db in database_files:
+        self._database_files = list(database_files)
+        self._loaded = None
+        self._index = None
+        self._load_lock = threading.Lock()
+        self._identity = None
+        self._checked = 0
+        self._unsaved = False
+        self._transaction_lock = threading.RLock()
+        self._transaction_depth = 0
+        self._pending_write = False
+        self._shared = shared
+
+    @property
+    def _dbs(self):
+        return self._load()[0]
+
+    @property
+    def _keys(self):
+        return self._load()[1]
+
+    def _load(self, check=False):
+        with self._load_lock:
+            now = time.time()
+            if self._loaded is not None and not self._unsaved and (
+                check or now - self._checked >= self.RELOAD_CHECK_INTERVAL
+            ):
+                self._checked = now
+                if self._files_identity() != self._identity:
+                    logger.debug("Platform database changed on disk, reloading")
+                    self._loaded = None
+                    self._index = None
+            if self._loaded is None:
+                self._checked = now
+                if self._shared:
+                    self._identity, self._loaded, self._index = _shared_data(
+                        self._database_files
+                    )
+                else:
+                    self._identity = self._files_identity()
+                    self._loaded = self._read_databases()
+            return self._loaded
+
+    def _own(self):
+        """Copy the shared parsed files before changing them"""
+        loaded = self._load()
+        with self._load_lock:
+            if self._shared:
+                self._loaded = deepcopy(loaded)
+                self._index = None
+                self._shared = False
+
+    def _files_identity(self):
+        return [_file_identity(db) for db in self._database_files]
+
+    def _read_databases(self):
+        dbs = OrderedDict()
+        keys = defaultdict(set)
+        for db in self._database_files:
             new_db = _overwrite_or_open(db)
             first_value = None
             if new_db.values():
@@ -465,7 +553,7 @@ class PlatformDatabase(object):
 
             if new_db:
                 for device_type in new_db:
-                    duplicates = self._keys[device_type].intersection(
+                    duplicates = keys[device_type].intersection(
                         set(new_db[device_type].keys())
                     )
                     duplicates = set(["%s.%s" % (device_type, k) for k in duplicates])
@@ -476,12 +564,28 @@ class PlatformDatabase(object):
                             " ".join(duplicates),
                             db,
                         )
-                    self._dbs[db] = new_db
-                    self._keys[device_type] = self._keys[device_type].union(
+                    dbs[db] = new_db
+                    keys[device_type] = keys[device_type].union(
                         new_db[device_type].keys()
                     )
             else:
-                self._dbs[db] = new_db
+                dbs[db] = new_db
+        return dbs, keys
+
+    def _lookup_index(self):
+        # Loading first drops the index if the files changed on disk
+        dbs = self._dbs
+        index = self._index
+        if index is None:
+            index = {}
+            # Later databases first, so that earlier ones overwrite them
+            for db in reversed(list(dbs.values())):
+                for device_type, entries in db.items():
+                    for id, entry in entries.items():
+                        if entry:
+                            index[(device_type, id)] = entry
+            self._index = index
+        return index
 
     def items(self, device_type="daplink"):
         for db in self._dbs.values():
@@ -494,45 +598,109 @@ class PlatformDatabase(object):
     def get(self, index, default=None, device_type="daplink", verbose_data=False):
         """Standard lookup function. Works exactly like a dict. If 'verbose_data'
         is True, all data for the platform is returned as a dict."""
-        for db in self._dbs.values():
-            if device_type in db:
-                maybe_answer = db[device_type].get(index, None)
-                if maybe_answer:
-                    return _modify_data_format(maybe_answer, verbose_data)
+        maybe_answer = self._lookup_index().get((device_type, index))
+        if maybe_answer:
+            return _modify_data_format(maybe_answer, verbose_data)
 
         return default
 
+    def _acquire_lock(self):
+        lock = InterProcessLock("%s.lock" % self._prim_db)
+        acquired = lock.acquire(blocking=False)
+        if not acquired:
+            logger.debug("Waiting 60 seconds for file lock")
+            acquired = lock.acquire(blocking=True, timeout=60)
+        if not acquired:
+            logger.error(
+                "Could not update platform database: "
+                "Lock acquire failed after 60 seconds"
+            )
+            return None
+        return lock
+
+    def _write_primary(self):
+        """Replace the primary database file atomically, so that a crash can't
+        leave a partially written file behind
+        """
+        data = self._dbs[self._prim_db]
+        fd, tmp_path = tempfile.mkstemp(
+            dir=dirname(self._prim_db) or ".", prefix=".platforms-", suffix=".tmp"
+        )
+        try:
+            with open(fd, "w", encoding="utf-8") as out:
+                out.write(unicode(json.dumps(data)))
+            # mkstemp() creates the file readable by its owner only
+            chmod(tmp_path, _file_mode(self._prim_db))
+            _replace(tmp_path, self._prim_db)
+        except BaseException:
+            remove(tmp_path)
+            raise
+        with self._load_lock:
+            self._identity = self._files_identity()
+            self._unsaved = False
+
     def _update_db(self):
         if self._prim_db:
-            lock = InterProcessLock("%s.lock" % self._prim_db)
-            acquired = lock.acquire(blocking=False)
-            if not acquired:
-                logger.debug("Waiting 60 seconds for file lock")
-                acquired = lock.acquire(blocking=True, timeout=60)
-            if acquired:
+            with self._transaction_lock:
+                if self._transaction_depth:
+                    self._pending_write = True
+                    return True
+                lock = self._acquire_lock()
+                if lock is None:
+                    return False
                 try:
-                    with open(self._prim_db, "w", encoding="utf-8") as out:
-                        out.write(unicode(json.dumps(self._dbs[self._prim_db])))
+                    self._write_primary()
                     return True
                 finally:
                     lock.release()
-            else:
-                logger.error(
-                    "Could not update platform database: "
-                    "Lock acquire failed after 60 seconds"
-                )
-                return False
         else:
             logger.error(
                 "Can't update platform database: destination database is ambiguous"
             )
             return False
 
+    @contextmanager
+    def transaction(self):
+        """Batch permanent changes: the file lock is held for the whole block
+        and the primary database is written once, when the block exits.
+
+        Usage:
+            with plat_db.transaction():
+                plat_db.add("1234", "TARGET_A", permanent=True)
+                plat_db.remove("5678", permanent=True)
+
+        Raises IOError, without running the block, if the file lock can't be
+        taken, since permanent changes made in the block couldn't be written.
+        """
+        with self._transaction_lock:
+            lock = None
+            if not self._transaction_depth and self._prim_db:
+                lock = self._acquire_lock()
+                if lock is None:
+                    raise IOError(
+                        "Could not lock platform database %s" % self._prim_db
+                    )
+                # Start from what other processes may have written meanwhile
+                self._load(check=True)
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+                try:
+                    if not self._transaction_depth and self._pending_write:
+                        self._pending_write = False
+                        self._write_primary()
+                finally:
+                    if lock is not None:
+                        lock.release()
+
     def add(self, id, platform_name, permanent=False, device_type="daplink"):
         """Add a platform to this database, optionally updating an origin
         database
         """
         if self.target_id_pattern.match(id):
+            self._own()
             if self._prim_db:
                 if device_type not in self._dbs[self._prim_db]:
                     self._dbs[self._prim_db][device_type] = {}
@@ -543,6 +711,8 @@ class PlatformDatabase(object):
                     cur_db[device_type] = {}
                 cur_db[device_type][id] = platform_name
             self._keys[device_type].add(id)
+            self._index = None
+            self._unsaved = True
             if permanent:
                 self._update_db()
         else:
@@ -554,8 +724,11 @@ class PlatformDatabase(object):
         as a dict.
         """
         logger.debug("Trying remove of %s", id)
+        self._own()
         if id == "*" and device_type in self._dbs[self._prim_db]:
             self._dbs[self._prim_db][device_type] = {}
+            self._index = None
+            self._unsaved = True
             if permanent:
                 self._update_db()
         else:
@@ -565,7 +738,43 @@ class PlatformDatabase(object):
                     removed = db[device_type][id]
                     del db[device_type][id]
                     self._keys[device_type].remove(id)
+                    self._index = None
+                    self._unsaved = True
                     if permanent:
                         self._update_db()
 
                     return _modify_data_format(removed, verbose_data)
+
+
+_shared_databases = {}
+_shared_databases_lock = threading.Lock()
+
+
+def _file_identity(path):
+    try:
+        st = stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, getattr(st, "st_mtime_ns", st.st_mtime))
+
+
+def _shared_data(database_files):
+    """Parse database files once for the whole process
+    @return Tuple (files identity, (dbs, keys), lookup index), parsed again
+      when one of the files changed on disk. Callers must not change them
+    """
+    with _shared_databases_lock:
+        reader = _shared_databases.get(tuple(database_files))
+        if reader is None:
+            reader = PlatformDatabase(database_files)
+            _shared_databases[tuple(database_files)] = reader
+        loaded = reader._load(check=True)
+        return reader._identity, loaded, reader._lookup_index()
+
+
+def shared_platform_database(database_files, primary_database=None):
+    """Return a PlatformDatabase for a list of database files, that parses
+    the files only once for the whole process.
+    The parsed files are shared until the returned object is changed.
+    """
+    return PlatformDatabase(database_files, primary_database, shared=True)
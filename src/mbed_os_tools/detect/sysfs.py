@@ -0,0 +1,190 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Index of the USB devices in the Linux sysfs tree"""
+
+import os
+import re
+from collections import OrderedDict
+
+import logging
+
+logger = logging.getLogger("mbedls.sysfs")
+logger.addHandler(logging.NullHandler())
+del logging
+
+SYSFS_PATH = "/sys"
+
+# Interfaces are named <bus>-<port>[.<port>...]:<config>.<interface>
+_interface_name = re.compile(
+    r"^(?P<port_path>[0-9]+-[0-9]+(\.[0-9]+)*):[0-9]+\.[0-9]+$"
+)
+
+
+def _read_attribute(path):
+    try:
+        with open(path, "r") as attribute:
+            return attribute.read().strip()
+    except (IOError, OSError) as e:
+        logger.debug("Failed to read %s: %s", path, e)
+        return None
+
+
+class UsbDevice(object):
+    """A USB device and the block and tty devices of its interfaces
+
+    The port path, for example "1-1.2.6" for port 6 of a hub on port 2 of a
+    hub on port 1 of bus 1, identifies the physical socket the device is
+    plugged into. Unlike the device's number, it survives re-enumeration.
+    """
+
+    def __init__(self, port_path, sysfs_path):
+        self.port_path = port_path
+        self.sysfs_path = sysfs_path
+        # Interface name -> {"block": [names], "tty": [names]}
+        self.interfaces = OrderedDict()
+        # Disk name -> [partition names]
+        self._partitions = {}
+        self._attributes = {}
+
+    def _attribute(self, name):
+        if name not in self._attributes:
+            self._attributes[name] = _read_attribute(
+                os.path.join(self.sysfs_path, name)
+            )
+        return self._attributes[name]
+
+    @property
+    def vendor_id(self):
+        return self._attribute("idVendor")
+
+    @property
+    def product_id(self):
+        return self._attribute("idProduct")
+
+    @property
+    def serial(self):
+        return self._attribute("serial")
+
+    def _children(self, subsystem):
+        return [
+            name
+            for interface in sorted(self.interfaces)
+            for name in self.interfaces[interface][subsystem]
+        ]
+
+    @property
+    def block_devices(self):
+        return self._children("block")
+
+    @property
+    def tty_devices(self):
+        return self._children("tty")
+
+    def partitions(self, disk):
+        """! Names of the partitions of block device 'disk', e.g. ["sdb1"]"""
+        return list(self._partitions.get(disk, []))
+
+    def _add_child(self, interface, subsystem, name):
+        children = self.interfaces.setdefault(interface, {"block": [], "tty": []})
+        children[subsystem].append(name)
+
+
+class UsbTopology(object):
+    """USB devices connected to this host, indexed by port path
+
+    The index is built in one pass: /sys/bus/usb/devices lists the devices,
+    and the links in /sys/class/block and /sys/class/tty name the interface
+    each disk and serial port belongs to. Device attributes are only read
+    for devices that are looked at.
+    """
+
+    def __init__(self, root=SYSFS_PATH):
+        self.root = root
+        self._devices = OrderedDict()
+        self._owners = {}
+        self._scan()
+
+    def _scan(self):
+        usb_devices_path = os.path.join(self.root, "bus", "usb", "devices")
+        for name in sorted(os.listdir(usb_devices_path)):
+            # Skip interfaces and root hubs ("usb1")
+            if ":" in name or "-" not in name:
+                continue
+            self._devices[name] = UsbDevice(name, os.path.join(usb_devices_path, name))
+
+        partitions = []
+        for subsystem in ("block", "tty"):
+            class_path = os.path.join(self.root, "class", subsystem)
+            try:
+                names = os.listdir(class_path)
+            except OSError:
+                continue
+            for name in names:
+                try:
+                    link = os.readlink(os.path.join(class_path, name))
+                except OSError:
+                    continue
+                parts = link.split("/")
+                # Partitions are children of their disk, e.g. .../block/sdb/sdb1
+                if subsystem == "block" and parts[-2:-1] != ["block"]:
+                    if len(parts) > 1:
+                        partitions.append((parts[-2], name))
+                    continue
+                self._add_child(subsystem, name, parts)
+
+        for disk, name in sorted(partitions):
+            device = self._owners.get(("block", disk))
+            if device is not None:
+                device._partitions.setdefault(disk, []).append(name)
+
+    def _add_child(self, subsystem, name, link_parts):
+        for part in reversed(link_parts):
+            match = _interface_name.match(part)
+            if match:
+                device = self._devices.get(match.group("port_path"))
+                if device is not None:
+                    device._add_child(part, subsystem, name)
+                    self._owners[(subsystem, name)] = device
+                return
+
+    def devices(self):
+        """! List USB devices
+        @return List of UsbDevice objects sorted by port path
+        """
+        return list(self._devices.values())
+
+    def device(self, port_path):
+        """! Return the device at 'port_path', or None"""
+        return self._devices.get(port_path)
+
+    def owner(self, subsystem, name):
+        """! Return the USB device a block or tty device belongs to
+        @param subsystem "block" or "tty"
+        @param name Name of the device, for example "sdb" or "ttyACM0"
+        @return UsbDevice object, or None for non-USB devices
+        """
+        return self._owners.get((subsystem, name))
+
+
+def get_usb_topology(root=SYSFS_PATH):
+    """! Index the USB devices currently connected
+    @return UsbTopology object, or None if sysfs is not available
+    """
+    try:
+        return UsbTopology(root)
+    except OSError as e:
+        logger.debug("Could not index USB devices in %s: %s", root, e)
+        return None
@@ -0,0 +1,517 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Long-lived device watcher driven by kernel device events
+
+Instead of calling `list_mbeds()` in a sleep loop, a `DeviceWatcher` keeps a
+table of connected devices and only re-lists when the host reports that
+something changed (a USB block or tty device came or went, or the mount table
+changed). Callers block on `wait_for()` rather than polling.
+"""
+
+import atexit
+import os
+import select
+import socket
+import threading
+import time
+from collections import deque
+
+import logging
+
+logger = logging.getLogger("mbedls.watcher")
+logger.addHandler(logging.NullHandler())
+del logging
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+UEVENT_BUFFER_SIZE = 64 * 1024
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+
+# Kernel subsystems whose events may change the output of list_mbeds()
+RELEVANT_SUBSYSTEMS = frozenset(["block", "tty", "usb", "mount"])
+
+
+def parse_uevent(data):
+    """! Parse a raw kernel uevent message
+    @param data Bytes received from a NETLINK_KOBJECT_UEVENT socket
+    @return Dictionary of uevent properties, or None if the message is not a
+      kernel uevent (e.g. a libudev message)
+    @details Kernel messages look like "ACTION@DEVPATH\\0KEY=VALUE\\0..."
+    """
+    fields = data.split(b"\0")
+    header = fields[0].decode("utf-8", "replace")
+    if "@" not in header:
+        return None
+    action, _, devpath = header.partition("@")
+    event = {"ACTION": action, "DEVPATH": devpath}
+    for field in fields[1:]:
+        key, sep, value = field.decode("utf-8", "replace").partition("=")
+        if sep:
+            event[key] = value
+    return event
+
+
+def is_relevant(event):
+    """! Check if an event may change the list of connected devices
+    @param event Dictionary describing the event (see parse_uevent)
+    """
+    subsystem = event.get("SUBSYSTEM")
+    return subsystem is None or subsystem in RELEVANT_SUBSYSTEMS
+
+
+class PollingEventSource(object):
+    """Event source that reports a change every 'interval' seconds
+
+    Used on hosts without kernel uevents, it reproduces the cadence of the
+    original polling loops. A DeviceWatcher only polls while it has waiters
+    or listeners.
+    """
+
+    # Reports changes whether or not anything changed, see DeviceWatcher
+    polling = True
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._closed = threading.Event()
+
+    def wait(self, timeout=None):
+        """! Wait for events
+        @param timeout Maximum time to wait in seconds
+        @return List of event dictionaries (possibly empty)
+        """
+        delay = self.interval if timeout is None else min(self.interval, timeout)
+        if self._closed.wait(delay):
+            return []
+        return [{"ACTION": "change"}]
+
+    def wake(self):
+        """! Make the current and all later wait() calls return"""
+        self._closed.set()
+
+    def close(self):
+        self.wake()
+
+
+class FakeEventSource(object):
+    """In-memory event source, events are injected with push()"""
+
+    def __init__(self):
+        self._events = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def push(self, event):
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        with self._cond:
+            if not self._events and not self._closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def wake(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def close(self):
+        self.wake()
+
+
+class UeventSource(object):
+    """Linux event source backed by a netlink uevent socket
+
+    Mount table changes are not reported through netlink, so
+    /proc/self/mountinfo is watched as well: the kernel flags it with
+    POLLPRI whenever a filesystem is mounted or unmounted.
+
+    close() releases the file descriptors wait() polls, so it must only be
+    called once no thread is inside wait(). Call wake() first to make a
+    waiting thread return.
+    """
+
+    def __init__(self, mountinfo_path=MOUNTINFO_PATH):
+        self._sock = socket.socket(
+            socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT
+        )
+        self._sock.bind((0, UEVENT_KERNEL_GROUP))
+        self._poller = select.poll()
+        self._poller.register(self._sock.fileno(), select.POLLIN)
+
+        self._mountinfo = None
+        try:
+            self._mountinfo = open(mountinfo_path, "rb")
+            self._mountinfo.read()
+            self._poller.register(
+                self._mountinfo.fileno(), select.POLLERR | select.POLLPRI
+            )
+        except (IOError, OSError) as e:
+            logger.debug("Not watching %s: %s", mountinfo_path, e)
+            self._mountinfo = None
+
+        # Used to wake up wait() from wake()
+        self._closed = False
+        self._released = False
+        self._wake_r, self._wake_w = os.pipe()
+        self._poller.register(self._wake_r, select.POLLIN)
+
+    def wait(self, timeout=None):
+        if self._closed:
+            return []
+        poll_timeout = None if timeout is None else int(timeout * 1000)
+        events = []
+        for fd, _ in self._poller.poll(poll_timeout):
+            if self._closed:
+                return []
+            elif fd == self._sock.fileno():
+                try:
+                    event = parse_uevent(self._sock.recv(UEVENT_BUFFER_SIZE))
+                except socket.error as e:
+                    # ENOBUFS: events were dropped, assume anything changed
+                    logger.debug("Lost uevents: %s", e)
+                    event = {"ACTION": "change"}
+                if event:
+                    events.append(event)
+            elif self._mountinfo and fd == self._mountinfo.fileno():
+                # Re-reading the file acknowledges the change
+                self._mountinfo.seek(0)
+                self._mountinfo.read()
+                events.append({"ACTION": "change", "SUBSYSTEM": "mount"})
+        return events
+
+    def wake(self):
+        """! Make the current and all later wait() calls return"""
+        if not self._closed and not self._released:
+            self._closed = True
+            os.write(self._wake_w, b"\0")
+
+    def close(self):
+        """! Release the file descriptors, see the class description"""
+        if self._released:
+            return
+        self.wake()
+        self._released = True
+        self._sock.close()
+        if self._mountinfo:
+            self._mountinfo.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+
+def default_event_source():
+    """! Pick the best event source available on this host"""
+    if hasattr(socket, "AF_NETLINK") and hasattr(select, "poll"):
+        try:
+            return UeventSource()
+        except (IOError, OSError) as e:
+            logger.debug("Kernel uevents unavailable, falling back to polling: %s", e)
+    return PollingEventSource()
+
+
+class DeviceWatcher(object):
+    """Keeps an in-memory table of connected devices up to date
+
+    The table is rebuilt with the wrapped detector's list_mbeds() only after
+    the event source reports a relevant change, so waiting for a device costs
+    one enumeration per hardware change instead of one every poll interval.
+
+    The physical location of every target id seen is remembered. A device
+    that re-enumerates before reporting its target id again, for example
+    while flashing, is found again by the USB port it is plugged into.
+    Devices at that port with another target id, e.g. a MAINTENANCE drive
+    or a different board, only match when the caller asks for them.
+    Locations are only reported by the Linux detector, elsewhere devices
+    are always matched by target id.
+
+    With a polling event source, devices are only re-listed while a
+    wait_for() call or a listener needs them. Otherwise the table goes
+    stale and is re-listed on the next use.
+    """
+
+    def __init__(self, mbeds, event_source=None, debounce=0.1, **list_kwargs):
+        """! ctor
+        @param mbeds Detector object returned by mbed_os_tools.detect.create()
+        @param event_source Object providing wait(timeout) and close(), defaults
+          to the best source available on this host
+        @param debounce Time in seconds to collect a burst of events before
+          re-listing devices
+        @param list_kwargs Keyword arguments passed along to list_mbeds()
+        """
+        self.mbeds = mbeds
+        self.event_source = event_source
+        self.debounce = debounce
+        self.list_kwargs = list_kwargs
+        self.generation = 0
+        self._devices = []
+        self._locations = {}
+        self._listeners = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        # Number of wait_for() calls in progress
+        self._waiters = 0
+        # The table missed changes while the watcher didn't poll
+        self._stale = False
+
+    def start(self):
+        """! Take an initial snapshot and start listening for events
+        @return self
+        """
+        if self._thread:
+            return self
+        if self.event_source is None:
+            self.event_source = default_event_source()
+        self.refresh()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mbedls-watcher")
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """! Stop listening for events and release the event source
+        @details The event source is closed only after the watcher thread
+          returned from its last wait(), so the thread never polls a file
+          descriptor number closed, and possibly reused, under its feet
+        """
+        with self._cond:
+            self._running = False
+            # Wakes up an idle watcher thread
+            self._cond.notify_all()
+        source = self.event_source
+        wake = getattr(source, "wake", None)
+        if wake is not None:
+            wake()
+        if self._thread:
+            # Without wake(), wait() returns within its 1 s timeout
+            self._thread.join()
+            self._thread = None
+        if source is not None:
+            source.close()
+        with self._cond:
+            self._cond.notify_all()
+
+    @property
+    def running(self):
+        """! True between start() and stop()"""
+        return self._running
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def refresh(self):
+        """! Re-list devices now and wake up all waiters
+        @return List of devices
+        """
+        devices = self.mbeds.list_mbeds(**self.list_kwargs)
+        with self._cond:
+            self._devices = devices
+            self._stale = False
+            for device in devices:
+                if device.get("location") is not None:
+                    self._locations[device.get("target_id")] = device["location"]
+            self.generation += 1
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(devices)
+        return list(devices)
+
+    def add_listener(self, callback):
+        """! Call 'callback' with the new device table after every refresh
+        @details Callbacks run on the thread that refreshed the table and
+          must not block
+        """
+        with self._cond:
+            self._listeners.append(callback)
+            self._cond.notify_all()
+
+    def remove_listener(self, callback):
+        """! Stop calling 'callback' after refreshes"""
+        with self._cond:
+            self._listeners.remove(callback)
+
+    def list_mbeds(self):
+        """! Return the current device table
+        @details The host is only touched if the table went stale, see the
+          class description
+        """
+        self._refresh_if_stale()
+        with self._cond:
+            return list(self._devices)
+
+    def _refresh_if_stale(self):
+        if self._stale:
+            self.refresh()
+
+    def get(self, target_id, match_location=False):
+        """! Return the device with the given target id or at its last known
+        location, or None
+        @param match_location Also accept a device with another target id at
+          the last known location of 'target_id'
+        """
+        self._refresh_if_stale()
+        with self._cond:
+            return self._find(target_id, None, match_location)
+
+    def get_by_location(self, location):
+        """! Return the device plugged into USB port 'location', or None"""
+        self._refresh_if_stale()
+        with self._cond:
+            return self._find_by_location(location, None)
+
+    def wait_for(self, target_id, predicate=None, timeout=None, match_location=False):
+        """! Block until a device with 'target_id' satisfies 'predicate'
+        @param target_id Target ID of the device to wait for. A device without
+          a target id yet at the last known location of 'target_id' matches as well
+        @param predicate Function that is passed the device, should return True
+          when the device is in the expected state. By default any device with a
+          matching target id is accepted
+        @param timeout Maximum time to wait in seconds, None waits forever
+        @param match_location Also accept a device with another target id at
+          the last known location of 'target_id', e.g. the device in bootloader mode
+        @return The matching device, or None on timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            # Wakes up an idle watcher thread, see _idle()
+            self._waiters += 1
+            self._cond.notify_all()
+            try:
+                while True:
+                    # A stale table is re-listed by the watcher thread first
+                    if not self._stale:
+                        device = self._find(target_id, predicate, match_location)
+                        if device is not None:
+                            return device
+                    if not self._running:
+                        return None
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            return None
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+    def _find(self, target_id, predicate, match_location=False):
+        for device in self._devices:
+            if device.get("target_id") == target_id:
+                if predicate is None or predicate(device):
+                    return device
+        if match_location:
+            accept = predicate
+        else:
+            def accept(device):
+                # Only a device that doesn't report its id yet may be the one
+                # we wait for
+                if device.get("target_id"):
+                    return False
+                return predicate is None or predicate(device)
+        return self._find_by_location(self._locations.get(target_id), accept)
+
+    def _find_by_location(self, location, predicate):
+        if location is None:
+            return None
+        for device in self._devices:
+            if device.get("location") == location:
+                if predicate is None or predicate(device):
+                    return device
+        return None
+
+    def _idle(self):
+        """! Nobody needs a polling source's changes, called with _cond held"""
+        polling = getattr(self.event_source, "polling", False)
+        return polling and not self._waiters and not self._listeners
+
+    def _run(self):
+        while self._running:
+            try:
+                with self._cond:
+                    if self._idle():
+                        # Stop polling until wait_for() or a listener needs devices
+                        self._stale = True
+                        while self._running and self._idle():
+                            self._cond.wait()
+                        if not self._running:
+                            continue
+                if self._stale:
+                    self.refresh()
+                events = [e for e in self.event_source.wait(1.0) if is_relevant(e)]
+                if not events or not self._running:
+                    continue
+                # Devices come up as a burst of usb, tty and block events
+                time.sleep(self.debounce)
+                self.event_source.wait(0)
+                logger.debug("Re-listing devices after %d event(s)", len(events))
+                self.refresh()
+            except Exception as e:
+                if self._running:
+                    logger.exception("Device watcher failed: %s", e)
+                    time.sleep(self.debounce)
+
+
+_shared_watcher = None
+_shared_watcher_lock = threading.Lock()
+
+
+def shared_watcher(mbeds):
+    """! Return the process-wide started DeviceWatcher of detector 'mbeds'
+    @details Later calls with the same detector reuse the watcher and its
+      event source instead of opening a new one for every wait. A call with
+      another detector stops the previous watcher. The watcher is stopped
+      when the process exits. Between waits a polling watcher stays idle,
+      see DeviceWatcher.
+    """
+    global _shared_watcher
+    with _shared_watcher_lock:
+        watcher = _shared_watcher
+        if watcher is None or watcher.mbeds is not mbeds or not watcher.running:
+            if watcher is not None:
+                watcher.stop()
+            _shared_watcher = watcher = DeviceWatcher(mbeds).start()
+        return watcher
+
+
+@atexit.register
+def _stop_shared_watcher():
+    global _shared_watcher
+    with _shared_watcher_lock:
+        if _shared_watcher is not None:
+            _shared_watcher.stop()
+            _shared_watcher = None
+
+
+def watch(mbeds=None, event_source=None, **kwargs):
+    """! Create and start a DeviceWatcher
+    @param mbeds Detector to wrap, defaults to mbed_os_tools.detect.create()
+    @param event_source Event source, defaults to the best available one
+    @param kwargs Keyword arguments passed along to list_mbeds()
+    @return Started DeviceWatcher object
+    """
+    if mbeds is None:
+        from .main import create
+
+        mbeds = create()
+    return DeviceWatcher(mbeds, event_source=event_source, **kwargs).start()
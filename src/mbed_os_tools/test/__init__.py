@@ -47,8 +47,10 @@ def get_plugin_caps(methods=None):
     return result
 
 
-def init_host_test_cli_params():
+def init_host_test_cli_params(args=None):
     """! Function creates CLI parser object and returns populated options object.
+    @param args List of command line arguments, without the program name.
+           None parses sys.argv
     @return Function returns 'options' object returned from OptionParser class
     @details Options object later can be used to populate host test selector script.
     """
@@ -105,6 +107,20 @@ def init_host_test_cli_params():
         metavar="SYNC_TIMEOUT",
     )
 
+    parser.add_option(
+        "",
+        "--kv-framing",
+        dest="kv_framing",
+        default=2,
+        type=int,
+        help=(
+            "Highest Key-Value protocol framing version to agree to when the "
+            "device offers one: 1: original framing; 2: several KV pairs per "
+            "line, escaped and binary values (Default 2)"
+        ),
+        metavar="VERSION",
+    )
+
     parser.add_option(
         "-f",
         "--image-path",
@@ -280,6 +296,19 @@ def init_host_test_cli_params():
         help="Skips use of copy/flash plugin. Note: target will not be reflashed",
     )
 
+    parser.add_option(
+        "",
+        "--skip-identical-flash",
+        dest="skip_identical_flash",
+        default=False,
+        action="store_true",
+        help=(
+            "Skips copying the image if it was the last image flashed to the "
+            "target and the target was not remounted since. Needs the remount "
+            "count from DETAILS.TXT on the target's disk. Target is still reset"
+        ),
+    )
+
     parser.add_option(
         "",
         "--skip-reset",
@@ -302,6 +331,32 @@ def init_host_test_cli_params():
         ),
     )
 
+    parser.add_option(
+        "",
+        "--test-timeout",
+        dest="test_timeout",
+        default=None,
+        metavar="NUMBER",
+        type="int",
+        help=(
+            "Timeout in sec of the test, used instead of the one the DUT "
+            "sets with {{__timeout}}, e.g. one based on its past durations. "
+            "The wait for the serial port (-P) isn't made shorter"
+        ),
+    )
+
+    parser.add_option(
+        "",
+        "--conn-thread",
+        dest="conn_thread",
+        default=False,
+        action="store_true",
+        help=(
+            "Run the connection to the device in a thread of this process "
+            "instead of a separate process. Saves process start-up time"
+        ),
+    )
+
     parser.add_option(
         "-b",
         "--send-break",
@@ -373,9 +428,9 @@ def init_host_test_cli_params():
         """Example: mbedhtrun -d E: -p COM5 -f "test.bin" -C 4 -c shell -m K64F"""
     )
 
-    (options, _) = parser.parse_args()
+    (options, _) = parser.parse_args(args)
 
-    if len(sys.argv) == 1:
+    if args is None and len(sys.argv) == 1:
         parser.print_help()
         sys.exit()
 
@@ -44,6 +44,9 @@ class EchoTest(BaseHostTest):
         self.__send_echo_uuid()
 
     def setup(self):
+        # Don't share results with earlier runs in the same process
+        self.uuid_sent = []
+        self.uuid_recv = []
         self.register_callback("echo", self._callback_echo)
         self.register_callback("echo_count", self._callback_echo_count)
 
@@ -13,4 +13,4 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .conn_proxy import conn_process
+from .conn_proxy import conn_process, ConnThread
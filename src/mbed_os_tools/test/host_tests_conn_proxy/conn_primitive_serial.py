@@ -14,6 +14,8 @@
 # limitations under the License.
 
 
+import os
+import select
 import time
 from serial import Serial, SerialException
 
@@ -27,9 +29,13 @@ class SerialConnectorPrimitive(ConnectorPrimitive):
         ConnectorPrimitive.__init__(self, name)
         self.port = port
         self.baudrate = int(baudrate)
-        self.read_timeout = 0.01  # 10 milli sec
+        self.read_timeout = config.get('serial_read_timeout', 0.01)  # 10 milli sec
         self.write_timeout = 5
         self.config = config
+        # 'select': block on the port until data arrives or read_timeout passes
+        # 'sleep': sleep read_timeout, then read what arrived meanwhile
+        self.read_mode = config.get('serial_read_mode')
+        self.read_fd = None
         self.target_id = self.config.get('target_id', None)
         self.mcu = self.config.get('mcu', None)
         self.polling_timeout = config.get('polling_timeout', 60)
@@ -82,11 +88,27 @@ class SerialConnectorPrimitive(ConnectorPrimitive):
                 self.logger.prn_err(str(e))
                 self.logger.prn_err("Retry after 1 sec until %s seconds" % self.polling_timeout)
             else:
+                self.read_fd = self._select_fd()
                 if not self.skip_reset:
                     self.reset_dev_via_serial(delay=self.forced_reset_timeout)
                 break
             time.sleep(1)
 
+    def _select_fd(self):
+        """! File descriptor to wait on in 'select' read mode, or None to sleep """
+        if self.read_mode == 'sleep' or os.name != 'posix':
+            return None
+        try:
+            fd = self.serial.fileno()
+        except (AttributeError, SerialException, ValueError):
+            fd = None
+        if not isinstance(fd, int):
+            # Not a real port (Windows, URL handlers, test doubles)
+            if self.read_mode == 'select':
+                self.logger.prn_wrn("serial port has no file descriptor, using 'sleep' read mode")
+            return None
+        return fd
+
     def reset_dev_via_serial(self, delay=1):
         """! Reset device using selected method, calls one of the reset plugins """
         reset_type = self.config.get('reset_type', 'default')
@@ -109,11 +131,20 @@ class SerialConnectorPrimitive(ConnectorPrimitive):
         self.logger.prn_inf("wait for it...")
         return result
 
-    def read(self, count):
-        """! Read data from serial port RX buffer """
+    def read(self, count, timeout=None):
+        """! Read data from serial port RX buffer
+        @param count Number of bytes to read, more are returned when more are
+               waiting in 'select' read mode
+        @param timeout Maximum time in seconds to wait for data, defaults to
+               self.read_timeout
+        """
+        if timeout is None:
+            timeout = self.read_timeout
+        if self.read_fd is not None:
+            return self._read_select(count, timeout)
         # TIMEOUT: Since read is called in a loop, wait for self.timeout period before calling serial.read(). See
         # comment on serial.Serial() call above about timeout.
-        time.sleep(self.read_timeout)
+        time.sleep(timeout)
         c = str()
         try:
             if self.serial:
@@ -124,6 +155,27 @@ class SerialConnectorPrimitive(ConnectorPrimitive):
             self.logger.prn_err(str(e))
         return c
 
+    def _read_select(self, count, timeout):
+        """! Wait until the port is readable or 'timeout' passes, then drain
+        everything waiting in one read
+        """
+        c = str()
+        try:
+            if self.serial:
+                if not self.serial.in_waiting:
+                    readable, _, _ = select.select([self.read_fd], [], [], timeout)
+                    if not readable:
+                        return c
+                # A readable port with nothing waiting was disconnected,
+                # serial.read() reports that with an exception
+                c = self.serial.read(max(count, self.serial.in_waiting, 1))
+        except (SerialException, select.error, IOError, OSError) as e:
+            self.serial = None
+            self.read_fd = None
+            self.LAST_ERROR = "connection lost, serial.read(%d): %s"% (count, str(e))
+            self.logger.prn_err(str(e))
+        return c
+
     def write(self, payload, log=False):
         """! Write data to serial port TX buffer """
         try:
@@ -15,9 +15,13 @@
 
 import re
 import sys
+import base64
+import binascii
+import threading
 import uuid
+from collections import deque
 from time import time
-from ..host_tests_logger import HtrunLogger
+from ..host_tests_logger import HtrunLogger, get_thread_output, set_thread_output, with_thread_output
 from .conn_primitive_serial import SerialConnectorPrimitive
 from .conn_primitive_remote import RemoteConnectorPrimitive
 from .conn_primitive_fastmodel import FastmodelConnectorPrimitive
@@ -27,29 +31,119 @@ if (sys.version_info > (3, 0)):
 else:
     from Queue import Empty as QueueEmpty
 
+# Highest Key-Value framing version understood by the host, see KiViBufferWalker
+KIVI_FRAMING = 2
+
+# Binary value encodings supported with framing version 2
+KIVI_ENCODINGS = ['b64', 'b85'] if hasattr(base64, 'b85decode') else ['b64']
+
+KIVI_ESCAPES = {'n': '\n', 'r': '\r'}
+KIVI_UNESCAPE_REGEX = re.compile(r"\\(.)")
+KIVI_ESCAPE_REGEX = re.compile(r"[\\}\n\r]")
+
+
+def kv_unescape(value):
+    """! Undo the escaping of a value sent with framing version 2 """
+    if '\\' not in value:
+        return value
+    return KIVI_UNESCAPE_REGEX.sub(lambda m: KIVI_ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def kv_escape(value):
+    """! Escape a value to send with framing version 2 """
+    replacements = {'\\': '\\\\', '}': '\\}', '\n': '\\n', '\r': '\\r'}
+    return KIVI_ESCAPE_REGEX.sub(lambda m: replacements[m.group(0)], value)
+
+
+def kv_encode(key, value, framing=1):
+    """! Format a Key-Value pair for ConnectorPrimitive.write_kv()
+    @param framing Framing version negotiated with the DUT
+    @return Tuple of key and value to send
+    """
+    if framing < 2:
+        return key, value
+    if isinstance(value, (bytes, bytearray)) and not isinstance(value, str):
+        encoding = KIVI_ENCODINGS[-1]
+        if encoding == 'b85':
+            value = base64.b85encode(bytes(value))
+        else:
+            value = base64.b64encode(bytes(value))
+        return '%s#%s' % (key, encoding), kv_escape(value.decode('ascii'))
+    return key, kv_escape(str(value))
+
+
+def kv_decode(value, encoding=None):
+    """! Decode a value received with framing version 2
+    @param encoding None for text, 'b64' or 'b85' for binary values
+    @return Text value, or bytes for binary values
+    """
+    value = kv_unescape(value)
+    if encoding == 'b64':
+        return base64.b64decode(value.encode('ascii'))
+    elif encoding == 'b85':
+        return base64.b85decode(value.encode('ascii'))
+    return value
+
+
 class KiViBufferWalker():
-    """! Simple auxiliary class used to walk through a buffer and search for KV tokens """
+    """! Simple auxiliary class used to walk through a buffer and search for KV tokens
+
+    @details Received bytes are kept in a bytearray and only bytes appended since
+             the last call are scanned for a new line. Complete lines are decoded
+             together, so a multi-byte character split between two reads is still
+             decoded correctly, and a partial line is never decoded twice.
+
+             Framing version 1 is the original protocol: one {{key;value}} per
+             line, and values cannot contain '}'. Version 2 is negotiated after
+             __sync (see ConnProcess) and adds:
+             * any number of KV pairs per line,
+             * backslash escapes in values: \\\\, \\}, \\n and \\r,
+             * binary values, encoded with base64 or base85 and marked by a
+               suffix of the key: {{key#b64;...}} or {{key#b85;...}}. They are
+               passed to the host test as bytes.
+    """
     def __init__(self):
         self.KIVI_REGEX = r"\{\{([\w\d_-]+);([^\}]+)\}\}"
-        self.buff = str()
-        self.kvl = []
+        self.KIVI2_REGEX = r"\{\{([\w\d_-]+)(?:#(b64|b85))?;((?:[^\\\}]|\\.)*)\}\}"
+        self.buff = bytearray()
+        self.kvl = deque()
         self.re_kv = re.compile(self.KIVI_REGEX)
+        self.re_kv2 = re.compile(self.KIVI2_REGEX)
+        # Framing version in use, KIVI_FRAMING at most
+        self.framing = 1
+        self.logger = HtrunLogger('CONN')
+        # Bytes of self.buff already known not to contain a new line
+        self.scanned = 0
+
+    def decode(self, payload):
+        try:
+            return payload.decode('utf-8')
+        except UnicodeDecodeError:
+            self.logger.prn_wrn("UnicodeDecodeError encountered!")
+            return payload.decode('utf-8', 'ignore')
 
     def append(self, payload):
         """! Append stream buffer with payload and process. Returns non-KV strings"""
-        logger = HtrunLogger('CONN')
-        try:
-            self.buff += payload.decode('utf-8')
-        except UnicodeDecodeError:
-            logger.prn_wrn("UnicodeDecodeError encountered!")
-            self.buff += payload.decode('utf-8','ignore')
-        lines = self.buff.split('\n')
-        self.buff = lines[-1]   # remaining
-        lines.pop(-1)
+        buff = self.buff
+        buff += payload
+        end = buff.rfind(b'\n', self.scanned)
+        if end == -1:
+            self.scanned = len(buff)
+            return []
+        lines = self.decode(buff[:end]).split('\n')
+        del buff[:end + 1]   # remaining
+        self.scanned = len(buff)
         # List of line or strings that did not match K,V pair.
         discarded = []
 
         for line in lines:
+            if '{{' not in line:
+                # not a K,V pair
+                discarded.append(line)
+                continue
+            if self.framing >= 2:
+                self.parse_framed(line, discarded)
+                continue
             m = self.re_kv.search(line)
             if m:
                 (key, value) = m.groups()
@@ -69,13 +163,33 @@ class KiViBufferWalker():
                 discarded.append(line)
         return discarded
 
+    def parse_framed(self, line, discarded):
+        """! Extract all KV pairs of a line sent with framing version 2 """
+        pos = 0
+        for m in self.re_kv2.finditer(line):
+            text = line[pos:m.start()].strip()
+            if text:
+                discarded.append(text)
+            pos = m.end()
+            (key, encoding, value) = m.groups()
+            try:
+                value = kv_decode(value, encoding)
+            except (TypeError, ValueError, binascii.Error) as e:
+                self.logger.prn_wrn("malformed %s value for key '%s': %s" % (encoding, key, str(e)))
+                discarded.append(m.group(0))
+                continue
+            self.kvl.append((key, value, time()))
+        text = line[pos:].strip()
+        if text:
+            discarded.append(text)
+
     def search(self):
         """! Check if there is a KV value in buffer """
         return len(self.kvl) > 0
 
     def pop_kv(self):
         if len(self.kvl):
-            return self.kvl.pop(0)
+            return self.kvl.popleft()
         return None, None, time()
 
 
@@ -121,190 +235,410 @@ def conn_primitive_factory(conn_resource, config, event_queue, logger):
     return connector
 
 
-def conn_process(event_queue, dut_event_queue, config):
-
-    def __notify_conn_lost():
-        error_msg = connector.error()
-        connector.finish()
-        event_queue.put(('__notify_conn_lost', error_msg, time()))
+class ConnProcess(object):
+    """! Moves Key-Value protocol messages between the DUT and the host test
+
+    @details Work is split between three threads so that no message waits for
+             a polling loop to come around:
+             * the reader blocks in connector.read() and queues received lines
+               and KV pairs for the host test,
+             * the writer blocks on the host test's queue and sends its messages
+               to the DUT,
+             * the calling thread sleeps on a condition variable until a __sync
+               packet has to be resent or the connection ends.
+
+             Once synchronized, a DUT can offer a newer Key-Value framing
+             version with {{__framing;VERSION}}. The host answers with
+             {{__framing;VERSION;ENCODINGS}}, where VERSION is the version both
+             sides will use and ENCODINGS the binary value encodings it accepts
+             (e.g. 'b64,b85'). The host parses the new framing right after the
+             offer and uses it for its own messages from the answer on, so the
+             DUT should wait for the answer before sending anything else. A DUT
+             that never offers keeps the original framing. Resetting the DUT
+             returns both sides to the original framing.
+    """
 
-    def __notify_sync_failed():
-        error_msg = connector.error()
-        connector.finish()
-        event_queue.put(('__notify_sync_failed', error_msg, time()))
+    # Maximum time the reader blocks in one read, when the connector supports it
+    READ_TIMEOUT = 0.2
+
+    # How often the writer checks whether the connection ended while idle
+    STOP_CHECK_INTERVAL = 0.2
+
+    def __init__(self, event_queue, dut_event_queue, config):
+        self.event_queue = event_queue
+        self.dut_event_queue = dut_event_queue
+        self.config = config
+        self.logger = HtrunLogger('CONN')
+        self.connector = None
+
+        # Configuration of conn_opriocess behaviour
+        self.sync_behavior = int(config.get('sync_behavior', 1))
+        self.sync_timeout = config.get('sync_timeout', 1.0)
+        self.conn_resource = config.get('conn_resource', 'serial')
+        self.last_sync = False
+        # Highest Key-Value framing version the host will agree to
+        self.max_framing = min(int(config.get('kv_framing', KIVI_FRAMING)), KIVI_FRAMING)
+        # Framing version of messages sent to the DUT
+        self.framing = 1
+        # Simple buffer used for Key-Value protocol data
+        self.kv_buffer = KiViBufferWalker()
+
+        # List of all sent to target UUIDs (if multiple found)
+        self.sync_uuid_list = []
+        # We will ignore all kv pairs before we get sync back
+        self.sync_uuid_discovered = False
+        # Time the last __sync packet was sent or the part was reset
+        self.loop_timer = time()
+
+        # Guards the state above and the end of the connection
+        self.cond = threading.Condition()
+        # Serializes writes and resets from different threads
+        self.io_lock = threading.Lock()
+        # A reset waits for the read in progress and pauses the reader until
+        # it is done, see __read() and __reset()
+        self.read_cond = threading.Condition()
+        self.reading = False
+        self.resetting = False
+        self.finished = False
+        # Event reported to the host when the connection ends, None if the
+        # host test finished it
+        self.end_event = None
+
+    def run(self):
+        self.logger.prn_inf("starting connection process...")
+
+        # Send connection process start event to host process
+        # NOTE: Do not send any other Key-Value pairs before this!
+        self.event_queue.put(('__conn_process_start', 1, time()))
+
+        # Create connector instance with proper configuration
+        self.connector = conn_primitive_factory(self.conn_resource, self.config, self.event_queue, self.logger)
+
+        # If the connector failed, stop the process now
+        if not self.connector.connected():
+            self.logger.prn_err("Failed to connect to resource")
+            self.__notify('__notify_conn_lost')
+            return 0
 
-    logger = HtrunLogger('CONN')
-    logger.prn_inf("starting connection process...")
+        if self.finished:
+            # Stopped while connecting, see stop()
+            self.connector.finish()
+            return 0
 
-    # Send connection process start event to host process
-    # NOTE: Do not send any other Key-Value pairs before this!
-    event_queue.put(('__conn_process_start', 1, time()))
+        # Send simple string to device to 'wake up' greentea-client k-v parser
+        if not self.connector.write("mbed" * 10, log=True):
+            # Failed to write 'wake up' string, exit conn_process
+            self.__notify('__notify_conn_lost')
+            return 0
 
-    # Configuration of conn_opriocess behaviour
-    sync_behavior = int(config.get('sync_behavior', 1))
-    sync_timeout = config.get('sync_timeout', 1.0)
-    conn_resource = config.get('conn_resource', 'serial')
-    last_sync = False
+        # Sync packet management allows us to manipulate the way htrun sends __sync packet(s)
+        # With current settings we can force on htrun to send __sync packets in this manner:
+        #
+        # * --sync=0        - No sync packets will be sent to target platform
+        # * --sync=-10      - __sync packets will be sent unless we will reach
+        #                     timeout or proper response is sent from target platform
+        # * --sync=N        - Send up to N __sync packets to target platform. Response
+        #                     is sent unless we get response from target platform or
+        #                     timeout occur
+
+        if self.sync_behavior > 0:
+            # Sending up to 'n' __sync packets
+            self.logger.prn_inf("sending up to %s __sync packets (specified with --sync=%s)"% (self.sync_behavior, self.sync_behavior))
+        elif self.sync_behavior == 0:
+            # No __sync packets
+            self.logger.prn_wrn("skipping __sync packet (specified with --sync=%s)"% self.sync_behavior)
+        else:
+            # Send __sync until we go reply
+            self.logger.prn_inf("sending multiple __sync packets (specified with --sync=%s)"% self.sync_behavior)
+
+        if self.sync_behavior != 0:
+            sync_uuid = self.__send_sync()
+            if sync_uuid:
+                self.sync_uuid_list.append(sync_uuid)
+                self.sync_behavior -= 1
+            else:
+                self.__notify('__notify_conn_lost')
+                return 0
 
-    # Create connector instance with proper configuration
-    connector = conn_primitive_factory(conn_resource, config, event_queue, logger)
+        reader = self.__start_thread(self.__read_loop, "htrun-conn-reader")
+        writer = self.__start_thread(self.__write_loop, "htrun-conn-writer")
+        self.__sync_loop()
 
-    # If the connector failed, stop the process now
-    if not connector.connected():
-        logger.prn_err("Failed to connect to resource")
-        __notify_conn_lost()
+        # The reader must be done with the connector before it is closed
+        reader.join()
+        writer.join()
+        if self.end_event:
+            self.__notify(self.end_event)
+        else:
+            self.connector.finish()
         return 0
 
-    # Create simple buffer we will use for Key-Value protocol data
-    kv_buffer = KiViBufferWalker()
-
-    # List of all sent to target UUIDs (if multiple found)
-    sync_uuid_list = []
-
-    # We will ignore all kv pairs before we get sync back
-    sync_uuid_discovered = False
-
-    def __send_sync(timeout=None):
+    def stop(self):
+        """! End the connection from another thread
+        @details The connection ends at the latest after the read in progress.
+                 A connector still connecting finishes that first.
+        """
+        self.__finish()
+
+    def __notify(self, key):
+        error_msg = self.connector.error()
+        self.connector.finish()
+        self.event_queue.put((key, error_msg, time()))
+
+    def __finish(self, end_event=None):
+        with self.cond:
+            if not self.finished:
+                self.finished = True
+                self.end_event = end_event
+            self.cond.notify_all()
+
+    def __start_thread(self, target, name):
+        def run():
+            try:
+                target()
+            except Exception as e:
+                self.logger.prn_err("%s failed: %s" % (name, str(e)))
+                self.__finish('__notify_conn_lost')
+        thread = threading.Thread(target=with_thread_output(run), name=name)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def __send_sync(self, timeout=None):
         sync_uuid = str(uuid.uuid4())
         # Handshake, we will send {{sync;UUID}} preamble and wait for mirrored reply
-        if timeout:
-            logger.prn_inf("Reset the part and send in new preamble...")
-            connector.reset()
-            logger.prn_inf("resending new preamble '%s' after %0.2f sec"% (sync_uuid, timeout))
-        else:
-            logger.prn_inf("sending preamble '%s'"% sync_uuid)
-
-        if connector.write_kv('__sync', sync_uuid):
-            return sync_uuid
-        else:
-            return None
+        with self.io_lock:
+            if timeout:
+                self.logger.prn_inf("Reset the part and send in new preamble...")
+                self.__reset()
+                self.logger.prn_inf("resending new preamble '%s' after %0.2f sec"% (sync_uuid, timeout))
+            else:
+                self.logger.prn_inf("sending preamble '%s'"% sync_uuid)
 
-    # Send simple string to device to 'wake up' greentea-client k-v parser
-    if not connector.write("mbed" * 10, log=True):
-        # Failed to write 'wake up' string, exit conn_process
-        __notify_conn_lost()
-        return 0
+            if self.connector.write_kv('__sync', sync_uuid):
+                return sync_uuid
+            else:
+                return None
+
+    def __sync_loop(self):
+        """! Resend __sync packets until the DUT answers, then wait for the end """
+        with self.cond:
+            while not self.finished:
+                if self.sync_uuid_discovered or (self.sync_behavior == 0 and not self.last_sync):
+                    self.cond.wait()
+                    continue
+
+                # Resending __sync after 'sync_timeout' secs (default 1 sec)
+                # to target platform. If 'sync_behavior' counter is != 0 we
+                # will continue to send __sync packets to target platform.
+                # If we specify 'sync_behavior' < 0 we will send 'forever'
+                # (or until we get reply)
+                # The last __sync packet only gets one read to be answered
+                timeout = self.READ_TIMEOUT if self.sync_behavior == 0 else self.sync_timeout
+                time_to_sync_again = time() - self.loop_timer
+                if time_to_sync_again <= timeout:
+                    self.cond.wait(timeout - time_to_sync_again)
+                    continue
+
+                if self.sync_behavior == 0:
+                    # SYNC lost connection event : Device not responding, send sync failed
+                    self.finished = True
+                    self.end_event = '__notify_sync_failed'
+                    break
+
+                self.cond.release()
+                try:
+                    sync_uuid = self.__send_sync(timeout=time_to_sync_again)
+                finally:
+                    self.cond.acquire()
+                if not sync_uuid:
+                    self.finished = True
+                    self.end_event = '__notify_conn_lost'
+                    break
+                self.sync_uuid_list.append(sync_uuid)
+                self.sync_behavior -= 1
+                self.loop_timer = time()
+                # Sync behavior will be zero and if last sync fails we should report connection
+                # lost
+                if self.sync_behavior == 0:
+                    self.last_sync = True
+            self.cond.notify_all()
+
+    def __read(self):
+        with self.read_cond:
+            while self.resetting:
+                self.read_cond.wait()
+            self.reading = True
+        try:
+            if getattr(self.connector, 'read_fd', None) is not None:
+                # Blocks until data arrives, so there is no reason to return early
+                return self.connector.read(2304, timeout=self.READ_TIMEOUT)
+            # Since read is done every 0.2 sec, with maximum baud rate we can receive 2304 bytes in one read in worst case.
+            return self.connector.read(2304)
+        finally:
+            with self.read_cond:
+                self.reading = False
+                self.read_cond.notify_all()
+
+    def __reset(self):
+        """! Reset the DUT, io_lock must be held """
+        with self.read_cond:
+            self.resetting = True
+            while self.reading:
+                self.read_cond.wait()
+        try:
+            self.connector.reset()
+        finally:
+            with self.read_cond:
+                self.resetting = False
+                self.read_cond.notify_all()
+        # The DUT restarts with the original framing
+        self.framing = 1
+        self.kv_buffer.framing = 1
+
+    def __negotiate_framing(self, value):
+        try:
+            offered = int(str(value).split(';')[0])
+        except ValueError:
+            offered = 1
+        framing = max(1, min(offered, self.max_framing))
+        # Messages after the offer already use the new framing
+        self.kv_buffer.framing = framing
+        with self.io_lock:
+            self.framing = framing
+            written = self.connector.write_kv('__framing', '%d;%s' % (framing, ','.join(KIVI_ENCODINGS)))
+        self.logger.prn_inf("DUT offered KV framing version %s, using version %d" % (value, framing))
+        if not written:
+            self.__finish('__notify_conn_lost')
+
+    def __read_loop(self):
+        kv_buffer = self.kv_buffer
+        while not self.finished:
+            data = self.__read()
+            if self.finished:
+                break
+            # Check if connection is lost to serial
+            if not self.connector.connected():
+                self.__finish('__notify_conn_lost')
+                break
+            if not data:
+                continue
 
+            # Stream data stream KV parsing
+            events = []
+            print_lines = kv_buffer.append(data)
+            for line in print_lines:
+                self.logger.prn_rxd(line)
+                events.append(('__rxd_line', line, time()))
+            while kv_buffer.search():
+                key, value, timestamp = kv_buffer.pop_kv()
+                self.__handle_kv(key, value, timestamp, events)
+            self.__put_events(events)
 
-    # Sync packet management allows us to manipulate the way htrun sends __sync packet(s)
-    # With current settings we can force on htrun to send __sync packets in this manner:
-    #
-    # * --sync=0        - No sync packets will be sent to target platform
-    # * --sync=-10      - __sync packets will be sent unless we will reach
-    #                     timeout or proper response is sent from target platform
-    # * --sync=N        - Send up to N __sync packets to target platform. Response
-    #                     is sent unless we get response from target platform or
-    #                     timeout occur
-
-    if sync_behavior > 0:
-        # Sending up to 'n' __sync packets
-        logger.prn_inf("sending up to %s __sync packets (specified with --sync=%s)"% (sync_behavior, sync_behavior))
-        sync_uuid = __send_sync()
-
-        if sync_uuid:
-            sync_uuid_list.append(sync_uuid)
-            sync_behavior -= 1
+    def __put_events(self, events):
+        """! Queue all events of one read for the host test, batched if the queue supports it """
+        if hasattr(self.event_queue, 'put_many'):
+            self.event_queue.put_many(events)
         else:
-            __notify_conn_lost()
-            return 0
-    elif sync_behavior == 0:
-        # No __sync packets
-        logger.prn_wrn("skipping __sync packet (specified with --sync=%s)"% sync_behavior)
-    else:
-        # Send __sync until we go reply
-        logger.prn_inf("sending multiple __sync packets (specified with --sync=%s)"% sync_behavior)
-
-        sync_uuid = __send_sync()
-        if sync_uuid:
-            sync_uuid_list.append(sync_uuid)
-            sync_behavior -= 1
+            for event in events:
+                self.event_queue.put(event)
+
+    def __handle_kv(self, key, value, timestamp, events):
+        if self.sync_uuid_discovered and key == '__framing':
+            self.__negotiate_framing(value)
+        elif self.sync_uuid_discovered:
+            events.append((key, value, timestamp))
+            self.logger.prn_inf("found KV pair in stream: {{%s;%s}}, queued..."% (key, value))
+        elif key == '__sync':
+            with self.cond:
+                known = value in self.sync_uuid_list
+                if known:
+                    self.sync_uuid_discovered = True
+                    idx = self.sync_uuid_list.index(value)
+                    self.cond.notify_all()
+            if known:
+                events.append((key, value, time()))
+                self.logger.prn_inf("found SYNC in stream: {{%s;%s}} it is #%d sent, queued..."% (key, value, idx))
+            else:
+                self.logger.prn_err("found faulty SYNC in stream: {{%s;%s}}, ignored..."% (key, value))
+                self.logger.prn_inf("Resetting the part and sync timeout to clear out the buffer...")
+                with self.io_lock:
+                    self.__reset()
+                with self.cond:
+                    self.loop_timer = time()
         else:
-            __notify_conn_lost()
-            return 0
+            self.logger.prn_wrn("found KV pair in stream: {{%s;%s}}, ignoring..."% (key, value))
 
-    loop_timer = time()
-    while True:
+    def __write_loop(self):
+        while not self.finished:
+            # Send data to DUT
+            try:
+                (key, value, _) = self.dut_event_queue.get(timeout=self.STOP_CHECK_INTERVAL)
+            except QueueEmpty:
+                continue
 
-        # Check if connection is lost to serial
-        if not connector.connected():
-            __notify_conn_lost()
-            break
-
-        # Send data to DUT
-        try:
-            (key, value, _) = dut_event_queue.get(block=False)
-        except QueueEmpty:
-            pass # Check if target sent something
-        else:
             # Return if state machine in host_test_default has finished to end process
             if key == '__host_test_finished' and value == True:
-                logger.prn_inf("received special event '%s' value='%s', finishing"% (key, value))
-                connector.finish()
-                return 0
-            elif key == '__reset':
-                logger.prn_inf("received special event '%s', resetting dut" % (key))
-                connector.reset()
-                event_queue.put(("reset_complete", 0, time()))
-            elif not connector.write_kv(key, value):
-                connector.write_kv(key, value)
-                __notify_conn_lost()
+                self.logger.prn_inf("received special event '%s' value='%s', finishing"% (key, value))
+                self.__finish()
                 break
+            elif key == '__reset':
+                self.logger.prn_inf("received special event '%s', resetting dut" % (key))
+                with self.io_lock:
+                    self.__reset()
+                self.event_queue.put(("reset_complete", 0, time()))
+            else:
+                with self.io_lock:
+                    (key, value) = kv_encode(key, value, self.framing)
+                    written = self.connector.write_kv(key, value)
+                    if not written:
+                        self.connector.write_kv(key, value)
+                if not written:
+                    self.__finish('__notify_conn_lost')
+                    break
 
-        # Since read is done every 0.2 sec, with maximum baud rate we can receive 2304 bytes in one read in worst case.
-        data = connector.read(2304)
-        if data:
-            # Stream data stream KV parsing
-            print_lines = kv_buffer.append(data)
-            for line in print_lines:
-                logger.prn_rxd(line)
-                event_queue.put(('__rxd_line', line, time()))
-            while kv_buffer.search():
-                key, value, timestamp = kv_buffer.pop_kv()
 
-                if sync_uuid_discovered:
-                    event_queue.put((key, value, timestamp))
-                    logger.prn_inf("found KV pair in stream: {{%s;%s}}, queued..."% (key, value))
-                else:
-                    if key == '__sync':
-                        if value in sync_uuid_list:
-                            sync_uuid_discovered = True
-                            event_queue.put((key, value, time()))
-                            idx = sync_uuid_list.index(value)
-                            logger.prn_inf("found SYNC in stream: {{%s;%s}} it is #%d sent, queued..."% (key, value, idx))
-                        else:
-                            logger.prn_err("found faulty SYNC in stream: {{%s;%s}}, ignored..."% (key, value))
-                            logger.prn_inf("Resetting the part and sync timeout to clear out the buffer...")
-                            connector.reset()
-                            loop_timer = time()
-                    else:
-                        logger.prn_wrn("found KV pair in stream: {{%s;%s}}, ignoring..."% (key, value))
-
-        if not sync_uuid_discovered:
-            # Resending __sync after 'sync_timeout' secs (default 1 sec)
-            # to target platform. If 'sync_behavior' counter is != 0 we
-            # will continue to send __sync packets to target platform.
-            # If we specify 'sync_behavior' < 0 we will send 'forever'
-            # (or until we get reply)
-
-            if sync_behavior != 0:
-                time_to_sync_again = time() - loop_timer
-                if time_to_sync_again > sync_timeout:
-                    sync_uuid = __send_sync(timeout=time_to_sync_again)
-
-                    if sync_uuid:
-                        sync_uuid_list.append(sync_uuid)
-                        sync_behavior -= 1
-                        loop_timer = time()
-                        #Sync behavior will be zero and if last sync fails we should report connection
-                        #lost
-                        if sync_behavior == 0:
-                            last_sync = True
-                    else:
-                        __notify_conn_lost()
-                        break
-            elif last_sync == True:
-                #SYNC lost connection event : Device not responding, send sync failed
-                __notify_sync_failed()
-                break
+def conn_process(event_queue, dut_event_queue, config):
+    """! Entry point of the connection process, see ConnProcess """
+    return ConnProcess(event_queue, dut_event_queue, config).run()
+
 
-    return 0
+class ConnThread(threading.Thread):
+    """! Runs the connection proxy in a thread of the host test process
+
+    @details Used in place of multiprocessing.Process(target=conn_process, ...)
+             to save the start-up time of a new process. It has the parts of
+             the Process interface the host test runner uses. What the thread
+             prints goes to the output of the thread creating it, see
+             host_tests_logger.with_thread_output().
+    """
+
+    # Seconds terminate() waits for the thread to end
+    TERMINATE_TIMEOUT = 5
+
+    def __init__(self, event_queue, dut_event_queue, config):
+        threading.Thread.__init__(self, name="htrun-conn-process")
+        self.daemon = True
+        self.conn = ConnProcess(event_queue, dut_event_queue, config)
+        self.output = get_thread_output()
+        self.exitcode = None
+
+    def run(self):
+        set_thread_output(self.output)
+        try:
+            self.exitcode = self.conn.run()
+        except Exception as e:
+            HtrunLogger('CONN').prn_err("connection thread failed: %s" % str(e))
+            self.exitcode = 1
+        finally:
+            set_thread_output(None)
+
+    def terminate(self, timeout=None):
+        """! Stop the connection and wait for the thread to end
+        @param timeout Seconds to wait, TERMINATE_TIMEOUT by default
+        @details Threads can't be killed. A thread still waiting for its
+                 connection, e.g. for a serial port to show up, ends when the
+                 wait is over, and anything it queues afterwards is ignored.
+        """
+        self.conn.stop()
+        self.join(self.TERMINATE_TIMEOUT if timeout is None else timeout)
@@ -0,0 +1,151 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import pickle
+import threading
+from collections import deque
+from multiprocessing import Pipe
+from time import time
+
+if (sys.version_info > (3, 0)):
+    from queue import Empty as QueueEmpty
+else:
+    from Queue import Empty as QueueEmpty
+
+
+class EventPipe(object):
+    """! Event queue from the connection process to the host test process
+
+    @details Drop-in replacement for the multiprocessing.Queue() used as event
+             queue. multiprocessing.Queue pickles each event and hands it to a
+             feeder thread that writes it to a pipe. Here a whole batch of
+             events (e.g. all lines of one serial read, see put_many()) is
+             pickled once and written as one length-prefixed message on a raw
+             pipe. Events keep their order and timestamps.
+
+             The process that creates the pipe consumes it. A thread there
+             unpacks received batches into a local deque, so get() never waits
+             for more than the next event. Events put by the consuming process
+             itself (e.g. by host tests) go straight to the deque, behind
+             everything already received.
+    """
+
+    def __init__(self):
+        self.reader, self.writer = Pipe(duplex=False)
+        self.owner_pid = os.getpid()
+        self.__init_local()
+
+    def __init_local(self):
+        self.events = deque()
+        self.cond = threading.Condition()
+        # Serializes writes of different threads of a producer process
+        self.write_lock = threading.Lock()
+        self.receiver = None
+        self.closed = False
+
+    def __getstate__(self):
+        # Only the writing end of the pipe is passed to a producer process
+        return {'writer': self.writer, 'owner_pid': self.owner_pid}
+
+    def __setstate__(self, state):
+        self.reader = None
+        self.writer = state['writer']
+        self.owner_pid = state['owner_pid']
+        self.__init_local()
+
+    def __is_owner(self):
+        return os.getpid() == self.owner_pid
+
+    def __start_receiver(self):
+        # Called with self.cond held
+        if self.receiver is None and not self.closed:
+            self.receiver = threading.Thread(target=self.__receive, name="htrun-event-pipe")
+            self.receiver.daemon = True
+            self.receiver.start()
+
+    def __receive(self):
+        while True:
+            try:
+                payload = self.reader.recv_bytes()
+            except (EOFError, OSError, IOError):
+                return
+            if not payload:
+                # Sent by close()
+                return
+            batch = pickle.loads(payload)
+            with self.cond:
+                self.events.extend(batch)
+                self.cond.notify_all()
+
+    def put(self, event, block=True, timeout=None):
+        """! Queue one event, a (key, value, timestamp) tuple """
+        self.put_many([event])
+
+    def put_many(self, events):
+        """! Queue a list of events as one message """
+        if not events:
+            return
+        if self.__is_owner():
+            with self.cond:
+                self.events.extend(events)
+                self.cond.notify_all()
+        else:
+            payload = pickle.dumps(list(events), pickle.HIGHEST_PROTOCOL)
+            with self.write_lock:
+                self.writer.send_bytes(payload)
+
+    def get(self, block=True, timeout=None):
+        """! Remove and return the next event
+        @param block If False, raise Empty if no event is waiting
+        @param timeout Maximum time to wait in seconds, None waits forever
+        @return Event tuple
+        """
+        with self.cond:
+            self.__start_receiver()
+            if block and timeout is None:
+                while not self.events:
+                    self.cond.wait()
+            elif block:
+                deadline = time() + timeout
+                while not self.events:
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+            if not self.events:
+                raise QueueEmpty()
+            return self.events.popleft()
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def empty(self):
+        with self.cond:
+            self.__start_receiver()
+            return not self.events
+
+    def close(self):
+        """! Stop receiving events and close the pipe, called by the consumer """
+        with self.cond:
+            receiver = self.receiver
+            self.closed = True
+        if receiver is not None:
+            # Wakes the receiver up with an empty message
+            self.writer.send_bytes(b'')
+            receiver.join()
+        self.reader.close()
+        self.writer.close()
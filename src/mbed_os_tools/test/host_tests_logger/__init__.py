@@ -14,3 +14,9 @@
 # limitations under the License.
 
 from .ht_logger import HtrunLogger
+from .ht_output import (
+    ThreadOutput,
+    get_thread_output,
+    set_thread_output,
+    with_thread_output,
+)
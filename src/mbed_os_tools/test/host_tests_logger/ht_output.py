@@ -0,0 +1,74 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+# Output of the in-process mbedhtrun run each thread belongs to
+_local = threading.local()
+
+
+def get_thread_output():
+    """! Output of the calling thread, None if it writes to the process' own """
+    return getattr(_local, 'output', None)
+
+
+def set_thread_output(output):
+    """! Send what the calling thread prints to 'output', None to stop """
+    _local.output = output
+
+
+def with_thread_output(target):
+    """! Wrap a thread's target to run with the output of the calling thread
+    @details Threads started by an in-process mbedhtrun run use it so that
+             what they print ends up in the run's output
+    """
+    output = get_thread_output()
+    if output is None:
+        return target
+
+    def run(*args, **kwargs):
+        set_thread_output(output)
+        try:
+            return target(*args, **kwargs)
+        finally:
+            set_thread_output(None)
+    return run
+
+
+class ThreadOutput(object):
+    """! File-like object writing to the output of the calling thread
+
+    @details Installed as sys.stdout and sys.stderr while in-process mbedhtrun
+             runs are in progress (see mbed_test_api.run_htrun_in_process()),
+             so runs in different threads don't mix their output. Threads
+             without an output of their own write to 'default'.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __output(self):
+        output = get_thread_output()
+        return self.default if output is None else output
+
+    def write(self, text):
+        return self.__output().write(text)
+
+    def flush(self):
+        self.__output().flush()
+
+    def __getattr__(self, name):
+        # e.g. encoding or isatty()
+        return getattr(self.default, name)
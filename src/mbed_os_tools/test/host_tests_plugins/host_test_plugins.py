@@ -23,6 +23,7 @@ from time import sleep
 from subprocess import call
 
 from ... import detect
+from ...detect.watcher import shared_watcher
 from ..host_tests_logger import HtrunLogger
 
 
@@ -126,24 +127,15 @@ class HostTestPluginBase:
             new_destination_disk = destination_disk
 
             # Sometimes OSes take a long time to mount devices (up to one minute).
-            # Current pooling time: 120x 500ms = 1 minute
+            # Devices are re-listed only when the host reports a device change
             self.print_plugin_info("Waiting up to %d sec for '%s' mount point (current is '%s')..."% (timeout, target_id, destination_disk))
-            timeout_step = 0.5
-            timeout = int(timeout / timeout_step)
-            for i in range(timeout):
-                # mbed_os_tools.detect.create() should be done inside the loop.
-                # Otherwise it will loop on same data.
-                mbeds = detect.create()
-                mbed_list = mbeds.list_mbeds() #list of mbeds present
-                # get first item in list with a matching target_id, if present
-                mbed_target = next((x for x in mbed_list if x['target_id']==target_id), None)
-
-                if mbed_target is not None:
-                    # Only assign if mount point is present and known (not None)
-                    if 'mount_point' in mbed_target and mbed_target['mount_point'] is not None:
-                        new_destination_disk = mbed_target['mount_point']
-                        break
-                sleep(timeout_step)
+            watcher = shared_watcher(detect.create(cached=True))
+            # Only assign if mount point is present and known (not None)
+            mbed_target = watcher.wait_for(target_id,
+                lambda x: x.get('mount_point') is not None,
+                timeout=timeout)
+            if mbed_target is not None:
+                new_destination_disk = mbed_target['mount_point']
 
             if new_destination_disk != destination_disk:
                 # Mount point changed, update to new mount point from mbed-ls
@@ -180,26 +172,18 @@ class HostTestPluginBase:
 
         if target_id:
             # Sometimes OSes take a long time to mount devices (up to one minute).
-            # Current pooling time: 120x 500ms = 1 minute
+            # Devices are re-listed only when the host reports a device change
             self.print_plugin_info("Waiting up to %d sec for '%s' serial port (current is '%s')..."% (timeout, target_id, serial_port))
-            timeout_step = 0.5
-            timeout = int(timeout / timeout_step)
-            for i in range(timeout):
-                # mbed_os_tools.detect.create() should be done inside the loop. Otherwise it will loop on same data.
-                mbeds = detect.create()
-                mbed_list = mbeds.list_mbeds() #list of mbeds present
-                # get first item in list with a matching target_id, if present
-                mbed_target = next((x for x in mbed_list if x['target_id']==target_id), None)
-
-                if mbed_target is not None:
-                    # Only assign if serial port is present and known (not None)
-                    if 'serial_port' in mbed_target and mbed_target['serial_port'] is not None:
-                        new_serial_port = mbed_target['serial_port']
-                        if new_serial_port != serial_port:
-                            # Serial port changed, update to new serial port from mbed-ls
-                            self.print_plugin_info("Serial port for tid='%s' changed from '%s' to '%s'..." % (target_id, serial_port, new_serial_port))
-                        break
-                sleep(timeout_step)
+            watcher = shared_watcher(detect.create(cached=True))
+            # Only assign if serial port is present and known (not None)
+            mbed_target = watcher.wait_for(target_id,
+                lambda x: x.get('serial_port') is not None,
+                timeout=timeout)
+            if mbed_target is not None:
+                new_serial_port = mbed_target['serial_port']
+                if new_serial_port != serial_port:
+                    # Serial port changed, update to new serial port from mbed-ls
+                    self.print_plugin_info("Serial port for tid='%s' changed from '%s' to '%s'..." % (target_id, serial_port, new_serial_port))
         else:
             new_serial_port = serial_port
 
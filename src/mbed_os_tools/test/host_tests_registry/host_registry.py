@@ -29,16 +29,28 @@ except ImportError:
 
 from inspect import getmembers, isclass
 from os import listdir
-from os.path import abspath, exists, isdir, isfile, join
+from os.path import abspath, exists, getmtime, isdir, isfile, join
 
 from ..host_tests.base_host_test import BaseHostTest
 
+# Local host test modules loaded by this process: path -> (mtime, module)
+# Processes running many tests (see run_htrun_in_process()) load each once
+LOADED_MODULES = {}
+
 
 class HostRegistry:
     """ Class stores registry with host tests and objects representing them
     """
     HOST_TESTS = {}  # Map between host_test_name -> host_test_object
 
+    def __init__(self, host_tests=None):
+        """! ctor
+        @param host_tests Map of host tests for this registry alone, by default
+               all registries share HostRegistry.HOST_TESTS
+        """
+        if host_tests is not None:
+            self.HOST_TESTS = host_tests
+
     def register_host_test(self, ht_name, ht_object):
         """! Registers host test object by name
 
@@ -112,8 +124,14 @@ class HostRegistry:
 
     def _add_module_to_registry(self, path, module_file, verbose):
         module_name = module_file[:-3]
+        module_path = abspath(join(path, module_file))
         try:
-            mod = load_source(module_name, abspath(join(path, module_file)))
+            mtime = getmtime(module_path)
+            if module_path in LOADED_MODULES and LOADED_MODULES[module_path][0] == mtime:
+                mod = LOADED_MODULES[module_path][1]
+            else:
+                mod = load_source(module_name, module_path)
+                LOADED_MODULES[module_path] = (mtime, mod)
         except Exception as e:
             print(
                 "HOST: Error! While loading local host test module '%s'"
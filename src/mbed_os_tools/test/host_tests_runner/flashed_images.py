@@ -0,0 +1,107 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import os
+import re
+from appdirs import user_data_dir
+
+
+class FlashedImages(object):
+    """! Remembers which image was last flashed to each device
+
+    @details State is kept in one small JSON file per target ID in the user's
+             data directory, so mbedhtrun processes testing different devices
+             never share a file and state survives from one mbedhtrun run to
+             the next.
+
+             Each record holds the SHA-1 of the image and the DETAILS.TXT
+             remount count of the device right after flashing. An interface
+             chip bumps the remount count whenever its disk is remounted, e.g.
+             by another MSC copy, and starts counting again after a power
+             cycle, so a changed count means the record can't be trusted. A
+             device without a remount count is always flashed.
+    """
+
+    DEFAULT_DIR = os.path.join(user_data_dir('mbedhtrun'), 'flashed')
+
+    def __init__(self, state_dir=None):
+        self.state_dir = state_dir or self.DEFAULT_DIR
+
+    def __state_path(self, target_id):
+        # Target IDs are hex strings, anything else is replaced to get a file name
+        return os.path.join(self.state_dir, re.sub(r'[^\w-]', '_', target_id) + '.json')
+
+    @staticmethod
+    def image_hash(image_path):
+        sha = hashlib.sha1()
+        with open(image_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def get(self, target_id):
+        """! Record of the last image flashed to a device
+        @return Dictionary with 'image_hash' and 'remount_count', None if unknown
+        """
+        try:
+            with open(self.__state_path(target_id)) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def is_flashed(self, target_id, image_path, remount_count=None):
+        """! Check if a device already runs an image
+        @param remount_count Current DETAILS.TXT remount count, None if not available
+        @return True if the image was the last one flashed and the device wasn't remounted since
+        """
+        if remount_count is None:
+            # Nothing tells whether the image was replaced since
+            return False
+        record = self.get(target_id)
+        if not record or record.get('remount_count') != remount_count:
+            return False
+        return record.get('image_hash') == self.image_hash(image_path)
+
+    def record(self, target_id, image_path, remount_count=None):
+        """! Remember a successfully flashed image
+        @param remount_count DETAILS.TXT remount count after flashing, None if not available
+        """
+        record = {
+            'image_hash': self.image_hash(image_path),
+            'image_path': image_path,
+            'remount_count': remount_count,
+        }
+        if not os.path.isdir(self.state_dir):
+            try:
+                os.makedirs(self.state_dir)
+            except OSError:
+                # Created by a concurrent mbedhtrun
+                pass
+        path = self.__state_path(target_id)
+        tmp_path = '%s.%d' % (path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(record, f)
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+
+    def forget(self, target_id):
+        """! Drop the record of a device, e.g. before flashing it """
+        try:
+            os.remove(self.__state_path(target_id))
+        except OSError:
+            pass
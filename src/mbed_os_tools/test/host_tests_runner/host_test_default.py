@@ -35,7 +35,8 @@ from ..host_tests.dev_null_auto import DevNullTest
 
 from .host_test import DefaultTestSelectorBase
 from ..host_tests_logger import HtrunLogger
-from ..host_tests_conn_proxy import conn_process
+from ..host_tests_conn_proxy import conn_process, ConnThread
+from ..host_tests_conn_proxy.event_pipe import EventPipe
 from ..host_tests_toolbox.host_functional import handle_send_break_cmd
 if (sys.version_info > (3, 0)):
     from queue import Empty as QueueEmpty
@@ -55,7 +56,8 @@ class DefaultTestSelector(DefaultTestSelectorBase):
 
         self.logger = HtrunLogger('HTST')
 
-        self.registry = HostRegistry()
+        # Host test objects of this run alone, runs in one process can overlap
+        self.registry = HostRegistry(host_tests={})
         self.registry.register_host_test("echo", EchoTest())
         self.registry.register_host_test("default", DefaultAuto())
         self.registry.register_host_test("rtc_auto", RTCTest())
@@ -133,7 +135,7 @@ class DefaultTestSelector(DefaultTestSelectorBase):
         result = None
         timeout_duration = 10       # Default test case timeout
         coverage_idle_timeout = 10  # Default coverage idle timeout
-        event_queue = Queue()       # Events from DUT to host
+        event_queue = EventPipe()   # Events from DUT to host
         dut_event_queue = Queue()   # Events from host to DUT {k;v}
 
         def callback__notify_prn(key, value, timestamp):
@@ -176,7 +178,8 @@ class DefaultTestSelector(DefaultTestSelectorBase):
             "image_path" : self.mbed.image_path,
             "skip_reset": self.options.skip_reset,
             "tags" : self.options.tag_filters,
-            "sync_timeout": self.options.sync_timeout
+            "sync_timeout": self.options.sync_timeout,
+            "kv_framing": self.options.kv_framing
         }
 
         if self.options.global_resource_mgr:
@@ -194,7 +197,10 @@ class DefaultTestSelector(DefaultTestSelectorBase):
         def start_conn_process():
             # DUT-host communication process
             args = (event_queue, dut_event_queue, config)
-            p = Process(target=conn_process, args=args)
+            if self.options.conn_thread:
+                p = ConnThread(*args)
+            else:
+                p = Process(target=conn_process, args=args)
             p.deamon = True
             p.start()
             return p
@@ -253,12 +259,16 @@ class DefaultTestSelector(DefaultTestSelectorBase):
 
         if not conn_process_started:
             p.terminate()
+            event_queue.close()
             return self.RESULT_TIMEOUT
 
         start_time = time()
 
         try:
             consume_preamble_events = True
+            # The first __timeout is the serial port polling timeout sent by
+            # the connection before it connects, see conn_primitive_factory()
+            polling_timeout_set = False
 
             while (time() - start_time) < timeout_duration:
                 # Handle default events like timeout, host_test_name, ...
@@ -286,7 +296,15 @@ class DefaultTestSelector(DefaultTestSelectorBase):
                         # Override default timeout for this event queue
                         start_time = time()
                         timeout_duration = int(value) # New timeout
-                        self.logger.prn_inf("setting timeout to: %d sec"% int(value))
+                        if self.options.test_timeout:
+                            if polling_timeout_set:
+                                # Set by the caller, e.g. from past durations of the test
+                                timeout_duration = self.options.test_timeout
+                            else:
+                                # The connection's wait for the serial port isn't cut short
+                                timeout_duration = max(timeout_duration, self.options.test_timeout)
+                        polling_timeout_set = True
+                        self.logger.prn_inf("setting timeout to: %d sec"% timeout_duration)
                     elif key == '__version':
                         self.client_version = value
                         self.logger.prn_inf("DUT greentea-client version: " + self.client_version)
@@ -500,6 +518,7 @@ class DefaultTestSelector(DefaultTestSelectorBase):
         if self.test_supervisor:
             self.test_supervisor.teardown()
         self.logger.prn_inf("teardown() finished")
+        event_queue.close()
 
         return result
 
@@ -20,6 +20,7 @@ from .. import host_tests_plugins as ht_plugins
 from ... import detect
 from .. import DEFAULT_BAUD_RATE
 from ..host_tests_logger import HtrunLogger
+from .flashed_images import FlashedImages
 
 
 class Mbed:
@@ -44,6 +45,8 @@ class Mbed:
         self.retry_copy = self.options.retry_copy
         self.program_cycle_s = float(self.options.program_cycle_s if self.options.program_cycle_s is not None else 2.0)
         self.polling_timeout = self.options.polling_timeout
+        # Images flashed to devices, used to skip flashing an image already on the device
+        self.flashed_images = FlashedImages() if self.options.skip_identical_flash else None
 
         # Serial port settings
         self.serial_baud = DEFAULT_BAUD_RATE
@@ -137,10 +140,11 @@ class Mbed:
                 return True
 
             bad_files = set(['FAIL.TXT'])
+            # The process-wide detector keeps its platform database loaded,
+            # list_mbeds() still enumerates devices again on every call
+            mbeds = detect.create(cached=True)
             # Re-try at max 5 times with 0.5 sec in delay
             for i in range(5):
-                # mbed_os_tools.detect.create() should be done inside the loop. Otherwise it will loop on same data.
-                mbeds = detect.create()
                 mbed_list = mbeds.list_mbeds() #list of mbeds present
                 # get first item in list with a matching target_id, if present
                 mbed_target = next((x for x in mbed_list if x['target_id']==target_id), None)
@@ -200,6 +204,14 @@ class Mbed:
             self.logger.prn_err("Error: image file (%s) not found" % image_path)
             return False
 
+        if self.flashed_images is not None and target_id:
+            if self.flashed_images.is_flashed(target_id, image_path, get_remount_count(disk)):
+                # The device is still reset when the connection to it is opened
+                self.logger.prn_inf("image '%s' already on target '%s', copy skipped" % (image_path, target_id))
+                return True
+            # A failed or interrupted copy leaves an unknown image on the device
+            self.flashed_images.forget(target_id)
+
         for count in range(0, retry_copy):
             initial_remount_count = get_remount_count(disk)
             # Call proper copy method
@@ -210,6 +222,9 @@ class Mbed:
             result = check_flash_error(target_id, disk, initial_remount_count)
             if result:
                 break
+
+        if result and self.flashed_images is not None and target_id:
+            self.flashed_images.record(target_id, image_path, get_remount_count(disk))
         return result
 
     def copy_image_raw(self, image_path=None, disk=None, copy_method=None, port=None, mcu=None):
@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import binascii
 import os
 
 """
@@ -29,18 +30,57 @@ def __default_coverage_start_callback(self, key, value, timestamp):
         self.log("LCOV:" + str(e))
 """
 
+# Number of payload characters decoded at once, bounds the memory used by
+# the expansion of dot compressed zeros
+COVERAGE_CHUNK_SIZE = 1 << 16
+
+
+def coverage_unpack_hex_chunks(payload, chunk_size=COVERAGE_CHUNK_SIZE):
+    """! Convert a block of hex string data back to binary, one chunk at a time
+    @param payload String with hex encoded ascii data, e.g.: '6164636772...'
+    @param chunk_size Number of payload characters decoded at once
+    @return Generator of bytes objects, the binary data once joined
+    @details A trailing unpaired hex digit is ignored. Raises ValueError on
+             characters other than hex digits and '.'
+    """
+    # Unpaired hex digit at the end of the previous chunk
+    nibble = str()
+    for offset in range(0, len(payload), chunk_size):
+        # This payload might be packed with dot compression
+        # where byte value 0x00 is coded as ".", and not as "00"
+        chunk = nibble + payload[offset:offset + chunk_size].replace('.', '00')
+        if len(chunk) % 2:
+            chunk, nibble = chunk[:-1], chunk[-1]
+        else:
+            nibble = str()
+        try:
+            yield binascii.unhexlify(chunk)
+        except (TypeError, binascii.Error) as e:
+            # Python 2 raises TypeError on non-hex digits
+            raise ValueError("invalid hex payload: %s" % str(e))
+
+
 def coverage_pack_hex_payload(payload):
     """! Convert a block of hex string data back to binary and return the binary data
     @param payload String with hex encoded ascii data, e.g.: '6164636772...'
     @return bytearray with payload with data
     """
-    # This payload might be packed with dot compression
-    # where byte value 0x00 is coded as ".", and not as "00"
-    payload = payload.replace('.', '00')
+    return bytearray(b''.join(coverage_unpack_hex_chunks(payload)))
 
-    hex_pairs = map(''.join, zip(*[iter(payload)] * 2)) # ['61', '64', '63', '67', '72', ... ]
-    bin_payload = bytearray([int(s, 16) for s in hex_pairs])
-    return bin_payload
+
+def coverage_file_path(build_path, path):
+    """! Path a coverage file is stored at, its directory is created if needed
+    @param build_path Directory used for relative paths that do not exist
+    @param path Path of the file sent by the device
+    """
+    d, filename = os.path.split(path)
+    if not os.path.isabs(d) and not os.path.exists(d):
+        # For a relative path that do not exist. Try adding ./build/<yotta target> prefix
+        d = build_path
+        path = os.path.join(d, filename)
+    if not os.path.exists(d):
+        os.makedirs(d)
+    return path
 
 
 def coverage_dump_file(build_path, path, payload):
@@ -51,16 +91,35 @@ def coverage_dump_file(build_path, path, payload):
     """
     result = True
     try:
-        d, filename = os.path.split(path)
-        if not os.path.isabs(d) and not os.path.exists(d):
-            # For a relative path that do not exist. Try adding ./build/<yotta target> prefix
-            d = build_path
-            path = os.path.join(d, filename)
-        if not os.path.exists(d):
-            os.makedirs(d)
-        with open(path, "wb") as f:
+        with open(coverage_file_path(build_path, path), "wb") as f:
             f.write(payload)
     except IOError as e:
         print(str(e))
         result = False
     return result
+
+
+def coverage_dump_hex_payload(build_path, path, payload):
+    """! Same as coverage_dump_file(build_path, path, coverage_pack_hex_payload(payload))
+    @details Each decoded chunk is written right away, the binary data is never
+             held in memory as a whole
+    @param payload String with hex encoded ascii data, e.g.: '6164636772...'
+    @return Number of bytes written, None if the file couldn't be written.
+            Raises ValueError on an invalid payload, without leaving a file
+    """
+    size = 0
+    try:
+        path = coverage_file_path(build_path, path)
+        with open(path, "wb") as f:
+            try:
+                for chunk in coverage_unpack_hex_chunks(payload):
+                    f.write(chunk)
+                    size += len(chunk)
+            except ValueError:
+                f.close()
+                os.remove(path)
+                raise
+    except (IOError, OSError) as e:
+        print(str(e))
+        return None
+    return size
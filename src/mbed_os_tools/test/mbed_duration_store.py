@@ -0,0 +1,222 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""! Store of historical test durations
+
+Durations of test suites and of their test cases are kept in a SQLite
+database, keyed by build, test, platform and a hash of the test binary:
+
+    store = DurationStore()
+    slow = store.regressions(test_result_ext)   # before recording the run
+    store.record_test_results(test_result_ext)
+    durations = store.expected_durations()      # for jobs_from_test_spec()
+
+With --adaptive-timeout or --work-stealing greentea records each test as it
+finishes (see run_test_thread()). --adaptive-timeout gives each test timeout()
+as the mbedhtrun --test-timeout, from the runs of the same binary if there are
+any, and --work-stealing orders the tests by expected_durations().
+
+test_result_ext is the dictionary greentea passes to the report exporters,
+see mbed_report_api.
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+from time import time
+
+from appdirs import user_data_dir
+
+from .mbed_greentea_log import gt_logger
+from .mbed_sqlite_store import SqliteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS durations (
+    build TEXT NOT NULL,
+    test TEXT NOT NULL,
+    testcase TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    binary_hash TEXT NOT NULL,
+    result TEXT,
+    duration REAL NOT NULL,
+    recorded REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS durations_test ON durations (platform, test, testcase, recorded);
+"""
+
+# Binary hashes by (path, size, mtime), images are hashed once per process
+_hashes = {}
+
+
+def binary_hash(path):
+    """! SHA-1 of a test binary
+    @return Hex digest, or an empty string if the binary can't be read
+    """
+    try:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+        if key not in _hashes:
+            sha = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    sha.update(chunk)
+            _hashes[key] = sha.hexdigest()
+        return _hashes[key]
+    except (IOError, OSError):
+        return str()
+
+
+def percentile(values, fraction):
+    """! Nearest-rank percentile of a list of numbers """
+    values = sorted(values)
+    rank = int(math.ceil(fraction * len(values) - 1e-9))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+class DurationStore(SqliteStore):
+    """! SQLite store of test suite and test case durations
+
+    @details Parallel test threads record results through their own
+             connections, see SqliteStore. Each recorded test suite is one
+             short transaction.
+    """
+
+    SCHEMA = SCHEMA
+
+    DEFAULT_PATH = os.path.join(user_data_dir('mbedgt'), 'durations.db')
+
+    # Number of most recent runs the statistics are computed from
+    HISTORY = 50
+
+    # Adaptive timeouts are the p95 duration times this factor, plus a margin in seconds
+    TIMEOUT_FACTOR = 2.0
+    TIMEOUT_MARGIN = 10.0
+
+    # A run regressed if it took longer than its p95 duration times this factor
+    REGRESSION_FACTOR = 1.5
+
+    def record(self, build, test, platform, duration, image_path=None, result=None, testcases=None):
+        """! Record the duration of a test suite run
+        @param duration Duration of the test suite in seconds
+        @param image_path Path of the test binary, used to tell builds apart
+        @param result Test suite result, e.g. 'OK'
+        @param testcases Dictionary of test case durations in seconds, by name
+        """
+        digest = binary_hash(image_path) if image_path else str()
+        now = time()
+        rows = [(build, test, str(), platform, digest, result, float(duration), now)]
+        for name, tc_duration in sorted((testcases or {}).items()):
+            rows.append((build, test, name, platform, digest, None, float(tc_duration), now))
+        try:
+            with self.connection() as conn:
+                conn.executemany('INSERT INTO durations VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        except sqlite3.Error as e:
+            gt_logger.gt_log_warn("failed to record duration of '%s': %s" % (test, str(e)))
+
+    def record_test_results(self, test_result_ext):
+        """! Record the durations of all test suites of a greentea run
+        @param test_result_ext Test results, as passed to the report exporters
+        """
+        for build, suites in test_result_ext.items():
+            for test, suite in suites.items():
+                if 'elapsed_time' not in suite:
+                    continue
+                testcases = dict(
+                    (name, tc.get('duration', 0.0))
+                    for name, tc in suite.get('testcase_result', {}).items())
+                image_path = suite.get('image_path')
+                self.record(
+                    build,
+                    test,
+                    suite.get('platform_name', str()),
+                    suite['elapsed_time'],
+                    image_path=image_path if image_path and os.path.isfile(image_path) else None,
+                    result=suite.get('single_test_result'),
+                    testcases=testcases)
+
+    def durations(self, test, platform, testcase=None, build=None, digest=None):
+        """! Durations of the most recent runs, newest first
+        @param testcase Test case name, None for the whole test suite
+        @param build Only use runs of this build, None uses all builds
+        @param digest Only use runs of the binary with this hash, see binary_hash()
+        """
+        query = 'SELECT duration FROM durations WHERE platform=? AND test=? AND testcase=?'
+        args = [platform, test, testcase or str()]
+        if build is not None:
+            query += ' AND build=?'
+            args.append(build)
+        if digest is not None:
+            query += ' AND binary_hash=?'
+            args.append(digest)
+        query += ' ORDER BY recorded DESC LIMIT ?'
+        args.append(self.HISTORY)
+        return [row[0] for row in self.connection().execute(query, args)]
+
+    def stats(self, test, platform, testcase=None, build=None, digest=None):
+        """! Median and 95th percentile of recent durations
+        @return Tuple (p50, p95) in seconds, or None without history
+        """
+        values = self.durations(test, platform, testcase, build, digest)
+        if not values:
+            return None
+        return percentile(values, 0.5), percentile(values, 0.95)
+
+    def expected_durations(self, platform=None):
+        """! Median durations of all known test suites
+        @param platform Only return tests of this platform, None for all
+        @return Dictionary of durations in seconds keyed by (platform, test),
+                as taken by jobs_from_test_spec()
+        """
+        query = "SELECT DISTINCT platform, test FROM durations WHERE testcase=''"
+        args = []
+        if platform is not None:
+            query += ' AND platform=?'
+            args.append(platform)
+        keys = list(self.connection().execute(query, args))
+        return dict(((p, t), self.stats(t, p)[0]) for p, t in keys)
+
+    def timeout(self, test, platform, default, image_path=None):
+        """! Timeout for a test suite based on its history, see mbedhtrun --test-timeout
+        @param default Timeout in seconds used without history
+        @param image_path Test binary, the runs of the same binary are used if there are any
+        @return Timeout in seconds
+        """
+        stats = None
+        if image_path:
+            # A rebuilt test may take much longer or shorter than the old binary did
+            stats = self.stats(test, platform, digest=binary_hash(image_path))
+        if stats is None:
+            stats = self.stats(test, platform)
+        if stats is None:
+            return default
+        return int(stats[1] * self.TIMEOUT_FACTOR + self.TIMEOUT_MARGIN)
+
+    def regressions(self, test_result_ext, factor=None):
+        """! Test suites of a run that took much longer than they used to
+        @details Call before recording the run
+        @param factor Regression threshold, see REGRESSION_FACTOR
+        @return List of (build, test, duration, p95) tuples
+        """
+        factor = factor or self.REGRESSION_FACTOR
+        result = []
+        for build, suites in sorted(test_result_ext.items()):
+            for test, suite in sorted(suites.items()):
+                if 'elapsed_time' not in suite:
+                    continue
+                stats = self.stats(test, suite.get('platform_name', str()))
+                if stats and suite['elapsed_time'] > stats[1] * factor:
+                    result.append((build, test, suite['elapsed_time'], stats[1]))
+        return result
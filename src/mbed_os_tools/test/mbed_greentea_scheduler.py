@@ -0,0 +1,252 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""! Scheduling of tests on a rack of devices
+
+Instead of running test builds one after another on the devices of the
+build's platform, all tests of all builds are queued up front:
+
+    scheduler = TestScheduler(muts, jobs_from_test_spec(test_spec))
+    scheduler.run(run_job)      # run_job(mut, job) is called in parallel
+
+Each device gets a queue of its own. Jobs are dealt out longest expected
+duration first, each to the compatible device with the least work queued,
+or to the one already having a job with the same image so it isn't flashed
+again. A device runs its own jobs first, longest first, preferring one
+using the image it was last flashed with. When it has none left it steals
+the shortest job of the compatible device with the most work left, so
+devices finish at about the same time even when durations are wrong.
+"""
+
+import threading
+import traceback
+from collections import deque
+try:
+    from Queue import Empty
+except ImportError:
+    # Python 3
+    from queue import Empty
+
+from .mbed_greentea_log import gt_logger
+
+
+class TestJob(object):
+    """! One test binary to run on a device of a given platform """
+
+    def __init__(self, build_name, test_name, platform_name, image_path, expected_duration=None, test=None):
+        self.build_name = build_name
+        self.test_name = test_name
+        self.platform_name = platform_name
+        self.image_path = image_path
+        # Expected duration in seconds, None if unknown
+        self.expected_duration = expected_duration
+        # Caller's data about the test, e.g. greentea's test dictionary
+        self.test = test
+        # Set when the job has run
+        self.mut = None
+        self.result = None
+
+    def __repr__(self):
+        return "TestJob(%r, %r, %r)" % (self.build_name, self.test_name, self.platform_name)
+
+
+def jobs_from_test_spec(test_spec, durations=None, filter_by_names=None):
+    """! Create a job for each test of each build in a test specification
+    @param test_spec TestSpec object
+    @param durations Dictionary of expected durations in seconds, keyed by
+           (platform_name, test_name)
+    @param filter_by_names Names of the builds to use, None uses all builds
+    @return List of TestJob objects
+    """
+    durations = durations or {}
+    jobs = []
+    for build in test_spec.get_test_builds(filter_by_names):
+        platform_name = build.get_platform()
+        for test_name, test in sorted(build.get_tests().items()):
+            jobs.append(TestJob(
+                build.get_name(),
+                test_name,
+                platform_name,
+                test.get_binary().get_path(),
+                durations.get((platform_name, test_name)),
+            ))
+    return jobs
+
+
+class DeviceJobs(object):
+    """! Jobs queued for one device """
+
+    def __init__(self, mut):
+        self.mut = mut
+        self.jobs = deque()
+        # Expected duration of the queued jobs
+        self.load = 0.0
+        self.lock = threading.Lock()
+
+
+class DeviceQueue(object):
+    """! Queue.Queue like view of the jobs of one device
+
+    @details For code pulling its tests from a queue, like greentea's
+             run_test_thread(). empty() takes the next job, so a following
+             get(False) can't fail because another device stole it.
+    """
+
+    def __init__(self, scheduler, mut):
+        self.scheduler = scheduler
+        self.mut = mut
+        self.job = None
+
+    def empty(self):
+        if self.job is None:
+            self.job = self.scheduler.next_job(self.mut)
+        return self.job is None
+
+    def get(self, block=True, timeout=None):
+        """! Next TestJob object, raises Queue.Empty if none is left """
+        if self.empty():
+            raise Empty()
+        job, self.job = self.job, None
+        return job
+
+
+class TestScheduler(object):
+    """! Hands out jobs to the free devices of a rack, with work stealing """
+
+    # Expected duration of jobs without history, when no job has one
+    DEFAULT_DURATION = 60.0
+
+    def __init__(self, muts, jobs):
+        """! ctor
+        @param muts List of devices, as listed by mbed-ls
+        @param jobs List of TestJob objects
+        """
+        self.muts = muts
+        known = [job.expected_duration for job in jobs if job.expected_duration is not None]
+        # Jobs without history are expected to take as long as an average job
+        self.unknown_duration = sum(known) / len(known) if known else self.DEFAULT_DURATION
+        # Queued jobs of each device, by target ID
+        self.queues = dict((mut['target_id'], DeviceJobs(mut)) for mut in muts)
+        # Jobs no device can run
+        self.orphans = []
+        self.done = []
+        # Image last flashed to each device, by target ID
+        self.flashed = {}
+        self.lock = threading.Lock()
+        self.__deal(sorted(jobs, key=self.expected_duration, reverse=True))
+
+    def expected_duration(self, job):
+        if job.expected_duration is None:
+            return self.unknown_duration
+        return job.expected_duration
+
+    def __compatible(self, platform_name):
+        return [queue for queue in self.queues.values()
+                if queue.mut['platform_name'] == platform_name]
+
+    def __deal(self, jobs):
+        """! Queue jobs, longest first, to the compatible device with the least work """
+        for job in jobs:
+            queues = self.__compatible(job.platform_name)
+            if not queues:
+                self.orphans.append(job)
+                continue
+            same_image = [queue for queue in queues
+                          if any(j.image_path == job.image_path for j in queue.jobs)]
+            queue = min(same_image or queues, key=lambda queue: queue.load)
+            queue.jobs.append(job)
+            queue.load += self.expected_duration(job)
+
+    def __take(self, queue, index):
+        job = queue.jobs[index]
+        del queue.jobs[index]
+        queue.load -= self.expected_duration(job)
+        return job
+
+    def __pop_own(self, queue, last_image):
+        with queue.lock:
+            if not queue.jobs:
+                return None
+            for index, job in enumerate(queue.jobs):
+                if job.image_path == last_image:
+                    # Avoids flashing the device again
+                    return self.__take(queue, index)
+            # Longest job
+            return self.__take(queue, 0)
+
+    def __steal(self, mut):
+        victims = [queue for queue in self.__compatible(mut['platform_name'])
+                   if queue.mut['target_id'] != mut['target_id']]
+        # Device with the most work left first
+        for victim in sorted(victims, key=lambda queue: queue.load, reverse=True):
+            with victim.lock:
+                if victim.jobs:
+                    # Shortest job, the owner takes the long ones from the other end
+                    return self.__take(victim, -1)
+        return None
+
+    def next_job(self, mut):
+        """! Remove and return the next job for a free device
+        @param mut Device structure
+        @return TestJob object, or None if no job is left for this device
+        """
+        queue = self.queues[mut['target_id']]
+        job = self.__pop_own(queue, self.flashed.get(mut['target_id']))
+        if job is None:
+            job = self.__steal(mut)
+        if job is None:
+            return None
+        job.mut = mut
+        self.flashed[mut['target_id']] = job.image_path
+        return job
+
+    def queue(self, mut):
+        """! Queue.Queue like object handing out the jobs of a device, see DeviceQueue """
+        return DeviceQueue(self, mut)
+
+    def unschedulable(self):
+        """! Jobs no device can run, e.g. for a platform not in the rack """
+        return list(self.orphans)
+
+    def __device_loop(self, mut, run_job):
+        while True:
+            job = self.next_job(mut)
+            if job is None:
+                break
+            try:
+                job.result = run_job(mut, job)
+            except Exception:
+                gt_logger.gt_log_err("test '%s' failed on '%s':" % (job.test_name, mut['target_id']))
+                for line in traceback.format_exc().splitlines():
+                    gt_logger.gt_log_tab(line)
+            with self.lock:
+                self.done.append(job)
+
+    def run(self, run_job):
+        """! Run all jobs, one thread per device
+        @param run_job Function called with (mut, job), its return value is
+               stored in job.result
+        @return List of completed jobs, in order of completion
+        """
+        threads = []
+        for mut in self.muts:
+            thread = threading.Thread(
+                target=self.__device_loop, args=(mut, run_job), name=mut['target_id'])
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return self.done
@@ -0,0 +1,173 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""! Long-lived mbedhtrun workers
+
+Starting mbedhtrun for each test binary costs a Python interpreter start,
+imports, device detection with mbed-ls and a scan of the local host tests.
+An HtrunWorker is a process that runs mbedhtrun jobs one after another with
+run_htrun_in_process(), so all of this is paid once per device:
+
+    with HtrunWorker() as worker:
+        for cmd in commands:
+            result = worker.run(cmd)
+            if result.result != TEST_RESULT_OK:
+                ...
+
+Use one worker per device under test to test devices in parallel.
+"""
+
+import traceback
+from multiprocessing import Pipe, Process
+from time import time
+
+from .mbed_greentea_log import gt_logger
+from .mbed_test_api import (
+    RUN_HOST_TEST_POPEN_ERROR,
+    TEST_RESULT_ERROR,
+    HtrunOutputCapture,
+    HtrunOutputParser,
+    run_htrun_in_process,
+)
+
+
+class HtrunResult(object):
+    """! Result of one mbedhtrun job """
+
+    def __init__(self, returncode, output, duration, result, testcase_result, parser=None, output_path=None):
+        # Return code the mbedhtrun command line tool would have returned
+        self.returncode = returncode
+        # mbedhtrun output, only its last characters if it went to output_path
+        self.output = output
+        # Log file with the complete output if it didn't fit in memory, see HtrunOutputCapture
+        self.output_path = output_path
+        # Duration of the job in seconds
+        self.duration = duration
+        # Test result, one of mbed_test_api.TEST_RESULTS
+        self.result = result
+        # Test case results, see mbed_test_api.get_testcase_result()
+        self.testcase_result = testcase_result
+        # HtrunOutputParser fed with the output, for the other results
+        self.parser = parser
+
+    def __repr__(self):
+        return "HtrunResult(result=%r, returncode=%r, duration=%.2f)" % (
+            self.result, self.returncode, self.duration)
+
+
+def run_job(cmd, verbose, parser=None, prefix='htrun-'):
+    """! Runs one mbedhtrun command line in this process
+    @param parser HtrunOutputParser to feed with the output, by default a new one
+    @param prefix Prefix of the log file long output goes to, see HtrunOutputCapture
+    @return HtrunResult object
+    """
+    start = time()
+    if parser is None:
+        parser = HtrunOutputParser()
+    capture = HtrunOutputCapture(prefix=prefix)
+    output_path = None
+    try:
+        returncode, capture = run_htrun_in_process(cmd, verbose, parser, capture)
+        capture.close()
+        # Only the tail goes back over the pipe, the rest stays in the log file
+        output, output_path = capture.tail(), capture.path
+        result = parser.test_result()
+        testcase_result = parser.testcase_result()
+    except Exception:
+        capture.remove()
+        returncode, output = RUN_HOST_TEST_POPEN_ERROR, traceback.format_exc()
+        result, testcase_result = TEST_RESULT_ERROR, {}
+    return HtrunResult(returncode, output, time() - start, result, testcase_result, parser, output_path)
+
+
+def worker_main(conn):
+    """! Main loop of a worker process: runs jobs received on 'conn' until None """
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        cmd, verbose, parser, prefix = job
+        conn.send(run_job(cmd, verbose, parser, prefix))
+    conn.close()
+
+
+class HtrunWorker(object):
+    """! Process running mbedhtrun jobs for one device under test """
+
+    def __init__(self, name=None):
+        """! ctor
+        @param name Name of the worker process, e.g. the device's target ID
+        """
+        self.name = name
+        self.process = None
+        self.conn = None
+
+    def start(self):
+        """! Start the worker process, done by the first run() if needed """
+        self.conn, child_conn = Pipe()
+        self.process = Process(target=worker_main, args=(child_conn,), name=self.name)
+        self.process.daemon = True
+        self.process.start()
+        child_conn.close()
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def run(self, cmd, verbose=False, parser=None, prefix='htrun-'):
+        """! Run one mbedhtrun job
+        @param cmd mbedhtrun command line, e.g. ['mbedhtrun', '-d', 'E:', ...]
+        @param verbose Echo mbedhtrun output on stdout
+        @param parser HtrunOutputParser to feed with the output in the worker,
+               e.g. one writing GCOV files. The result holds the fed copy.
+        @param prefix Prefix of the log file the worker writes long output to,
+               e.g. the test name. The result's output_path names the file.
+        @return HtrunResult object
+        """
+        if not self.is_alive():
+            self.start()
+        start = time()
+        try:
+            self.conn.send((list(cmd), verbose, parser, prefix))
+            return self.conn.recv()
+        except (EOFError, IOError, OSError) as e:
+            # The worker died, e.g. killed by a signal. The next job starts a new one.
+            gt_logger.gt_log_err("mbedhtrun worker '%s' failed: %s" % (self.name, str(e)))
+            self.stop()
+            return HtrunResult(RUN_HOST_TEST_POPEN_ERROR, str(), time() - start, TEST_RESULT_ERROR, {}, parser)
+
+    def stop(self):
+        """! Stop the worker process """
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (IOError, OSError):
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -13,6 +13,11 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from abc import ABCMeta, abstractmethod
+
+import six
+
+
 def export_to_file(file_name, payload):
     """! Simple file dump used to store reports on disk
     @param file_name Report file name (with path if needed)
@@ -29,6 +34,42 @@ def export_to_file(file_name, payload):
     return result
 
 
+def export_to_results_store(file_name, test_result_ext, name=None):
+    """! Store test results in a results database, see mbed_results_store
+    @param file_name Database file name (with path if needed), created if needed
+    @param test_result_ext Extended report from Greentea
+    @param name Name of the run, e.g. a CI job ID
+    @return True if the results were stored
+    """
+    import sqlite3
+    from .mbed_results_store import ResultsStore
+    try:
+        store = ResultsStore(file_name)
+        try:
+            store.add_run(test_result_ext, name=name)
+        finally:
+            store.close()
+    except (sqlite3.Error, IOError, OSError) as e:
+        print("Exporting report to results store failed: %s" % str(e))
+        return False
+    return True
+
+
+def get_test_output(test_result):
+    """! Output of a test suite to put in a report
+    @details A test result may reference the log file of the output
+             ('single_test_output_path') and only hold its end in
+             'single_test_output', see mbed_test_api.HtrunOutputCapture.
+             The reference is then put before the output.
+    @return Output string
+    """
+    output = test_result.get('single_test_output', '')
+    path = test_result.get('single_test_output_path')
+    if path:
+        output = "[output truncated, full log in '%s']\n%s" % (path, output)
+    return output
+
+
 def exporter_json(test_result_ext, test_suite_properties=None):
     """! Exports test results to indented JSON format
     @details This is a machine friendly format
@@ -144,69 +185,79 @@ def exporter_testcase_text(test_result_ext, test_suite_properties=None):
     result_res = ' / '.join(['%s %s' % (value, key) for (key, value) in {k: v for k, v in result_testcase_dict.items() if v != 0}.items()])
     return result_pt, result_res
 
-def exporter_testcase_junit(test_result_ext, test_suite_properties=None):
-    """! Export test results in JUnit XML compliant format
-    @param test_result_ext Extended report from Greentea
-    @param test_spec Dictionary of test build names to test suite properties
-    @details This function will import junit_xml library to perform report conversion
-    @return String containing Junit XML formatted test result output
+def get_junit_test_suite(target_name, test_suite_name, test, test_suite_properties=None):
+    """! Create the JUnit test suite of one Greentea test suite
+    @param target_name Name of the build, e.g. K64F-GCC_ARM
+    @param test_suite_name Name of the test suite
+    @param test Test suite results from the extended report
+    @param test_suite_properties Dictionary of test build names to test suite properties
+    @return junit_xml TestSuite object
     """
     from junit_xml import TestSuite, TestCase
-    import sys
 
-    test_suites = []
+    tc_stdout = get_test_output(test)
 
-    for target_name in test_result_ext:
-        test_results = test_result_ext[target_name]
-        for test_suite_name in test_results:
-            test = test_results[test_suite_name]
-            tc_stdout = test['single_test_output']
+    # testcase_result stores info about test case results
+    testcase_result = test['testcase_result']
+    #   "testcase_result": {
+    #       "STRINGS004": {
+    #           "duration": 0.009999990463256836,
+    #           "time_start": 1453073018.275,
+    #           "time_end": 1453073018.285,
+    #           "result": 1
+    #       },
 
-            # testcase_result stores info about test case results
-            testcase_result = test['testcase_result']
-            #   "testcase_result": {
-            #       "STRINGS004": {
-            #           "duration": 0.009999990463256836,
-            #           "time_start": 1453073018.275,
-            #           "time_end": 1453073018.285,
-            #           "result": 1
-            #       },
+    test_cases = []
 
-            test_cases = []
+    for tc_name in sorted(testcase_result.keys()):
+        duration = testcase_result[tc_name].get('duration', 0.0)
+        utest_log = testcase_result[tc_name].get('utest_log', '')
+        result_text = testcase_result[tc_name].get('result_text', "UNDEF")
 
-            for tc_name in sorted(testcase_result.keys()):
-                duration = testcase_result[tc_name].get('duration', 0.0)
-                utest_log = testcase_result[tc_name].get('utest_log', '')
-                result_text = testcase_result[tc_name].get('result_text', "UNDEF")
+        tc_stderr = '\n'.join(utest_log)
+        tc_class = target_name + '.' + test_suite_name
 
-                tc_stderr = '\n'.join(utest_log)
-                tc_class = target_name + '.' + test_suite_name
+        if result_text == 'SKIPPED':
+            # Skipped test cases do not have logs and we do not want to put
+            # whole log inside JUNIT for skipped test case
+            tc_stderr = str()
 
-                if result_text == 'SKIPPED':
-                    # Skipped test cases do not have logs and we do not want to put
-                    # whole log inside JUNIT for skipped test case
-                    tc_stderr = str()
+        tc = TestCase(tc_name, tc_class, duration, tc_stdout, tc_stderr)
 
-                tc = TestCase(tc_name, tc_class, duration, tc_stdout, tc_stderr)
+        if result_text == 'FAIL':
+            tc.add_failure_info(result_text)
+        elif result_text == 'SKIPPED':
+            tc.add_skipped_info(result_text)
+        elif result_text != 'OK':
+            tc.add_error_info(result_text)
 
-                if result_text == 'FAIL':
-                    tc.add_failure_info(result_text)
-                elif result_text == 'SKIPPED':
-                    tc.add_skipped_info(result_text)
-                elif result_text != 'OK':
-                    tc.add_error_info(result_text)
+        test_cases.append(tc)
 
-                test_cases.append(tc)
+    ts_name = target_name
 
-            ts_name = target_name
+    if test_suite_properties is not None:
+        test_build_properties = test_suite_properties.get(target_name, None)
+    else:
+        test_build_properties = None
 
-            if test_suite_properties is not None:
-                test_build_properties = test_suite_properties.get(target_name, None)
-            else:
-                test_build_properties = None
+    return TestSuite(ts_name, test_cases, properties=test_build_properties)
 
-            ts = TestSuite(ts_name, test_cases, properties=test_build_properties)
-            test_suites.append(ts)
+def exporter_testcase_junit(test_result_ext, test_suite_properties=None):
+    """! Export test results in JUnit XML compliant format
+    @param test_result_ext Extended report from Greentea
+    @param test_spec Dictionary of test build names to test suite properties
+    @details This function will import junit_xml library to perform report conversion
+    @return String containing Junit XML formatted test result output
+    """
+    from junit_xml import TestSuite
+
+    test_suites = []
+
+    for target_name in test_result_ext:
+        test_results = test_result_ext[target_name]
+        for test_suite_name in test_results:
+            test = test_results[test_suite_name]
+            test_suites.append(get_junit_test_suite(target_name, test_suite_name, test, test_suite_properties))
 
     return TestSuite.to_xml_string(test_suites)
 
@@ -585,7 +636,7 @@ def get_result_overlay_dropdowns(result_div_id, test_results):
     result_output_div_id = "%s_output" % result_div_id
     result_output_dropdown = get_dropdown_html(
         result_output_div_id, "Test Output",
-        test_results['single_test_output'].rstrip("\n"),
+        get_test_output(test_results).rstrip("\n"),
         output_text=True
     )
 
@@ -638,20 +689,37 @@ def get_result_overlay(result_div_id, test_name, platform, toolchain, test_resul
                                test_results['image_path'],
                                overlay_dropdowns)
 
-def exporter_html(test_result_ext, test_suite_properties=None):
-    """! Export test results as HTML
-    @param test_result_ext Extended report from Greentea
-    @details This function will create a user friendly HTML report
-    @return String containing the HTML output
+def get_platform_toolchain(target_name):
+    """! Split a build name into platform and toolchain
+    @details Format of string is <PLATFORM>-<TOOLCHAIN>
+             <PLATFORM> can however contain '-' such as "frdm-k64f"
+             <TOOLCHAIN> is split with '_' fortunately, as in "gcc_arm"
+    @return Tuple of (platform, toolchain)
+    """
+    toolchain = target_name.split('-')[-1]
+    platform = target_name.replace('-%s'% toolchain, '')
+    return platform, toolchain
+
+def get_not_ran_test_results(platform):
+    """! Results shown for a test that was not run on a platform """
+    return {
+        'single_test_result': 'NOT_RAN',
+        'elapsed_time': 0.0,
+        'build_path': 'N/A',
+        'build_path_abs': 'N/A',
+        'copy_method': 'N/A',
+        'image_path': 'N/A',
+        'single_test_output': 'N/A',
+        'platform_name': platform,
+        'test_bin_name': 'N/A',
+        'testcase_result': {}
+    }
+
+def get_platform_header_rows(platforms_toolchains):
+    """! Get the HTML for the platform and toolchain header rows of the results table
+    @param platforms_toolchains List of (platform, list of toolchains) tuples
+    @return String containing the HTML rows
     """
-
-    result_cell_template = """
-                <td>
-                    <div class="result %s" onclick="toggleOverlay('%s')">
-                        <center>%s  -  %s&#37; (%s/%s)</center>
-                        %s
-                    </div>
-                </td>"""
     platform_template = """<tr>
                 <td rowspan="2" class="level_header">
                     <center>Tests</center>
@@ -660,16 +728,79 @@ def exporter_html(test_result_ext, test_suite_properties=None):
             <tr>
                 %s
             </tr>"""
+    platform_cell_template = """
+                <td colspan="%s" class="level_header">
+                    <center>%s</center>
+                </td>"""
+    center_cell_template = """
+                <td class="level_header">
+                    <center>%s</center>
+                </td>"""
+
+    platform_row = ""
+    toolchain_row = ""
+    for platform, toolchains in platforms_toolchains:
+        platform_row += platform_cell_template % (len(toolchains), platform)
+        for toolchain in toolchains:
+            toolchain_row += center_cell_template % toolchain
+    return platform_template % (platform_row, toolchain_row)
+
+def get_result_cell(test_name, platform, toolchain, test_results):
+    """! Get the HTML for the table cell of a test result, with its overlay
+    @param test_name The name of the test
+    @param platform The name of the platform the test was performed on
+    @param toolchain The name of toolchain the test was performed on
+    @param test_results The results of the test
+    @return String containing the HTML table cell
+    """
+    result_cell_template = """
+                <td>
+                    <div class="result %s" onclick="toggleOverlay('%s')">
+                        <center>%s  -  %s&#37; (%s/%s)</center>
+                        %s
+                    </div>
+                </td>"""
+
+    test_results['single_test_passes'] = 0
+    test_results['single_test_count'] = 0
+    result_div_id = "target_%s_toolchain_%s_test_%s" % (platform, toolchain, test_name.replace('-', '_'))
+
+    result_overlay = get_result_overlay(result_div_id,
+                                        test_name,
+                                        platform,
+                                        toolchain,
+                                        test_results)
+
+    # Loop through the test cases and count the passes and failures
+    for index, (testcase_result_name, testcase_result) in enumerate(test_results['testcase_result'].items()):
+        test_results['single_test_passes'] += testcase_result['passed']
+        test_results['single_test_count'] += 1
+
+    result_class = get_result_colour_class(test_results['single_test_result'])
+    try:
+        percent_pass = int((test_results['single_test_passes']*100.0)/test_results['single_test_count'])
+    except ZeroDivisionError:
+        percent_pass = 100
+    return result_cell_template % (result_class,
+                                   result_div_id,
+                                   test_results['single_test_result'],
+                                   percent_pass,
+                                   test_results['single_test_passes'],
+                                   test_results['single_test_count'],
+                                   result_overlay)
+
+def exporter_html(test_result_ext, test_suite_properties=None):
+    """! Export test results as HTML
+    @param test_result_ext Extended report from Greentea
+    @details This function will create a user friendly HTML report
+    @return String containing the HTML output
+    """
 
     unique_test_names = set()
     platforms_toolchains = {}
     # Populate a set of all of the unique tests
     for platform_toolchain, test_list in test_result_ext.items():
-        # Format of string is <PLATFORM>-<TOOLCHAIN>
-        # <PLATFORM> can however contain '-' such as "frdm-k64f"
-        # <TOOLCHAIN> is split with '_' fortunately, as in "gcc_arm"
-        toolchain = platform_toolchain.split('-')[-1]
-        platform = platform_toolchain.replace('-%s'% toolchain, '')
+        platform, toolchain = get_platform_toolchain(platform_toolchain)
         if platform in platforms_toolchains:
             platforms_toolchains[platform].append(toolchain)
         else:
@@ -678,24 +809,7 @@ def exporter_html(test_result_ext, test_suite_properties=None):
         for test_name in test_list:
             unique_test_names.add(test_name)
 
-    table = ""
-    platform_row = ""
-    toolchain_row = ""
-
-    platform_cell_template = """
-                <td colspan="%s" class="level_header">
-                    <center>%s</center>
-                </td>"""
-    center_cell_template = """
-                <td class="level_header">
-                    <center>%s</center>
-                </td>"""
-
-    for platform, toolchains in platforms_toolchains.items():
-        platform_row += platform_cell_template % (len(toolchains), platform)
-        for toolchain in toolchains:
-            toolchain_row += center_cell_template % toolchain
-    table += platform_template % (platform_row, toolchain_row)
+    table = get_platform_header_rows(platforms_toolchains.items())
 
     test_cell_template = """
                 <td class="test-column">%s</td>"""
@@ -713,46 +827,9 @@ def exporter_html(test_result_ext, test_suite_properties=None):
                 if test_name in test_result_ext["%s-%s" % (platform, toolchain)]:
                     test_results = test_result_ext["%s-%s" % (platform, toolchain)][test_name]
                 else:
-                    test_results = {
-                        'single_test_result': 'NOT_RAN',
-                        'elapsed_time': 0.0,
-                        'build_path': 'N/A',
-                        'build_path_abs': 'N/A',
-                        'copy_method': 'N/A',
-                        'image_path': 'N/A',
-                        'single_test_output': 'N/A',
-                        'platform_name': platform,
-                        'test_bin_name': 'N/A',
-                        'testcase_result': {}
-                    }
+                    test_results = get_not_ran_test_results(platform)
 
-                test_results['single_test_passes'] = 0
-                test_results['single_test_count'] = 0
-                result_div_id = "target_%s_toolchain_%s_test_%s" % (platform, toolchain, test_name.replace('-', '_'))
-
-                result_overlay = get_result_overlay(result_div_id,
-                                                    test_name,
-                                                    platform,
-                                                    toolchain,
-                                                    test_results)
-
-                # Loop through the test cases and count the passes and failures
-                for index, (testcase_result_name, testcase_result) in enumerate(test_results['testcase_result'].items()):
-                    test_results['single_test_passes'] += testcase_result['passed']
-                    test_results['single_test_count'] += 1
-
-                result_class = get_result_colour_class(test_results['single_test_result'])
-                try:
-                    percent_pass = int((test_results['single_test_passes']*100.0)/test_results['single_test_count'])
-                except ZeroDivisionError:
-                    percent_pass = 100
-                this_row += result_cell_template % (result_class,
-                                                    result_div_id,
-                                                    test_results['single_test_result'],
-                                                    percent_pass,
-                                                    test_results['single_test_passes'],
-                                                    test_results['single_test_count'],
-                                                    result_overlay)
+                this_row += get_result_cell(test_name, platform, toolchain, test_results)
 
         table += row_template % this_row
 
@@ -807,3 +884,281 @@ def exporter_memory_metrics_csv(test_result_ext, test_suite_properties=None):
     column_values = [str(metrics_report[x]) for x in column_names]
 
     return "%s\n%s" % (','.join(column_names), ','.join(column_values))
+
+
+class ReportWriter(six.with_metaclass(ABCMeta, object)):
+    """! Writes a report file one test suite at a time
+
+    @details The exporter_*() functions need the results of the whole test
+             run and build the report in memory. A report writer renders
+             each test suite when it is added, e.g. as soon as it completes,
+             and spools the rendered text to a temporary file. close() writes
+             the report file from the spool, so only an index of the test
+             suites stays in memory.
+
+             Test suites can be added from several threads. Rendering runs
+             outside of the writer's lock.
+
+                 with JUnitReportWriter('report.xml') as writer:
+                     writer.add_test_suite('K64F-GCC_ARM', 'tests-basic', test)
+    """
+
+    def __init__(self, file_name, test_suite_properties=None):
+        """! ctor
+        @param file_name Report file name (with path if needed)
+        @param test_suite_properties Dictionary of test build names to test suite properties
+        """
+        import tempfile
+        import threading
+        self.file_name = file_name
+        self.test_suite_properties = test_suite_properties
+        self.spool = tempfile.TemporaryFile()
+        # List of (target_name, test_suite_name, offset, length) in the spool
+        self.fragments = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    @abstractmethod
+    def render_test_suite(self, target_name, test_suite_name, test):
+        """! Render the report text of one test suite
+        @return Text stored in the spool
+        """
+
+    def add_summary(self, target_name, test_suite_name, test):
+        """! Keep what the report needs besides the rendered text, called with the lock held """
+        pass
+
+    @abstractmethod
+    def write_report(self, f):
+        """! Write the report, reading the test suites from the spool with fragment() """
+
+    def add_test_suite(self, target_name, test_suite_name, test):
+        """! Add the results of a test suite
+        @param target_name Name of the build, e.g. K64F-GCC_ARM
+        @param test_suite_name Name of the test suite
+        @param test Test suite results, as in the extended report
+        """
+        payload = self.render_test_suite(target_name, test_suite_name, test).encode('utf-8')
+        with self.lock:
+            self.spool.seek(0, 2)
+            offset = self.spool.tell()
+            self.spool.write(payload)
+            self.fragments.append((target_name, test_suite_name, offset, len(payload)))
+            self.add_summary(target_name, test_suite_name, test)
+
+    def add_test_results(self, test_result_ext):
+        """! Add all test suites of an extended report """
+        for target_name in test_result_ext:
+            for test_suite_name in test_result_ext[target_name]:
+                self.add_test_suite(target_name, test_suite_name, test_result_ext[target_name][test_suite_name])
+
+    def fragment(self, index):
+        """! Rendered text of a test suite, read back from the spool """
+        _, _, offset, length = self.fragments[index]
+        self.spool.seek(offset)
+        return self.spool.read(length).decode('utf-8')
+
+    def close(self):
+        """! Write the report file
+        @return True if report save was successful
+        """
+        import io
+        with self.lock:
+            if self.closed:
+                return True
+            self.closed = True
+            result = True
+            try:
+                with io.open(self.file_name, 'w', encoding='utf-8') as f:
+                    self.write_report(f)
+            except IOError as e:
+                print("Exporting report to file failed: %s" % str(e))
+                result = False
+            self.spool.close()
+            return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class JsonReportWriter(ReportWriter):
+    """! Writes the report of exporter_json() """
+
+    def render_test_suite(self, target_name, test_suite_name, test):
+        import json
+        # Test suites are nested two levels deep in the report
+        return json.dumps(test, indent=4).replace('\n', '\n' + ' ' * 8)
+
+    def write_report(self, f):
+        import json
+        targets = []
+        by_target = {}
+        for index, (target_name, _, _, _) in enumerate(self.fragments):
+            if target_name not in by_target:
+                targets.append(target_name)
+                by_target[target_name] = []
+            by_target[target_name].append(index)
+
+        if not targets:
+            f.write(u'{}')
+            return
+        f.write(u'{')
+        for target_index, target_name in enumerate(targets):
+            f.write(u'%s\n    %s: {' % (u',' if target_index else u'', json.dumps(target_name)))
+            for suite_index, index in enumerate(by_target[target_name]):
+                f.write(u'%s\n        %s: ' % (u',' if suite_index else u'', json.dumps(self.fragments[index][1])))
+                f.write(self.fragment(index))
+            f.write(u'\n    }')
+        f.write(u'\n}')
+
+
+class JUnitReportWriter(ReportWriter):
+    """! Writes the report of exporter_testcase_junit(), without pretty printing """
+
+    def __init__(self, file_name, test_suite_properties=None):
+        ReportWriter.__init__(self, file_name, test_suite_properties)
+        # Totals of the <testsuites> element
+        self.totals = {'disabled': 0, 'errors': 0, 'failures': 0, 'tests': 0, 'time': 0.0}
+
+    def render_test_suite(self, target_name, test_suite_name, test):
+        import re
+        import xml.etree.ElementTree as ET
+        ts = get_junit_test_suite(target_name, test_suite_name, test, self.test_suite_properties)
+        ts_xml = ts.build_xml_doc()
+        # Non-ASCII characters become character references
+        xml_string = ET.tostring(ts_xml).decode('ascii')
+        # Control characters are not allowed in XML 1.0
+        xml_string = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '', xml_string)
+        with self.lock:
+            for key in ['disabled', 'errors', 'failures', 'tests']:
+                self.totals[key] += int(ts_xml.get(key, 0))
+            self.totals['time'] += float(ts_xml.get('time', 0))
+        return xml_string
+
+    def write_report(self, f):
+        attributes = ' '.join('%s="%s"' % (key, self.totals[key]) for key in sorted(self.totals))
+        f.write(u'<?xml version="1.0" ?>\n<testsuites %s>\n' % attributes)
+        for index in range(len(self.fragments)):
+            f.write(self.fragment(index))
+            f.write(u'\n')
+        f.write(u'</testsuites>\n')
+
+
+class HtmlReportWriter(ReportWriter):
+    """! Writes the report of exporter_html() """
+
+    def __init__(self, file_name, test_suite_properties=None):
+        ReportWriter.__init__(self, file_name, test_suite_properties)
+        # List of (platform, list of toolchains), in order of appearance
+        self.platforms_toolchains = []
+        self.test_names = set()
+        # Index of the fragment of each (test name, build name)
+        self.cells = {}
+
+    def render_test_suite(self, target_name, test_suite_name, test):
+        platform, toolchain = get_platform_toolchain(target_name)
+        # get_result_cell() adds the pass counts to the results
+        return get_result_cell(test_suite_name, platform, toolchain, dict(test))
+
+    def add_summary(self, target_name, test_suite_name, test):
+        platform, toolchain = get_platform_toolchain(target_name)
+        for known_platform, toolchains in self.platforms_toolchains:
+            if known_platform == platform:
+                if toolchain not in toolchains:
+                    toolchains.append(toolchain)
+                break
+        else:
+            self.platforms_toolchains.append((platform, [toolchain]))
+        self.test_names.add(test_suite_name)
+        self.cells[(test_suite_name, target_name)] = len(self.fragments) - 1
+
+    def write_report(self, f):
+        marker = u'\x00table\x00'
+        columns = sum(len(toolchains) for _, toolchains in self.platforms_toolchains)
+        head, tail = (html_template % (get_result_colour_class_css(), columns, marker)).split(marker)
+        f.write(head)
+        f.write(get_platform_header_rows(self.platforms_toolchains))
+
+        for test_name in sorted(self.test_names):
+            f.write(u"""
+            <tr>
+                <td class="test-column">%s</td>""" % test_name)
+            for platform, toolchains in self.platforms_toolchains:
+                for toolchain in toolchains:
+                    index = self.cells.get((test_name, "%s-%s" % (platform, toolchain)))
+                    if index is not None:
+                        f.write(self.fragment(index))
+                    else:
+                        f.write(get_result_cell(test_name, platform, toolchain, get_not_ran_test_results(platform)))
+            f.write(u"""
+            </tr>""")
+        f.write(tail)
+
+
+class ReportWriterGroup(object):
+    """! Feeds test suites to several report writers in parallel
+
+    @details Each writer renders the test suites it is given in a thread of
+             its own, so adding a test suite doesn't wait for the rendering.
+    """
+
+    def __init__(self, writers):
+        """! ctor
+        @param writers List of ReportWriter objects
+        """
+        import sys
+        import threading
+        if sys.version_info > (3, 0):
+            from queue import Queue
+        else:
+            from Queue import Queue
+        self.writers = writers
+        self.queues = []
+        self.threads = []
+        for writer in writers:
+            queue = Queue()
+            thread = threading.Thread(target=self.__writer_loop, args=(writer, queue))
+            thread.daemon = True
+            thread.start()
+            self.queues.append(queue)
+            self.threads.append(thread)
+
+    def __writer_loop(self, writer, queue):
+        while True:
+            item = queue.get()
+            if item is None:
+                break
+            try:
+                writer.add_test_suite(*item)
+            except Exception as e:
+                print("Adding test suite '%s' to report '%s' failed: %s" % (item[1], writer.file_name, str(e)))
+
+    def add_test_suite(self, target_name, test_suite_name, test):
+        """! Add the results of a test suite to all reports """
+        for queue in self.queues:
+            queue.put((target_name, test_suite_name, test))
+
+    def add_test_results(self, test_result_ext):
+        """! Add all test suites of an extended report to all reports """
+        for target_name in test_result_ext:
+            for test_suite_name in test_result_ext[target_name]:
+                self.add_test_suite(target_name, test_suite_name, test_result_ext[target_name][test_suite_name])
+
+    def close(self):
+        """! Wait for the writers to render all test suites and write the report files
+        @return True if all reports were saved
+        """
+        for queue in self.queues:
+            queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        return all([writer.close() for writer in self.writers])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
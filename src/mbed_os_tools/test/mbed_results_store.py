@@ -0,0 +1,270 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""! Store of test results across runs
+
+Each greentea run is stored as one row per test case in a SQLite table,
+with the platform, toolchain, durations, result and memory metrics of its
+test suite as columns. Failure counts by run and platform, and duration
+totals by test case, are kept up to date alongside so queries over the
+whole history don't read every test case row:
+
+    store = ResultsStore()
+    store.add_run(test_result_ext)
+    store.failure_rate_by_platform(last_runs=50)
+    store.slowest_testcases(limit=10)
+
+test_result_ext is the dictionary greentea passes to the report exporters,
+see mbed_report_api. mbedgt --report-results-store adds each run.
+"""
+
+import os
+from time import time
+
+from appdirs import user_data_dir
+
+from .mbed_sqlite_store import SqliteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS testcases (
+    run_id INTEGER NOT NULL,
+    build TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    toolchain TEXT NOT NULL,
+    test_suite TEXT NOT NULL,
+    testcase TEXT NOT NULL,
+    suite_result TEXT,
+    suite_duration REAL,
+    result TEXT,
+    passed INTEGER,
+    failed INTEGER,
+    duration REAL,
+    copy_method TEXT,
+    max_heap INTEGER,
+    reserved_heap INTEGER,
+    max_stack_size INTEGER,
+    max_stack_usage INTEGER,
+    max_stack_usage_total INTEGER,
+    reserved_stack_total INTEGER
+);
+CREATE INDEX IF NOT EXISTS testcases_run ON testcases (run_id, platform, result);
+CREATE INDEX IF NOT EXISTS testcases_suite ON testcases (test_suite, run_id);
+CREATE TABLE IF NOT EXISTS run_platforms (
+    run_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    failed INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (run_id, platform)
+);
+CREATE TABLE IF NOT EXISTS testcase_totals (
+    test_suite TEXT NOT NULL,
+    testcase TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    total_duration REAL NOT NULL,
+    max_duration REAL NOT NULL,
+    PRIMARY KEY (test_suite, testcase, platform)
+);
+"""
+
+COLUMNS = [
+    'run_id', 'build', 'platform', 'toolchain', 'test_suite', 'testcase',
+    'suite_result', 'suite_duration', 'result', 'passed', 'failed', 'duration',
+    'copy_method', 'max_heap', 'reserved_heap', 'max_stack_size',
+    'max_stack_usage', 'max_stack_usage_total', 'reserved_stack_total',
+]
+
+# Test case results not counted as failures
+PASSING_RESULTS = ('OK', 'SKIPPED')
+
+
+def get_testcase_rows(run_id, test_result_ext):
+    """! Flatten an extended report into test case rows
+    @details Test suites without test cases get one row with an empty test case name
+    @return List of tuples with the values of COLUMNS
+    """
+    from .mbed_report_api import get_platform_toolchain
+
+    rows = []
+    for build, suites in test_result_ext.items():
+        platform, toolchain = get_platform_toolchain(build)
+        for test_suite, suite in suites.items():
+            memory_metrics = suite.get('memory_metrics') or {}
+            stack = memory_metrics.get('thread_stack_summary') or {}
+            suite_values = (
+                suite.get('single_test_result'),
+                suite.get('elapsed_time'),
+            )
+            memory_values = (
+                suite.get('copy_method'),
+                memory_metrics.get('max_heap'),
+                memory_metrics.get('reserved_heap'),
+                stack.get('max_stack_size'),
+                stack.get('max_stack_usage'),
+                stack.get('max_stack_usage_total'),
+                stack.get('reserved_stack_total'),
+            )
+            key = (run_id, build, suite.get('platform_name') or platform, toolchain, test_suite)
+            testcases = dict(
+                (testcase, tc) for testcase, tc in (suite.get('testcase_result') or {}).items()
+                if isinstance(tc, dict))
+            if not testcases:
+                rows.append(key + (str(),) + suite_values + (suite.get('single_test_result'), None, None, suite.get('elapsed_time')) + memory_values)
+            for testcase, tc in testcases.items():
+                rows.append(key + (testcase,) + suite_values + (
+                    tc.get('result_text'),
+                    tc.get('passed'),
+                    tc.get('failed'),
+                    tc.get('duration'),
+                ) + memory_values)
+    return rows
+
+
+class ResultsStore(SqliteStore):
+    """! SQLite store of test case results of greentea runs
+
+    @details Queries over the last runs only read the rows of these runs,
+             through the index on run_id. Queries over all runs read the
+             run_platforms and testcase_totals aggregates.
+    """
+
+    SCHEMA = SCHEMA
+
+    DEFAULT_PATH = os.path.join(user_data_dir('mbedgt'), 'results.db')
+
+    def add_run(self, test_result_ext, name=None, started=None):
+        """! Store the results of a greentea run
+        @param test_result_ext Test results, as passed to the report exporters
+        @param name Name of the run, e.g. a CI job ID
+        @param started Start time of the run, defaults to now
+        @return ID of the run
+        """
+        with self.connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO runs (name, started) VALUES (?, ?)',
+                (name, started if started is not None else time()))
+            run_id = cursor.lastrowid
+            rows = get_testcase_rows(run_id, test_result_ext)
+            conn.executemany(
+                'INSERT INTO testcases (%s) VALUES (%s)' % (', '.join(COLUMNS), ', '.join('?' * len(COLUMNS))),
+                rows)
+            self.__add_totals(conn, run_id, rows)
+        return run_id
+
+    @staticmethod
+    def __add_totals(conn, run_id, rows):
+        """! Update the aggregates with the test case rows of a run """
+        platforms = {}
+        durations = {}
+        for row in rows:
+            record = dict(zip(COLUMNS, row))
+            counts = platforms.setdefault(record['platform'], [0, 0])
+            counts[0] += record['result'] not in PASSING_RESULTS
+            counts[1] += 1
+            if record['duration'] is not None:
+                key = (record['test_suite'], record['testcase'], record['platform'])
+                durations.setdefault(key, []).append(record['duration'])
+        conn.executemany(
+            'INSERT INTO run_platforms VALUES (?, ?, ?, ?)',
+            [(run_id, platform, failed, total) for platform, (failed, total) in platforms.items()])
+        # No UPSERT, SQLite bundled with older Pythons doesn't support it
+        conn.executemany(
+            'INSERT OR IGNORE INTO testcase_totals VALUES (?, ?, ?, 0, 0.0, 0.0)',
+            list(durations))
+        conn.executemany(
+            'UPDATE testcase_totals SET count = count + ?, total_duration = total_duration + ?, '
+            'max_duration = MAX(max_duration, ?) WHERE test_suite = ? AND testcase = ? AND platform = ?',
+            [(len(values), sum(values), max(values)) + key for key, values in durations.items()])
+
+    def query(self, sql, params=()):
+        """! Run any query on the store
+        @return List of rows
+        """
+        return self.connection().execute(sql, params).fetchall()
+
+    def runs(self, limit=None):
+        """! Most recent runs, newest first
+        @return List of (id, name, started) tuples
+        """
+        sql = 'SELECT id, name, started FROM runs ORDER BY id DESC'
+        if limit is not None:
+            return self.query(sql + ' LIMIT ?', (limit,))
+        return self.query(sql)
+
+    def __first_run(self, last_runs):
+        """! ID of the first run of the last 'last_runs' runs, 0 for all runs """
+        if last_runs is None:
+            return 0
+        row = self.query('SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?', (last_runs - 1,))
+        return row[0][0] if row else 0
+
+    def failure_rate_by_platform(self, last_runs=None):
+        """! Share of failed test cases by platform
+        @param last_runs Only use the last runs, None uses all runs
+        @return List of (platform, failed, total, rate) tuples, highest rate first
+        """
+        rows = self.query(
+            'SELECT platform, SUM(failed), SUM(total) FROM run_platforms '
+            'WHERE run_id >= ? GROUP BY platform',
+            (self.__first_run(last_runs),))
+        result = [(platform, failed, total, float(failed) / total) for platform, failed, total in rows]
+        return sorted(result, key=lambda row: (-row[3], row[0]))
+
+    def slowest_testcases(self, limit=10, last_runs=None, platform=None):
+        """! Test cases with the longest average duration
+        @param last_runs Only use the last runs, None uses all runs
+        @param platform Only use this platform, None uses all platforms
+        @return List of (test_suite, testcase, platform, average, maximum, count) tuples
+        """
+        if last_runs is None:
+            sql = ('SELECT test_suite, testcase, platform, total_duration / count, max_duration, count '
+                   'FROM testcase_totals WHERE 1')
+            params = []
+            if platform is not None:
+                sql += ' AND platform = ?'
+                params.append(platform)
+            sql += ' ORDER BY total_duration / count DESC LIMIT ?'
+            params.append(limit)
+            return self.query(sql, params)
+
+        # Without INDEXED BY, SQLite may pick testcases_suite for the GROUP BY and read every row
+        sql = ('SELECT test_suite, testcase, platform, AVG(duration), MAX(duration), COUNT(*) '
+               'FROM testcases INDEXED BY testcases_run WHERE run_id >= ? AND duration IS NOT NULL')
+        params = [self.__first_run(last_runs)]
+        if platform is not None:
+            sql += ' AND platform = ?'
+            params.append(platform)
+        sql += ' GROUP BY test_suite, testcase, platform ORDER BY AVG(duration) DESC LIMIT ?'
+        params.append(limit)
+        return self.query(sql, params)
+
+    def memory_metrics(self, test_suite, platform=None, last_runs=None):
+        """! Memory metrics of a test suite, one row per run and build
+        @return List of (run_id, build, max_heap, reserved_heap, max_stack_size,
+                max_stack_usage, max_stack_usage_total, reserved_stack_total) tuples, oldest first
+        """
+        sql = ('SELECT DISTINCT run_id, build, max_heap, reserved_heap, max_stack_size, '
+               'max_stack_usage, max_stack_usage_total, reserved_stack_total '
+               'FROM testcases WHERE test_suite = ? AND run_id >= ?')
+        params = [test_suite, self.__first_run(last_runs)]
+        if platform is not None:
+            sql += ' AND platform = ?'
+            params.append(platform)
+        return self.query(sql + ' ORDER BY run_id, build', params)
@@ -0,0 +1,67 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""! SQLite database shared by the threads of a greentea run
+
+Base class of DurationStore and ResultsStore, see mbed_duration_store and
+mbed_results_store.
+"""
+
+import os
+import sqlite3
+import threading
+
+
+class SqliteStore(object):
+    """! SQLite database with one connection per thread
+
+    @details The database is in write-ahead log mode, so threads writing to
+             it, e.g. one per device under test, don't block readers.
+             Subclasses set SCHEMA and DEFAULT_PATH.
+    """
+
+    # SQL script creating the tables, run when the store is opened
+    SCHEMA = str()
+
+    DEFAULT_PATH = None
+
+    def __init__(self, path=None):
+        """! ctor
+        @param path Database file, created if needed. Defaults to DEFAULT_PATH
+        """
+        self.path = path or self.DEFAULT_PATH
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def connection(self):
+        """! Connection of the calling thread """
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    def close(self):
+        """! Close the connection of the calling thread """
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
@@ -15,15 +15,19 @@
 
 from past.builtins import basestring
 
+import io
 import re
 import os
 import sys
 import json
 import string
+import tempfile
+import threading
+from collections import deque
 from subprocess import Popen, PIPE, STDOUT
 
 from .cmake_handlers import list_binaries_for_builds, list_binaries_for_targets
-from .mbed_coverage_api import coverage_dump_file, coverage_pack_hex_payload
+from .mbed_coverage_api import coverage_dump_hex_payload
 from .mbed_greentea_log import gt_logger
 from .mbed_yotta_api import get_test_spec_from_yt_module
 from .tests_spec import TestSpec
@@ -112,48 +116,308 @@ def run_command(cmd):
         return None
     return p
 
-def run_htrun(cmd, verbose):
-    # detect overflow when running tests
-    htrun_output = str()
+class HtrunOutputCapture(object):
+    """! Output of one mbedhtrun run with bounded memory use
+
+    @details Output is kept in memory up to max_memory characters. Beyond
+             that, all output goes to a temporary log file (UTF-8, so it can
+             be read back or mmap'ed) and only the last tail_size characters
+             stay in memory.
+
+             Results can reference the log instead of embedding the whole
+             output: store tail() as 'single_test_output' and path as
+             'single_test_output_path', see mbed_report_api.get_test_output().
+    """
+
+    MAX_MEMORY = 1024 * 1024
+    TAIL_SIZE = 64 * 1024
+
+    def __init__(self, max_memory=MAX_MEMORY, tail_size=TAIL_SIZE, prefix='htrun-'):
+        """! ctor
+        @param max_memory Characters kept in memory before spilling to a file, None never spills
+        @param tail_size Characters kept in memory after spilling
+        @param prefix Prefix of the log file name, e.g. the test name
+        """
+        self.max_memory = max_memory
+        self.tail_size = tail_size
+        self.prefix = prefix
+        self.chunks = deque()
+        self.size = 0
+        # Log file, once spilled
+        self.path = None
+        self.file = None
+
+    @classmethod
+    def from_log(cls, tail, path, tail_size=TAIL_SIZE):
+        """! Capture of output collected in another process, e.g. by an HtrunWorker
+        @param tail Output kept in memory, its last characters if it was spilled
+        @param path Log file holding the whole output, None if it wasn't spilled
+        """
+        capture = cls(tail_size=tail_size)
+        capture.chunks.append(tail)
+        capture.size = len(tail)
+        capture.path = path
+        return capture
+
+    def write(self, text):
+        self.chunks.append(text)
+        self.size += len(text)
+        if self.file is None:
+            if self.max_memory is None or self.size <= self.max_memory:
+                return
+            self.__spill()
+        else:
+            self.file.write(text)
+        # Keep the chunks ending the output, at least tail_size characters
+        while len(self.chunks) > 1 and self.size - len(self.chunks[0]) >= self.tail_size:
+            self.size -= len(self.chunks.popleft())
+
+    def __spill(self):
+        fd, self.path = tempfile.mkstemp(prefix=self.prefix, suffix='.log')
+        # newline='' keeps the output as it is, e.g. no '\r\n' on Windows
+        self.file = io.open(fd, 'w', encoding='utf-8', errors='replace', newline='')
+        self.file.write(u''.join(self.chunks))
+
+    def spilled(self):
+        return self.path is not None
+
+    def tail(self):
+        """! Last tail_size characters of the output, or all of it if not spilled """
+        text = ''.join(self.chunks)
+        if self.path is None:
+            return text
+        return text[-self.tail_size:]
+
+    def getvalue(self):
+        """! Whole output, read back from the log file if spilled """
+        if self.path is None:
+            return ''.join(self.chunks)
+        self.flush()
+        with io.open(self.path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def feed(self, parser, chunk_size=1024 * 1024):
+        """! Feed the whole output to a HtrunOutputParser, a chunk at a time """
+        if self.path is None:
+            parser.feed(''.join(self.chunks))
+            return
+        self.flush()
+        with io.open(self.path, 'r', encoding='utf-8', newline='') as f:
+            for chunk in iter(lambda: f.read(chunk_size), ''):
+                parser.feed(chunk)
+
+    def flush(self):
+        if self.file is not None and not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        """! Close the log file, it stays on disk """
+        if self.file is not None and not self.file.closed:
+            self.file.close()
+
+    def remove(self):
+        """! Close and delete the log file """
+        self.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+def log_htrun_line(decoded_line, verbose):
+    """! Reports a line of mbedhtrun output the way run_htrun() does
+    @param decoded_line Line of output, with its line ending
+    @param verbose Echo the line on stdout
+    """
+    htrun_failure_line = re.compile('\[RXD\] (:\d+::FAIL: .*)')
+
+    # When dumping output to file both \r and \n will be a new line
+    # To avoid this "extra new-line" we only use \n at the end
+
+    test_error = htrun_failure_line.search(decoded_line)
+    if test_error:
+        gt_logger.gt_log_err(test_error.group(1))
+
+    if verbose:
+        output = decoded_line.rstrip() + '\n'
+        try:
+            # Try to output decoded unicode. Should be fine in most Python 3
+            # environments.
+            sys.stdout.write(output)
+        except UnicodeEncodeError:
+            try:
+                # Try to encode to unicode bytes and let the terminal handle
+                # the decoding. Some Python 2 and OS combinations handle this
+                # gracefully.
+                sys.stdout.write(output.encode("utf-8"))
+            except TypeError:
+                # Fallback to printing just ascii characters
+                sys.stdout.write(output.encode("ascii", "replace").decode("ascii"))
+        sys.stdout.flush()
+
+def run_htrun(cmd, verbose, parser=None, capture=None):
+    """! Runs mbedhtrun and collects its output
+    @param parser HtrunOutputParser fed with the output while mbedhtrun runs
+    @param capture HtrunOutputCapture collecting the output, by default one keeping all of it in memory
+    @return Tuple of mbedhtrun return code and the HtrunOutputCapture holding
+            its output, use getvalue() for the text. The return code is
+            RUN_HOST_TEST_POPEN_ERROR if mbedhtrun could not be started.
+    """
+    htrun_output = capture if capture is not None else HtrunOutputCapture(max_memory=None)
     # run_command will return None if process can't be opened (Issue #134)
     p = run_command(cmd)
     if not p:
         # int value > 0 notifies caller that starting of host test process failed
-        return RUN_HOST_TEST_POPEN_ERROR
-
-    htrun_failure_line = re.compile('\[RXD\] (:\d+::FAIL: .*)')
+        htrun_output.close()
+        return RUN_HOST_TEST_POPEN_ERROR, htrun_output
 
     for line in iter(p.stdout.readline, b''):
         decoded_line = line.decode("utf-8", "replace")
-        htrun_output += decoded_line
-        # When dumping output to file both \r and \n will be a new line
-        # To avoid this "extra new-line" we only use \n at the end
-
-        test_error = htrun_failure_line.search(decoded_line)
-        if test_error:
-            gt_logger.gt_log_err(test_error.group(1))
-
-        if verbose:
-            output = decoded_line.rstrip() + '\n'
-            try:
-                # Try to output decoded unicode. Should be fine in most Python 3
-                # environments.
-                sys.stdout.write(output)
-            except UnicodeEncodeError:
-                try:
-                    # Try to encode to unicode bytes and let the terminal handle
-                    # the decoding. Some Python 2 and OS combinations handle this
-                    # gracefully.
-                    sys.stdout.write(output.encode("utf-8"))
-                except TypeError:
-                    # Fallback to printing just ascii characters
-                    sys.stdout.write(output.encode("ascii", "replace").decode("ascii"))
-            sys.stdout.flush()
+        htrun_output.write(decoded_line)
+        if parser is not None:
+            parser.feed(decoded_line)
+        log_htrun_line(decoded_line, verbose)
 
     # Check if process was terminated by signal
     returncode = p.wait()
+    htrun_output.close()
     return returncode, htrun_output
 
+class HtrunOutput(object):
+    """! File-like object collecting the output of an in-process mbedhtrun run """
+    def __init__(self, verbose, stdout, parser=None, capture=None):
+        self.verbose = verbose
+        self.stdout = stdout
+        self.parser = parser
+        self.capture = capture if capture is not None else HtrunOutputCapture(max_memory=None)
+        self.partial = str()
+        self.lock = threading.RLock()
+        # Set while a thread reports a line, its own output goes to self.stdout
+        self.local = threading.local()
+
+    def write(self, text):
+        if getattr(self.local, 'echo', False):
+            self.stdout.write(text)
+            return
+        if isinstance(text, bytes) and not isinstance(text, str):
+            text = text.decode("utf-8", "replace")
+        with self.lock:
+            lines = (self.partial + text).split('\n')
+            self.partial = lines.pop()
+            for line in lines:
+                self.add_line(line + '\n')
+
+    def add_line(self, decoded_line):
+        self.capture.write(decoded_line)
+        if self.parser is not None:
+            self.parser.feed(decoded_line)
+        self.local.echo = True
+        try:
+            log_htrun_line(decoded_line, self.verbose)
+        finally:
+            self.local.echo = False
+
+    def flush(self):
+        if getattr(self.local, 'echo', False):
+            self.stdout.flush()
+
+    def close(self):
+        with self.lock:
+            if self.partial:
+                self.add_line(self.partial)
+                self.partial = str()
+            self.capture.close()
+
+# Guards the process-wide set up shared by in-process runs in progress
+htrun_in_process_lock = threading.Lock()
+# Saved stdout, stderr and root logger configuration, and the count of runs
+htrun_in_process_state = {}
+
+def start_htrun_in_process_output():
+    """! Route stdout, stderr and logging of the process to per-thread outputs
+    @details The first in-process run installs host_tests_logger.ThreadOutput
+             objects as sys.stdout and sys.stderr, and has the root logger
+             write to them, the way mbedhtrun configures it. Each run then
+             sends what its threads print to its own output.
+    @return Standard output of the process
+    """
+    import logging
+    from .host_tests_logger import ThreadOutput
+
+    with htrun_in_process_lock:
+        state = htrun_in_process_state
+        if not state:
+            root = logging.getLogger()
+            state.update(runs=0,
+                         stdout=sys.stdout,
+                         stderr=sys.stderr,
+                         handlers=root.handlers[:],
+                         level=root.level)
+            sys.stdout = ThreadOutput(state['stdout'])
+            sys.stderr = ThreadOutput(state['stderr'])
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter('[%(created).2f][%(name)s]%(message)s'))
+            root.handlers = [handler]
+            root.setLevel(logging.DEBUG)
+        state['runs'] += 1
+        return state['stdout']
+
+def end_htrun_in_process_output():
+    """! Undo start_htrun_in_process_output() once the last run ended """
+    import logging
+
+    with htrun_in_process_lock:
+        state = htrun_in_process_state
+        state['runs'] -= 1
+        if state['runs'] == 0:
+            root = logging.getLogger()
+            sys.stdout, sys.stderr = state['stdout'], state['stderr']
+            root.handlers = state['handlers']
+            root.setLevel(state['level'])
+            state.clear()
+
+def run_htrun_in_process(cmd, verbose, parser=None, capture=None):
+    """! Runs mbedhtrun as a library call instead of a subprocess
+    @details Same interface as run_htrun(). The host test runner and its
+             connection to the device run in this process (see the
+             --conn-thread option of mbedhtrun), which saves starting a Python
+             interpreter and a connection process for each test. Output and
+             return code are the ones of the mbedhtrun command line tool.
+             Runs in different threads can overlap, e.g. one per device.
+    @param cmd mbedhtrun command line, e.g. ['mbedhtrun', '-d', 'E:', ...]
+    @param verbose Echo mbedhtrun output on stdout
+    @param parser HtrunOutputParser fed with the output while mbedhtrun runs
+    @param capture HtrunOutputCapture collecting the output, by default one keeping all of it in memory
+    @return Tuple of mbedhtrun return code and the HtrunOutputCapture holding its output
+    """
+    import traceback
+    from . import init_host_test_cli_params
+    from .host_tests_logger import set_thread_output
+    from .host_tests_runner.host_test_default import DefaultTestSelector
+
+    stdout = start_htrun_in_process_output()
+    output = HtrunOutput(verbose, stdout, parser, capture)
+    set_thread_output(output)
+    try:
+        try:
+            options = init_host_test_cli_params(list(cmd[1:]))
+            options.conn_thread = True
+            test_selector = DefaultTestSelector(options)
+            try:
+                returncode = test_selector.execute()
+            finally:
+                test_selector.finish()
+            # Return codes of a process are 0..255
+            if returncode < 0 or returncode > 255:
+                returncode = 1
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+    finally:
+        set_thread_output(None)
+        end_htrun_in_process_output()
+    output.close()
+    return returncode, output.capture
+
 def get_testcase_count_and_names(output):
     """ Fetches from log utest events with test case count (__testcase_count) and test case names (__testcase_name)*
 
@@ -242,16 +506,34 @@ def get_coverage_data(build_path, output):
     # [1456840876.73][CONN][RXD] {{__coverage_start;c:\Work\core-util/source/PoolAllocator.cpp.gcda;6164636772393034c2733f32...a33e...b9}}
     gt_logger.gt_log("checking for GCOV data...")
     re_gcov = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__coverage_start);([^;]+);([^}]+)\}\}$")
+    coverage_data = []
     for line in output.splitlines():
         m = re_gcov.search(line)
         if m:
             _, _, gcov_path, gcov_payload = m.groups()
-            try:
-                bin_gcov_payload = coverage_pack_hex_payload(gcov_payload)
-                coverage_dump_file(build_path, gcov_path, bin_gcov_payload)
-            except Exception as e:
-                gt_logger.gt_log_err("error while handling GCOV data: " + str(e))
-            gt_logger.gt_log_tab("storing %d bytes in '%s'"% (len(bin_gcov_payload), gcov_path))
+            coverage_data.append((gcov_path, gcov_payload))
+    dump_coverage_data(build_path, coverage_data)
+
+def dump_coverage_data(build_path, coverage_data):
+    """! Stores GCOV data sent by the DUT
+    @param coverage_data List of (gcov_path, gcov_payload) tuples, see get_coverage_data()
+    """
+    for gcov_path, gcov_payload in coverage_data:
+        dump_coverage_payload(build_path, gcov_path, gcov_payload)
+
+def dump_coverage_payload(build_path, gcov_path, gcov_payload):
+    """! Stores one GCOV file sent by the DUT
+    @param gcov_payload Hex encoded file content, see coverage_pack_hex_payload()
+    @return Number of bytes stored, None on error
+    """
+    try:
+        size = coverage_dump_hex_payload(build_path, gcov_path, gcov_payload)
+    except Exception as e:
+        gt_logger.gt_log_err("error while handling GCOV data: " + str(e))
+        return None
+    if size is not None:
+        gt_logger.gt_log_tab("storing %d bytes in '%s'"% (size, gcov_path))
+    return size
 
 def get_printable_string(unprintable_string):
     return "".join(filter(lambda x: x in string.printable, unprintable_string))
@@ -273,11 +555,179 @@ def get_testcase_summary(output):
     return None
 
 def get_testcase_result(output):
-    result_test_cases = {}  # Test cases results
+    """! Collects test case results and utest logs from mbedhtrun output
+    @return Dictionary of test case results by test case name
+    """
+    parser = HtrunOutputParser()
+    parser.feed(output)
+    return parser.testcase_result()
+
+class HtrunOutputParser(object):
+    """! Extracts test results from mbedhtrun output in a single pass
+
+    @details Feed the output as it is read, e.g. line by line with
+             run_htrun(cmd, verbose, parser), and collect the results at the
+             end. Results are the ones of get_test_result(),
+             get_testcase_result(), get_testcase_summary(),
+             get_testcase_count_and_names() and get_memory_metrics() on the
+             whole output, without scanning it again for each of them and
+             for each test case.
+
+             Regular expressions only run on lines containing the text they
+             look for. The utest log of each test case is collected while
+             its lines go by.
+
+             With a coverage build path, GCOV files are written as soon as
+             their line is parsed, while the test still runs, instead of
+             keeping their payload until dump_coverage_data().
+    """
+
+    re_result = re.compile(r"\{result;([\w+_]*)\}")
+    re_tc_count = re.compile(r"^\[(\d+\.\d+)\]\[(\w+)\]\[(\w+)\].*\{\{(__testcase_count);(\d+)\}\}")
+    re_tc_names = re.compile(r"^\[(\d+\.\d+)\]\[(\w+)\]\[(\w+)\].*\{\{(__testcase_name);([^;]+)\}\}")
+    re_tc_summary = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__testcase_summary);(\d+);(\d+)\}\}")
     re_tc_start = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__testcase_start);([^;]+)\}\}")
     re_tc_finish = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__testcase_finish);([^;]+);(\d+);(\d+)\}\}")
-    for line in output.splitlines():
-        m = re_tc_start.search(line)
+    re_max_heap_usage = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(max_heap_usage);(\d+)\}\}")
+    re_reserved_heap = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(reserved_heap);(\d+)\}\}")
+    re_thread_info = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__thread_info);\"([A-Fa-f0-9\-xX]+)\",(\d+),(\d+)\}\}")
+    re_gcov = re.compile(r"^\[(\d+\.\d+)\][^\{]+\{\{(__coverage_start);([^;]+);([^}]+)\}\}$")
+    # utest case start and end prints, followed by the test case name, see get_testcase_utest()
+    re_utest_start = re.compile(r"^\[(\d+\.\d+)\]\[(\w+)\]\[(\w+)\] >>> Running case #(\d)+: '")
+    re_utest_finish = re.compile(r"^\[(\d+\.\d+)\]\[(\w+)\]\[(\w+)\] >>> '")
+    re_utest_finish_tail = re.compile(r"': (\d+) passed, (\d+) failed")
+
+    def __init__(self, coverage_build_path=None, printable_only=False):
+        """! ctor
+        @param coverage_build_path Build path GCOV files are written to while parsing, see get_coverage_data()
+        @param printable_only Parse the output without its non printable characters, like the
+               get_*() functions on get_printable_string(output) do
+        """
+        self.coverage_build_path = coverage_build_path
+        self.printable_only = printable_only
+        # Output after the last new line
+        self.partial = str()
+        self.result = None
+        self.testcase_count = 0
+        self.testcase_names = []
+        self.summary = None
+        self.testcases = {}
+        # Test cases with a __testcase_start, their utest log is set at the end
+        self.testcases_started = set()
+        # utest log lines by test case name, of test cases still running and done
+        self.utest_logs = {}
+        self.utest_running = {}
+        self.utest_done = set()
+        self.max_heap_usage = None
+        self.reserved_heap = None
+        self.thread_info = {}
+        self.coverage_data = []
+
+    def feed(self, text):
+        """! Parse more output
+        @param text Output, any number of lines. A line may be split over calls.
+        """
+        if self.printable_only:
+            text = get_printable_string(text)
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            # Same lines as output.splitlines() on the whole output
+            for l in (line + '\n').splitlines():
+                self.parse_line(l)
+
+    def flush(self):
+        """! Parse the last line if the output doesn't end with a new line """
+        if self.partial:
+            for l in self.partial.splitlines():
+                self.parse_line(l)
+            self.partial = str()
+
+    def parse_line(self, line):
+        self.__parse_utest_line(line)
+
+        if '{' not in line:
+            return
+
+        if self.result is None and '{result;' in line:
+            for token in line.split():
+                m = self.re_result.search(token)
+                if m:
+                    self.result = TEST_RESULT_MAPPING.get(m.group(1), TEST_RESULT_UNDEF)
+                    break
+
+        m = self.re_tc_names.search(line) if '{{__testcase_name;' in line else None
+        if m:
+            self.testcase_names.append(m.group(5))
+        elif '{{__testcase_count;' in line:
+            m = self.re_tc_count.search(line)
+            if m:
+                self.testcase_count = m.group(5)
+
+        if self.summary is None and '{{__testcase_summary;' in line:
+            m = self.re_tc_summary.search(line)
+            if m:
+                _, _, passes, failures = m.groups()
+                self.summary = int(passes), int(failures)
+
+        if '{{__testcase_start;' in line or '{{__testcase_finish;' in line:
+            self.__parse_testcase_line(line)
+
+        if '{{max_heap_usage;' in line or '{{reserved_heap;' in line or '{{__thread_info;' in line:
+            self.__parse_memory_line(line)
+
+        if '{{__coverage_start;' in line:
+            m = self.re_gcov.search(line)
+            if m:
+                _, _, gcov_path, gcov_payload = m.groups()
+                if self.coverage_build_path is not None:
+                    dump_coverage_payload(self.coverage_build_path, gcov_path, gcov_payload)
+                else:
+                    self.coverage_data.append((gcov_path, gcov_payload))
+
+    def __utest_names(self, line, re_prefix, re_tail):
+        """! Test case names a utest start or end print would match
+        @details A name may contain quotes, so each quote after the prefix
+                 may end the name
+        """
+        m = re_prefix.search(line)
+        if not m:
+            return []
+        rest = line[m.end():]
+        names = []
+        index = rest.find("'")
+        while index >= 0:
+            if re_tail is None or re_tail.match(rest, index):
+                names.append(rest[:index])
+            index = rest.find("'", index + 1)
+        return names
+
+    def __parse_utest_line(self, line):
+        started = finished = []
+        if ' >>> ' in line:
+            started = self.__utest_names(line, self.re_utest_start, None)
+            if not started:
+                finished = self.__utest_names(line, self.re_utest_finish, self.re_utest_finish_tail)
+
+        for name, log in self.utest_running.items():
+            if name not in started and name not in finished:
+                log.append(line)
+
+        for name in started:
+            if name not in self.utest_done:
+                log = self.utest_logs.setdefault(name, [])
+                log.append(line)
+                self.utest_running[name] = log
+
+        for name in finished:
+            if name not in self.utest_done:
+                self.utest_logs.setdefault(name, []).append(line)
+                self.utest_done.add(name)
+                self.utest_running.pop(name, None)
+
+    def __parse_testcase_line(self, line):
+        result_test_cases = self.testcases
+        m = self.re_tc_start.search(line)
         if m:
             timestamp, _, testcase_id = m.groups()
             if testcase_id not in result_test_cases:
@@ -285,7 +735,9 @@ def get_testcase_result(output):
 
             # Data collected when __testcase_start is fetched
             result_test_cases[testcase_id]['time_start'] = float(timestamp)
-            result_test_cases[testcase_id]['utest_log'] = get_testcase_utest(output, testcase_id)
+            # The utest log may continue after this line, it's set at the end
+            result_test_cases[testcase_id]['utest_log'] = []
+            self.testcases_started.add(testcase_id)
 
             # Data collected when __testcase_finish is fetched
             result_test_cases[testcase_id]['duration'] = 0.0
@@ -294,9 +746,9 @@ def get_testcase_result(output):
             result_test_cases[testcase_id]['passed'] = 0
             result_test_cases[testcase_id]['failed'] = 0
             result_test_cases[testcase_id]['result'] = -4096
-            continue
+            return
 
-        m = re_tc_finish.search(line)
+        m = self.re_tc_finish.search(line)
         if m:
             timestamp, _, testcase_id, testcase_passed, testcase_failed = m.groups()
 
@@ -330,26 +782,87 @@ def get_testcase_result(output):
             if 'utest_log' not in result_test_cases[testcase_id]:
                 result_test_cases[testcase_id]['utest_log'] = "__testcase_start tag not found."
 
-    ### Adding missing test cases which were defined with __testcase_name
-    # Get test case names reported by utest + test case names
-    # This data will be used to process all tests which were not executed
-    # do their status can be set to SKIPPED (e.g. in JUnit)
-    tc_count, tc_names = get_testcase_count_and_names(output)
-    for testcase_id in tc_names:
-        if testcase_id not in result_test_cases:
-            result_test_cases[testcase_id] = {}
-            # Data collected when __testcase_start is fetched
-            result_test_cases[testcase_id]['time_start'] = 0.0
-            result_test_cases[testcase_id]['utest_log'] = []
-            # Data collected when __testcase_finish is fetched
-            result_test_cases[testcase_id]['duration'] = 0.0
-            result_test_cases[testcase_id]['result_text'] = 'SKIPPED'
-            result_test_cases[testcase_id]['time_end'] = 0.0
-            result_test_cases[testcase_id]['passed'] = 0
-            result_test_cases[testcase_id]['failed'] = 0
-            result_test_cases[testcase_id]['result'] = -8192
+    def __parse_memory_line(self, line):
+        m = self.re_max_heap_usage.search(line)
+        if m:
+            _, _, max_heap_usage = m.groups()
+            self.max_heap_usage = int(max_heap_usage)
+
+        m = self.re_reserved_heap.search(line)
+        if m:
+            _, _, reserved_heap = m.groups()
+            self.reserved_heap = int(reserved_heap)
 
-    return result_test_cases
+        m = self.re_thread_info.search(line)
+        if m:
+            _, _, thread_entry_arg, thread_max_stack, thread_stack_size = m.groups()
+            thread_entry_arg_split = thread_entry_arg.split('-')
+            self.thread_info[thread_entry_arg] = {
+                'entry': thread_entry_arg_split[0],
+                'max_stack': int(thread_max_stack),
+                'stack_size': int(thread_stack_size)
+            }
+            if len(thread_entry_arg_split) > 1:
+                self.thread_info[thread_entry_arg]['arg'] = thread_entry_arg_split[1]
+
+    def test_result(self):
+        """! Same as get_test_result() """
+        self.flush()
+        return TEST_RESULT_TIMEOUT if self.result is None else self.result
+
+    def testcase_count_and_names(self):
+        """! Same as get_testcase_count_and_names() """
+        self.flush()
+        return self.testcase_count, list(self.testcase_names)
+
+    def testcase_summary(self):
+        """! Same as get_testcase_summary() """
+        self.flush()
+        return self.summary
+
+    def testcase_utest(self, test_case_name):
+        """! Same as get_testcase_utest() """
+        self.flush()
+        return list(self.utest_logs.get(test_case_name, []))
+
+    def testcase_result(self):
+        """! Same as get_testcase_result() """
+        self.flush()
+        result_test_cases = {}
+        for testcase_id, testcase in self.testcases.items():
+            result_test_cases[testcase_id] = dict(testcase)
+            if testcase_id in self.testcases_started:
+                result_test_cases[testcase_id]['utest_log'] = self.testcase_utest(testcase_id)
+
+        ### Adding missing test cases which were defined with __testcase_name
+        # These test cases were not executed, so their status can be set to
+        # SKIPPED (e.g. in JUnit)
+        for testcase_id in self.testcase_names:
+            if testcase_id not in result_test_cases:
+                result_test_cases[testcase_id] = {}
+                # Data collected when __testcase_start is fetched
+                result_test_cases[testcase_id]['time_start'] = 0.0
+                result_test_cases[testcase_id]['utest_log'] = []
+                # Data collected when __testcase_finish is fetched
+                result_test_cases[testcase_id]['duration'] = 0.0
+                result_test_cases[testcase_id]['result_text'] = 'SKIPPED'
+                result_test_cases[testcase_id]['time_end'] = 0.0
+                result_test_cases[testcase_id]['passed'] = 0
+                result_test_cases[testcase_id]['failed'] = 0
+                result_test_cases[testcase_id]['result'] = -8192
+
+        return result_test_cases
+
+    def memory_metrics(self):
+        """! Same as get_memory_metrics() """
+        self.flush()
+        return self.max_heap_usage, self.reserved_heap, list(self.thread_info.values())
+
+    def dump_coverage_data(self, build_path):
+        """! Same as get_coverage_data() """
+        self.flush()
+        gt_logger.gt_log("checking for GCOV data...")
+        dump_coverage_data(build_path, self.coverage_data)
 
 def get_memory_metrics(output):
     """! Searches for test case memory metrics
@@ -0,0 +1,71 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import sys
+import threading
+import unittest
+
+from mbed_os_tools.detect.watcher import FakeEventSource
+
+from .watcher import FakeDetector
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from mbed_os_tools.detect.aio import AsyncMbedLsTools
+
+
+@unittest.skipIf(sys.version_info < (3, 5), 'requires asyncio')
+class AsyncMbedLsToolsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.detector = FakeDetector([{'target_id': '0240', 'mount_point': None}])
+        self.source = FakeEventSource()
+        self.mbeds = AsyncMbedLsTools(self.detector, event_source=self.source)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.mbeds.close())
+        self.loop.close()
+
+    def test_list_mbeds(self):
+        devices = self.loop.run_until_complete(self.mbeds.list_mbeds())
+        self.assertEqual(devices, [{'target_id': '0240', 'mount_point': None}])
+
+    def test_wait_for_mount(self):
+        def mount():
+            self.detector.devices = [{'target_id': '0240', 'mount_point': '/mnt/D'}]
+            self.source.push({'ACTION': 'change', 'SUBSYSTEM': 'mount'})
+
+        self.loop.call_later(0.1, threading.Thread(target=mount).start)
+        device = self.loop.run_until_complete(
+            self.mbeds.wait_for_mount('0240', timeout=5))
+        self.assertEqual(device['mount_point'], '/mnt/D')
+
+    def test_wait_for_serial_timeout(self):
+        device = self.loop.run_until_complete(
+            self.mbeds.wait_for_serial('0240', timeout=0.1))
+        self.assertIsNone(device)
+
+    def test_waiters_run_concurrently(self):
+        waiters = asyncio.gather(
+            self.loop.create_task(self.mbeds.wait_for_mount('0240', timeout=0.2)),
+            self.loop.create_task(self.mbeds.wait_for_serial('0240', timeout=0.2)))
+        self.assertEqual(self.loop.run_until_complete(waiters), [None, None])
+        # Both waiters share one watcher
+        self.assertEqual(self.detector.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,6 +44,12 @@ class DetectOSTestCase(unittest.TestCase):
     def test_porting_create(self):
         self.assertNotEqual(None, create())
 
+    def test_create_cached(self):
+        cached = create(cached=True)
+        self.assertIs(cached, create(cached=True))
+        self.assertIsNot(cached, create())
+        self.assertIsNot(cached, create(cached=True, list_unmounted=True))
+
     def test_supported_os_name(self):
         os_names = ['Windows7', 'Ubuntu', 'LinuxGeneric', 'Darwin']
         self.assertIn(mbed_os_support(), os_names)
@@ -0,0 +1,96 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from mbed_os_tools.detect.device_cache import DeviceCache
+from mbed_os_tools.detect.lstools_base import MbedLsToolsBase, FSInteraction
+
+
+class DummyLsTools(MbedLsToolsBase):
+    return_value = []
+    def find_candidates(self):
+        return [dict(d) for d in self.return_value]
+
+
+class DeviceCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'mbedls', 'devices.json')
+        self.cache = DeviceCache(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_miss(self):
+        self.assertEqual(self.cache.get('0240', [1, 2, 3], 'mbed.htm'), (False, None))
+
+    def test_persisted(self):
+        self.cache.set('0240', [1, 2, 3], 'mbed.htm', ['0240ABCD', {'version': '0226'}])
+        self.cache.set('0240', [1, 2, 3], 'DETAILS.TXT', None)
+        self.cache.save()
+
+        cache = DeviceCache(self.path)
+        self.assertEqual(cache.get('0240', [1, 2, 3], 'mbed.htm'),
+                         (True, ['0240ABCD', {'version': '0226'}]))
+        self.assertEqual(cache.get('0240', [1, 2, 3], 'DETAILS.TXT'), (True, None))
+
+    def test_remount_invalidates(self):
+        self.cache.set('0240', [1, 2, 3], 'mbed.htm', ['0240ABCD', {}])
+        self.assertEqual(self.cache.get('0240', [4, 2, 3], 'mbed.htm'), (False, None))
+        self.cache.set('0240', [4, 2, 3], 'DETAILS.TXT', {})
+        self.assertEqual(self.cache.get('0240', [1, 2, 3], 'mbed.htm'), (False, None))
+
+    def test_warm_listing_skips_reads(self):
+        base = DummyLsTools(device_cache=self.cache)
+        base.return_value = [{'mount_point': 'dummy_mount_point',
+                              'target_id_usb_id': u'0240DEADBEEF',
+                              'serial_port': "dummy_serial_port"}]
+        with patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase._read_htm_ids") as _read_htm,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase._mount_generation") as _gen,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase.mount_point_ready") as _mpr,\
+             patch('mbed_os_tools.detect.lstools_base.listdir') as _listdir:
+            _mpr.return_value = True
+            _gen.return_value = [7, 2049, 1]
+            _read_htm.return_value = (u'0241BEEFDEAD', {'version': '0226'})
+            _listdir.return_value = ['mbed.htm']
+
+            cold = base.list_mbeds(FSInteraction.BeforeFilter)
+            warm = base.list_mbeds(FSInteraction.BeforeFilter)
+            self.assertEqual(_read_htm.call_count, 1)
+            self.assertEqual(_listdir.call_count, 1)
+            self.assertEqual(cold, warm)
+            self.assertEqual(warm[0]['target_id'], '0241BEEFDEAD')
+            self.assertEqual(warm[0]['daplink_version'], '0226')
+
+            # Remounted: read again
+            _gen.return_value = [8, 2049, 1]
+            base.list_mbeds(FSInteraction.BeforeFilter)
+            self.assertEqual(_read_htm.call_count, 2)
+            self.assertEqual(_listdir.call_count, 2)
+        self.assertTrue(os.path.isfile(self.path))
+
+    def test_opt_in(self):
+        self.assertIsNone(DummyLsTools().device_cache)
+        self.assertIs(DummyLsTools(device_cache=self.cache).device_cache, self.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
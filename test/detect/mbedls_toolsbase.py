@@ -19,6 +19,8 @@ import errno
 import logging
 import re
 import json
+import threading
+import time
 from io import StringIO
 from mock import patch, mock_open, DEFAULT
 from copy import deepcopy
@@ -345,6 +347,152 @@ Remount count: 0
             self.base._update_device_details_jlink(device, False)
             _open.assert_not_called()
 
+    def test_find_by_location(self):
+        devices = [
+            {
+                'target_id_usb_id': '024075309420ABCE',
+                'mount_point': 'invalid_mount_point',
+                'serial_port': 'invalid_serial_port',
+                'location': '1-1.2',
+            },
+            {
+                'target_id_usb_id': '0240753094200000',
+                'mount_point': 'invalid_mount_point2',
+                'serial_port': 'invalid_serial_port2',
+            },
+        ]
+        with patch.object(self.base, "find_candidates") as _fc,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase.mount_point_ready") as _mpr:
+            _mpr.return_value = True
+            _fc.side_effect = lambda: [dict(d) for d in devices]
+
+            ret = self.base.list_mbeds(FSInteraction.Never)
+            self.assertEqual([d['location'] for d in ret], ['1-1.2', None])
+            device = self.base.find_by_location('1-1.2', fs_interaction=FSInteraction.Never)
+            self.assertEqual(device['target_id'], '024075309420ABCE')
+            self.assertIsNone(self.base.find_by_location('1-1.3', fs_interaction=FSInteraction.Never))
+            self.assertIsNone(self.base.find_by_location(None, fs_interaction=FSInteraction.Never))
+
+    def test_list_mbeds_snapshot(self):
+        device = {
+            'target_id_usb_id': '024075309420ABCE',
+            'mount_point': 'invalid_mount_point',
+            'serial_port': 'invalid_serial_port'
+        }
+        with patch.object(self.base, "find_candidates") as _fc,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase.mount_point_ready") as _mpr:
+            _mpr.return_value = True
+            _fc.side_effect = lambda: [dict(device)]
+
+            first = self.base.list_mbeds(FSInteraction.Never, max_age=60)
+            self.assertEqual(_fc.call_count, 1)
+            self.assertEqual(self.base.cache_misses, 1)
+
+            first[0]['platform_name'] = 'modified by caller'
+            second = self.base.list_mbeds(FSInteraction.Never, max_age=60)
+            self.assertEqual(_fc.call_count, 1)
+            self.assertEqual(self.base.cache_hits, 1)
+            self.assertEqual(second[0]['platform_name'], 'K64F')
+
+            # Different arguments and forced refreshes enumerate again
+            self.base.list_mbeds(FSInteraction.Never, unique_names=True, max_age=60)
+            self.assertEqual(_fc.call_count, 2)
+            self.base.list_mbeds(FSInteraction.Never)
+            self.assertEqual(_fc.call_count, 3)
+            self.base.list_mbeds(FSInteraction.Never, max_age=0)
+            self.assertEqual(_fc.call_count, 4)
+
+            self.base.invalidate_snapshots()
+            self.base.list_mbeds(FSInteraction.Never, max_age=60)
+            self.assertEqual(_fc.call_count, 5)
+            self.assertEqual(self.base.cache_misses, 4)
+
+    def test_fs_probe_concurrent_and_ordered(self):
+        devices = [{
+            'target_id_usb_id': '0240%012d' % i,
+            'mount_point': 'mount_point_%d' % i,
+            'serial_port': 'serial_port_%d' % i
+        } for i in range(6)]
+        hang = threading.Event()
+        thread_count = threading.active_count()
+
+        def update_from_fs(device, read_details_txt):
+            if device['mount_point'] == 'mount_point_2':
+                hang.wait(5)
+            device['target_id'] = device['target_id_usb_id'] + 'HTM'
+
+        self.base.return_value = devices
+        self.base.FS_PROBE_TIMEOUT = 0.2
+        with patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase._update_device_from_fs") as _up_fs,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase.mount_point_ready") as _mpr:
+            _mpr.return_value = True
+            _up_fs.side_effect = update_from_fs
+            ret = self.base.list_mbeds(FSInteraction.BeforeFilter)
+        hang.set()
+
+        # The probe threads exit once the hung probe returns
+        deadline = time.time() + 5
+        while threading.active_count() > thread_count and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(threading.active_count(), thread_count)
+
+        self.assertEqual([d['mount_point'] for d in ret],
+                         ['mount_point_%d' % i for i in range(6)])
+        self.assertTrue(ret[2]['degraded'])
+        self.assertEqual(ret[2]['target_id'], ret[2]['target_id_usb_id'])
+        for i in (0, 1, 3, 4, 5):
+            self.assertNotIn('degraded', ret[i])
+            self.assertEqual(ret[i]['target_id'], ret[i]['target_id_usb_id'] + 'HTM')
+
+    def test_fs_probe_deadline(self):
+        devices = [{
+            'target_id_usb_id': '0240%012d' % i,
+            'mount_point': 'mount_point_%d' % i,
+            'serial_port': 'serial_port_%d' % i
+        } for i in range(6)]
+        hang = threading.Event()
+
+        def update_from_fs(device, read_details_txt):
+            if device['mount_point'] in ('mount_point_1', 'mount_point_2'):
+                hang.wait(5)
+            device['target_id'] = device['target_id_usb_id'] + 'HTM'
+
+        self.base.find_candidates = lambda: [dict(d) for d in devices]
+        self.base.FS_PROBE_WORKERS = 2
+        self.base.FS_PROBE_TIMEOUT = 0.2
+        with patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase._update_device_from_fs") as _up_fs,\
+             patch("mbed_os_tools.detect.lstools_base.MbedLsToolsBase.mount_point_ready") as _mpr:
+            _mpr.return_value = True
+            _up_fs.side_effect = update_from_fs
+            for listing in range(2):
+                start = time.time()
+                ret = self.base.list_mbeds(FSInteraction.BeforeFilter)
+                # One deadline for all probes, not one per device
+                self.assertLess(time.time() - start, 1)
+                self.assertTrue(ret[1]['degraded'])
+                self.assertTrue(ret[2]['degraded'])
+                for i in (3, 4, 5):
+                    if listing == 0:
+                        # Queued behind the hung probes, never started
+                        self.assertTrue(ret[i]['degraded'])
+                        self.assertEqual(ret[i]['target_id'], ret[i]['target_id_usb_id'])
+                    else:
+                        # The next listing's threads aren't blocked by them
+                        self.assertNotIn('degraded', ret[i])
+                        self.assertEqual(ret[i]['target_id'], ret[i]['target_id_usb_id'] + 'HTM')
+            # Hung probes are not queued again
+            self.assertEqual(
+                [c[0][0]['mount_point'] for c in _up_fs.call_args_list].count('mount_point_1'), 1)
+
+            hang.set()
+            deadline = time.time() + 5
+            while self.base._fs_probes_running and time.time() < deadline:
+                time.sleep(0.01)
+            ret = self.base.list_mbeds(FSInteraction.BeforeFilter)
+        for device in ret:
+            self.assertNotIn('degraded', device)
+            self.assertEqual(device['target_id'], device['target_id_usb_id'] + 'HTM')
+
     def test_fs_never(self):
         device = {
             'target_id_usb_id': '024075309420ABCE',
@@ -0,0 +1,100 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mbed_os_tools.detect.mountinfo import (
+    Mount,
+    MountTable,
+    get_mount_table,
+    parse_mountinfo,
+)
+
+
+class MountInfoTestCase(unittest.TestCase):
+
+    mountinfo = (
+        b'22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw,errors=remount-ro\n'
+        b'25 22 0:5 / /proc rw,nosuid,nodev,noexec,relatime shared:12 - proc proc rw\n'
+        b'301 22 8:16 / /media/usb0 rw,nosuid,nodev,relatime shared:160 - vfat /dev/sdb '
+        b'rw,uid=1000,gid=1000,fmask=0022,dmask=0022,codepage=437,iocharset=iso8859-1\n'
+        b'302 22 8:32 / /media/user/MBED\\040DRIVE rw,relatime - vfat /dev/sdc rw\n'
+        b'303 22 8:48 / /mnt/old rw,relatime shared:3 master:1 - msdos /dev/sdd rw\n'
+        b'304 22 8:64 / /mnt/DAPLINK\\134x rw,relatime - vfat /dev/sde rw\n'
+    )
+
+    def test_parse_mountinfo(self):
+        mounts = parse_mountinfo(self.mountinfo)
+        self.assertEqual(len(mounts), 6)
+        self.assertEqual(mounts[0], Mount(22, '/dev/sda1', '/', 'ext4'))
+        self.assertEqual(mounts[2], Mount(301, '/dev/sdb', '/media/usb0', 'vfat'))
+
+    def test_parse_escaped_paths(self):
+        mounts = parse_mountinfo(self.mountinfo)
+        self.assertEqual(mounts[3].mount_point, '/media/user/MBED DRIVE')
+        self.assertEqual(mounts[5].mount_point, '/mnt/DAPLINK\\x')
+
+    def test_parse_skips_malformed_lines(self):
+        self.assertEqual(parse_mountinfo(b'garbage\n\n'), [])
+
+    def test_fat_mounts(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'mountinfo')
+            with open(path, 'wb') as f:
+                f.write(self.mountinfo)
+            with MountTable(path) as table:
+                self.assertEqual(table.fat_mounts(), [
+                    ('/dev/sdb', '/media/usb0'),
+                    ('/dev/sdc', '/media/user/MBED DRIVE'),
+                    ('/dev/sdd', '/mnt/old'),
+                    ('/dev/sde', '/mnt/DAPLINK\\x'),
+                ])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_mount_id(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'mountinfo')
+            with open(path, 'wb') as f:
+                f.write(self.mountinfo)
+            with MountTable(path) as table:
+                self.assertEqual(table.mount_id('/media/user/MBED DRIVE'), 302)
+                self.assertIsNone(table.mount_id('/media/usb9'))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_missing_file(self):
+        self.assertIsNone(get_mount_table('/nonexistent/mountinfo'))
+
+    @unittest.skipUnless(os.path.exists('/proc/self/mountinfo'), 'requires Linux')
+    def test_unchanged_table_is_cached(self):
+        with MountTable() as table:
+            first = table.mounts()
+            self.assertEqual(table.reads, 1)
+            self.assertIs(table.mounts(), first)
+            self.assertEqual(table.reads, 1)
+        # Closed tables are reopened and read again
+        self.assertEqual(table.mounts(), first)
+        self.assertEqual(table.reads, 2)
+        table.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,9 +26,17 @@ class LinuxPortTestCase(unittest.TestCase):
 
     def setUp(self):
         self.linux_generic = MbedLsToolsLinuxGeneric()
+        # These cases exercise the 'mount' command and /dev/*/by-id fallbacks
+        self.mount_table_patcher = patch(
+            'mbed_os_tools.detect.linux.get_mount_table', return_value=None)
+        self.mount_table_patcher.start()
+        self.usb_topology_patcher = patch(
+            'mbed_os_tools.detect.linux.get_usb_topology', return_value=None)
+        self.usb_topology_patcher.start()
 
     def tearDown(self):
-        pass
+        self.mount_table_patcher.stop()
+        self.usb_topology_patcher.stop()
 
     vfat_devices = [
         b'/dev/sdb on /media/usb0 type vfat (rw,noexec,nodev,sync,noatime,nodiratime,gid=1000,uid=1000,dmask=000,fmask=000)',
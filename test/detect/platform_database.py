@@ -24,7 +24,7 @@ from mock import patch, MagicMock, DEFAULT
 from io import StringIO
 
 from mbed_os_tools.detect.platform_database import PlatformDatabase, DEFAULT_PLATFORM_DB,\
-    LOCAL_PLATFORM_DATABASE
+    LOCAL_PLATFORM_DATABASE, shared_platform_database
 
 try:
     unicode
@@ -76,6 +76,8 @@ class EmptyPlatformDatabaseTests(unittest.TestCase):
             stringio = MagicMock()
             _open.side_effect = (IOError("Bogus"), stringio)
             self.pdb = PlatformDatabase([LOCAL_PLATFORM_DATABASE])
+            # The database is loaded on first use
+            self.pdb.get("1234")
             stringio.__enter__.return_value.write.assert_called_with(
                 unicode(json.dumps(DEFAULT_PLATFORM_DB)))
             self.pdb.add("1234", "MYTARGET")
@@ -100,9 +102,86 @@ class EmptyPlatformDatabaseTests(unittest.TestCase):
             _open.return_value = stringio
             _getmtime.side_effect = (0, 1000000)
             self.pdb = PlatformDatabase([LOCAL_PLATFORM_DATABASE])
+            self.pdb.get("1234")
             stringio.__enter__.return_value.write.assert_called_with(
                 unicode(json.dumps(DEFAULT_PLATFORM_DB)))
 
+    def test_lazy_load(self):
+        """Verify that database files are not read before the first lookup
+        """
+        with patch("mbed_os_tools.detect.platform_database.open") as _open:
+            self.pdb = PlatformDatabase([self.base_db_path])
+            _open.assert_not_called()
+        self.pdb.get("1234")
+        self.assertEqual(self.pdb.get("1234"), None)
+
+    def test_shared_database(self):
+        """Verify that parsed files are shared until their file changes
+        """
+        shared = shared_platform_database([self.base_db_path])
+        other = shared_platform_database([self.base_db_path])
+        self.assertIsNot(shared, other)
+        self.assertEqual(shared.get('4753'), None)
+        self.assertIs(shared._dbs, other._dbs)
+
+        with open(self.base_db_path, 'w') as out:
+            out.write(u'{"daplink": {"4753": "Test_Platform"}}')
+        reloaded = shared_platform_database([self.base_db_path])
+        self.assertEqual(reloaded.get('4753'), 'Test_Platform')
+        self.assertIsNot(reloaded._dbs, other._dbs)
+
+    def test_shared_database_copy_on_write(self):
+        """Verify that changes to a shared database don't leak into the others
+        """
+        shared = shared_platform_database([self.base_db_path])
+        other = shared_platform_database([self.base_db_path])
+        shared.add('4753', 'Test_Platform')
+        self.assertEqual(shared.get('4753'), 'Test_Platform')
+        self.assertEqual(other.get('4753'), None)
+        self.assertEqual(shared_platform_database([self.base_db_path]).get('4753'), None)
+
+    def test_transaction(self):
+        """Verify that changes in a transaction are written once, when it ends
+        """
+        with patch.object(self.pdb, '_write_primary', wraps=self.pdb._write_primary) as _write:
+            with self.pdb.transaction():
+                self.pdb.add('1234', 'MYTARGET', permanent=True)
+                self.pdb.add('5678', 'MYTARGET2', permanent=True)
+                self.pdb.remove('1234', permanent=True)
+                _write.assert_not_called()
+            _write.assert_called_once_with()
+        with open(self.base_db_path) as base_db:
+            self.assertEqual(json.load(base_db), {'daplink': {'5678': 'MYTARGET2'}})
+
+    def test_failed_write_keeps_file(self):
+        """Verify that the database file is left intact if writing fails
+        """
+        self.pdb.add('1234', 'MYTARGET', permanent=True)
+        with patch('mbed_os_tools.detect.platform_database.json.dumps') as _dumps:
+            _dumps.side_effect = ValueError("Bogus")
+            with self.assertRaises(ValueError):
+                self.pdb.add('5678', 'MYTARGET2', permanent=True)
+        with open(self.base_db_path) as base_db:
+            self.assertEqual(json.load(base_db), {'daplink': {'1234': 'MYTARGET'}})
+        self.assertEqual([f for f in os.listdir(self.tempd_dir) if f.endswith('.tmp')], [])
+
+    @unittest.skipIf(os.name == 'nt', 'POSIX permissions')
+    def test_write_keeps_file_mode(self):
+        """Verify that replacing the database file keeps its permissions
+        """
+        os.chmod(self.base_db_path, 0o644)
+        self.pdb.add('1234', 'MYTARGET', permanent=True)
+        self.assertEqual(os.stat(self.base_db_path).st_mode & 0o777, 0o644)
+
+    def test_reload_changed_database(self):
+        """Verify that changes written by another process are picked up
+        """
+        self.pdb.RELOAD_CHECK_INTERVAL = 0
+        self.assertEqual(self.pdb.get('1234'), None)
+        other = PlatformDatabase([self.base_db_path])
+        other.add('1234', 'MYTARGET', permanent=True)
+        self.assertEqual(self.pdb.get('1234'), 'MYTARGET')
+
     def test_bogus_database(self):
         """Basic empty database test
         """
@@ -281,10 +360,11 @@ class OverriddenPlatformDatabaseTests(unittest.TestCase):
         self.assertIn(('0123', 'Overriding_Platform'), list(self.pdb.items()))
         self.assertEqual(set(self.pdb.all_ids()), set(['0123']))
         self.assertEqual(self.pdb.get('0123'), 'Overriding_Platform')
-        self.overriding_db.seek(0)
-        self.assertEqual(self.overriding_db.read(),
-                         json.dumps(dict([('daplink', dict([('0123', 'Overriding_Platform')]))]))
-                         .encode('utf-8'))
+        # The file is replaced rather than written in place
+        with open(self.overriding_db_path, 'rb') as overriding_db:
+            self.assertEqual(overriding_db.read(),
+                             json.dumps(dict([('daplink', dict([('0123', 'Overriding_Platform')]))]))
+                             .encode('utf-8'))
         self.assertBaseUnchanged()
 
     def test_remove_override(self):
@@ -351,6 +431,16 @@ class InternalLockingChecks(unittest.TestCase):
         assert self.acquire.called, 'Lock acquire should have been called'
         assert self.release.called
 
+    def test_transaction_locks_once(self):
+        """Test that a transaction takes the lock once for many modifications
+        """
+        with self.pdb.transaction():
+            self.pdb.add('7155', 'Junk', permanent=True)
+            self.pdb.add('7156', 'Junk', permanent=True)
+            self.pdb.remove('7155', permanent=True)
+        self.assertEqual(self.acquire.call_count, 1)
+        self.assertEqual(self.release.call_count, 1)
+
     def test_update_fail_acquire(self):
         """Test that the backing file is not updated when lock acquisition fails
         """
@@ -360,6 +450,20 @@ class InternalLockingChecks(unittest.TestCase):
         self.base_db.seek(0)
         self.assertEqual(self.base_db.read(), b'{}')
 
+    def test_transaction_fail_acquire(self):
+        """Test that a transaction raises when the lock can't be taken
+        """
+        self.acquire.return_value = False
+        ran = []
+        with self.assertRaises(IOError):
+            with self.pdb.transaction():
+                ran.append(True)
+        self.assertEqual(ran, [])
+        self.release.assert_not_called()
+        self.assertFalse(self.pdb._unsaved)
+        self.base_db.seek(0)
+        self.assertEqual(self.base_db.read(), b'{}')
+
     def test_update_ambiguous(self):
         """Test that the backing file is not updated when lock acquisition fails
         """
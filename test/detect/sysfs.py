@@ -0,0 +1,178 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+
+from mbed_os_tools.detect.linux import MbedLsToolsLinuxGeneric
+from mbed_os_tools.detect.sysfs import UsbTopology, get_usb_topology
+
+USB_ROOT = 'devices/pci0000:00/0000:00:14.0/usb1'
+
+
+def make_sysfs_tree(root, devices):
+    """Create a minimal sysfs tree
+    @param devices List of dicts with 'port_path', 'serial', 'vendor_id',
+      'product_id' and optional 'block' and 'tty' device names
+    """
+    def link(path, target):
+        path = os.path.join(root, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        os.symlink(os.path.relpath(os.path.join(root, target), os.path.dirname(path)), path)
+
+    def write(path, content):
+        path = os.path.join(root, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as out:
+            out.write(content + '\n')
+
+    os.makedirs(os.path.join(root, USB_ROOT))
+    os.makedirs(os.path.join(root, 'devices/virtual/tty/tty0'))
+    link('bus/usb/devices/usb1', USB_ROOT)
+    link('class/tty/tty0', 'devices/virtual/tty/tty0')
+    for device in devices:
+        port_path = device['port_path']
+        # Hubs in the chain are directories named after their port path
+        chain = port_path.split('.')
+        device_dir = os.path.join(
+            USB_ROOT, *['.'.join(chain[:i + 1]) for i in range(len(chain))])
+        write(os.path.join(device_dir, 'idVendor'), device['vendor_id'])
+        write(os.path.join(device_dir, 'idProduct'), device['product_id'])
+        if device.get('serial'):
+            write(os.path.join(device_dir, 'serial'), device['serial'])
+        link('bus/usb/devices/%s' % port_path, device_dir)
+        link('bus/usb/devices/%s:1.0' % port_path, '%s/%s:1.0' % (device_dir, port_path))
+        link('bus/usb/devices/%s:1.1' % port_path, '%s/%s:1.1' % (device_dir, port_path))
+        if device.get('block'):
+            disk_dir = '%s/%s:1.0/host6/target6:0:0/6:0:0:0/block/%s' % (
+                device_dir, port_path, device['block'])
+            write(os.path.join(disk_dir, 'dev'), '8:16')
+            write(os.path.join(disk_dir, device['block'] + '1', 'dev'), '8:17')
+            link('class/block/%s' % device['block'], disk_dir)
+            link('class/block/%s1' % device['block'],
+                 os.path.join(disk_dir, device['block'] + '1'))
+        if device.get('tty'):
+            tty_dir = '%s/%s:1.1/tty/%s' % (device_dir, port_path, device['tty'])
+            write(os.path.join(tty_dir, 'dev'), '166:0')
+            link('class/tty/%s' % device['tty'], tty_dir)
+
+
+@unittest.skipUnless(hasattr(os, 'symlink'), 'requires symlinks')
+class UsbTopologyTestCase(unittest.TestCase):
+
+    devices = [
+        {
+            'port_path': '1-1.2.6',
+            'serial': '0240000032044e4500257009997b00386781000097969900',
+            'vendor_id': '0d28',
+            'product_id': '0204',
+            'block': 'sdb',
+            'tty': 'ttyACM0',
+        },
+        {
+            'port_path': '1-3',
+            'serial': '066EFF534951775087215736',
+            'vendor_id': '0483',
+            'product_id': '374b',
+            'block': 'sdc',
+            'tty': 'ttyACM1',
+        },
+        {
+            # A keyboard
+            'port_path': '1-4',
+            'vendor_id': '046d',
+            'product_id': 'c31c',
+        },
+    ]
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        make_sysfs_tree(self.root, self.devices)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_devices(self):
+        topology = UsbTopology(self.root)
+        self.assertEqual([d.port_path for d in topology.devices()],
+                         ['1-1.2.6', '1-3', '1-4'])
+        device = topology.device('1-1.2.6')
+        self.assertEqual(device.vendor_id, '0d28')
+        self.assertEqual(device.product_id, '0204')
+        self.assertEqual(device.serial, self.devices[0]['serial'])
+        self.assertIsNone(topology.device('1-4').serial)
+
+    def test_children(self):
+        topology = UsbTopology(self.root)
+        device = topology.device('1-3')
+        self.assertEqual(device.block_devices, ['sdc'])
+        self.assertEqual(device.tty_devices, ['ttyACM1'])
+        self.assertEqual(list(device.interfaces), ['1-3:1.0', '1-3:1.1'])
+        self.assertIs(topology.owner('block', 'sdb'), topology.device('1-1.2.6'))
+        self.assertIs(topology.owner('tty', 'ttyACM1'), device)
+        self.assertIsNone(topology.owner('block', 'sdb1'))
+        self.assertIsNone(topology.owner('tty', 'tty0'))
+        self.assertEqual(device.partitions('sdc'), ['sdc1'])
+        self.assertEqual(device.partitions('sdb'), [])
+
+    def test_missing_sysfs(self):
+        self.assertIsNone(get_usb_topology(os.path.join(self.root, 'nonexistent')))
+
+    def test_find_candidates(self):
+        mounts = [('/dev/sdb', '/media/DAPLINK'), ('/dev/sda1', '/boot/efi')]
+        with patch('mbed_os_tools.detect.linux.get_usb_topology') as _topology,\
+             patch('mbed_os_tools.detect.linux.MbedLsToolsLinuxGeneric._fat_mounts') as _mounts,\
+             patch('mbed_os_tools.detect.linux.MbedLsToolsLinuxGeneric._dev_by_id') as _by_id:
+            _topology.return_value = UsbTopology(self.root)
+            _mounts.return_value = mounts
+            candidates = MbedLsToolsLinuxGeneric().find_candidates()
+            _by_id.assert_not_called()
+        self.assertEqual(candidates, [
+            {
+                'mount_point': '/media/DAPLINK',
+                'serial_port': '/dev/ttyACM0',
+                'target_id_usb_id': '0240000032044e4500257009997b00386781000097969900',
+                'vendor_id': '0d28',
+                'product_id': '0204',
+                'location': '1-1.2.6',
+            },
+            {
+                'mount_point': None,
+                'serial_port': '/dev/ttyACM1',
+                'target_id_usb_id': '066EFF534951775087215736',
+                'vendor_id': '0483',
+                'product_id': '374b',
+                'location': '1-3',
+            },
+        ])
+
+    def test_find_candidates_partition(self):
+        mounts = [('/dev/sdb', '/media/DAPLINK'), ('/dev/sdc1', '/media/NODE_F411RE')]
+        with patch('mbed_os_tools.detect.linux.get_usb_topology') as _topology,\
+             patch('mbed_os_tools.detect.linux.MbedLsToolsLinuxGeneric._fat_mounts') as _mounts:
+            _topology.return_value = UsbTopology(self.root)
+            _mounts.return_value = mounts
+            candidates = MbedLsToolsLinuxGeneric().find_candidates()
+        self.assertEqual([c['mount_point'] for c in candidates],
+                         ['/media/DAPLINK', '/media/NODE_F411RE'])
+
+
+if __name__ == '__main__':
+    unittest.main()
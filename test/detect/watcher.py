@@ -0,0 +1,227 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+import unittest
+
+from mbed_os_tools.detect import watcher as watcher_module
+from mbed_os_tools.detect.watcher import (
+    DeviceWatcher,
+    FakeEventSource,
+    PollingEventSource,
+    is_relevant,
+    parse_uevent,
+    shared_watcher,
+)
+
+
+class FakeDetector(object):
+    def __init__(self, devices=None):
+        self.devices = devices or []
+        self.calls = 0
+
+    def list_mbeds(self, **kwargs):
+        self.calls += 1
+        return [dict(d) for d in self.devices]
+
+
+class UeventParseTestCase(unittest.TestCase):
+    def test_parse_kernel_uevent(self):
+        data = (
+            b"add@/devices/pci0000:00/usb1/1-1/1-1:1.0/host6/block/sdb\0"
+            b"ACTION=add\0"
+            b"DEVPATH=/devices/pci0000:00/usb1/1-1/1-1:1.0/host6/block/sdb\0"
+            b"SUBSYSTEM=block\0"
+            b"DEVNAME=sdb\0"
+            b"SEQNUM=4242\0"
+        )
+        event = parse_uevent(data)
+        self.assertEqual(event["ACTION"], "add")
+        self.assertEqual(event["SUBSYSTEM"], "block")
+        self.assertEqual(event["DEVNAME"], "sdb")
+        self.assertTrue(is_relevant(event))
+
+    def test_parse_libudev_message(self):
+        self.assertIsNone(parse_uevent(b"libudev\0\xfe\xed\xca\xfe"))
+
+    def test_irrelevant_subsystem(self):
+        self.assertFalse(is_relevant({"ACTION": "add", "SUBSYSTEM": "input"}))
+        self.assertTrue(is_relevant({"ACTION": "change"}))
+
+
+class DeviceWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.detector = FakeDetector()
+        self.source = FakeEventSource()
+        self.watcher = DeviceWatcher(self.detector, self.source, debounce=0)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+
+    def test_initial_snapshot(self):
+        self.assertEqual(self.detector.calls, 1)
+        self.assertEqual(self.watcher.list_mbeds(), [])
+
+    def test_wait_for_timeout(self):
+        self.assertIsNone(self.watcher.wait_for("0240", timeout=0.05))
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_irrelevant_event_does_not_relist(self):
+        self.source.push({"ACTION": "add", "SUBSYSTEM": "input"})
+        self.assertIsNone(self.watcher.wait_for("0240", timeout=0.1))
+        self.assertEqual(self.detector.calls, 1)
+
+    def test_wait_for_device_to_mount(self):
+        self.detector.devices = [{"target_id": "0240", "mount_point": None}]
+        self.source.push({"ACTION": "add", "SUBSYSTEM": "block"})
+
+        def mount():
+            self.detector.devices = [{"target_id": "0240", "mount_point": "/mnt/D"}]
+            self.source.push({"ACTION": "change", "SUBSYSTEM": "mount"})
+
+        timer = threading.Timer(0.1, mount)
+        timer.start()
+        device = self.watcher.wait_for(
+            "0240", lambda d: d["mount_point"] is not None, timeout=5
+        )
+        timer.join()
+        self.assertEqual(device["mount_point"], "/mnt/D")
+        self.assertEqual(self.watcher.get("0240")["mount_point"], "/mnt/D")
+
+    def test_wait_for_device_by_location(self):
+        self.detector.devices = [
+            {"target_id": "0240", "location": "1-1.2", "serial_port": "/dev/ttyACM0"}]
+        self.watcher.refresh()
+
+        def reenumerate():
+            # The device came back in bootloader mode with another id
+            self.detector.devices = [
+                {"target_id": "9999", "location": "1-1.2", "serial_port": "/dev/ttyACM1"}]
+            self.source.push({"ACTION": "add", "SUBSYSTEM": "tty"})
+
+        self.detector.devices = []
+        self.watcher.refresh()
+        timer = threading.Timer(0.1, reenumerate)
+        timer.start()
+        device = self.watcher.wait_for("0240", timeout=5, match_location=True)
+        timer.join()
+        self.assertEqual(device["serial_port"], "/dev/ttyACM1")
+        self.assertIs(self.watcher.get_by_location("1-1.2"), device)
+        self.assertIsNone(self.watcher.get_by_location("1-1.3"))
+        # Another target id at the same port only matches on request
+        self.assertIsNone(self.watcher.get("0240"))
+        self.assertIs(self.watcher.get("0240", match_location=True), device)
+
+    def test_location_match_without_target_id(self):
+        self.detector.devices = [
+            {"target_id": "0240", "location": "1-1.2", "serial_port": "/dev/ttyACM0"}]
+        self.watcher.refresh()
+        self.detector.devices = [
+            {"target_id": None, "location": "1-1.2", "serial_port": "/dev/ttyACM1"}]
+        self.watcher.refresh()
+        self.assertEqual(self.watcher.get("0240")["serial_port"], "/dev/ttyACM1")
+
+    def test_stop_wakes_waiters(self):
+        threading.Timer(0.05, self.watcher.stop).start()
+        self.assertIsNone(self.watcher.wait_for("0240", timeout=5))
+
+    def test_stop_closes_source_after_thread_exits(self):
+        source = self.source
+        thread = self.watcher._thread
+        closed_while_running = []
+        original_close = source.close
+
+        def close():
+            closed_while_running.append(thread.is_alive())
+            original_close()
+
+        source.close = close
+        self.watcher.stop()
+        self.assertEqual(closed_while_running, [False])
+
+
+class PollingWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.detector = FakeDetector([{"target_id": "0240", "mount_point": None}])
+        self.watcher = DeviceWatcher(self.detector, PollingEventSource(0.01), debounce=0)
+        self.watcher.start()
+
+    def tearDown(self):
+        self.watcher.stop()
+
+    def test_idle_without_waiters(self):
+        time.sleep(0.2)
+        self.assertEqual(self.detector.calls, 1)
+
+        # Polls while a wait_for() runs, and stops again after it
+        self.assertIsNone(self.watcher.wait_for("0240", lambda d: d["mount_point"], timeout=0.2))
+        calls = self.detector.calls
+        self.assertGreater(calls, 2)
+        time.sleep(0.2)
+        self.assertLessEqual(self.detector.calls, calls + 1)
+
+    def test_stale_table_is_relisted(self):
+        time.sleep(0.05)
+        self.detector.devices = [{"target_id": "0240", "mount_point": "/mnt/D"}]
+        # The table of the idle watcher missed the change
+        device = self.watcher.wait_for("0240", timeout=0)
+        self.assertIsNone(device)
+        device = self.watcher.wait_for("0240", timeout=5)
+        self.assertEqual(device["mount_point"], "/mnt/D")
+
+        time.sleep(0.05)
+        self.detector.devices = []
+        self.assertIsNone(self.watcher.get("0240"))
+
+    def test_listener_keeps_polling(self):
+        tables = []
+        self.watcher.add_listener(tables.append)
+        time.sleep(0.2)
+        self.watcher.remove_listener(tables.append)
+        self.assertGreater(len(tables), 2)
+
+
+class SharedWatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.sources = []
+
+        def event_source():
+            self.sources.append(FakeEventSource())
+            return self.sources[-1]
+
+        self.default_event_source = watcher_module.default_event_source
+        watcher_module.default_event_source = event_source
+
+    def tearDown(self):
+        watcher_module._stop_shared_watcher()
+        watcher_module.default_event_source = self.default_event_source
+
+    def test_watcher_is_reused(self):
+        detector = FakeDetector()
+        watcher = shared_watcher(detector)
+        self.assertIs(shared_watcher(detector), watcher)
+        self.assertEqual(len(self.sources), 1)
+        self.assertEqual(detector.calls, 1)
+
+        other = shared_watcher(FakeDetector())
+        self.assertIsNot(other, watcher)
+        self.assertFalse(watcher.running)
+        self.assertEqual(len(self.sources), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+import threading
+import unittest
+from time import sleep, time
+from mock import patch
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+from mbed_os_tools.test.host_tests_conn_proxy.conn_proxy import (
+    conn_process,
+    ConnThread,
+    kv_decode,
+    kv_encode,
+    KiViBufferWalker,
+)
+
+
+class FakeConnector(object):
+    """DUT that answers __sync packets and echoes 'echo' KV pairs"""
+
+    KV_REGEX = re.compile(r"\{\{([\w\d#_-]+);((?:[^\\\}]|\\.)+)\}\}")
+
+    def __init__(self, answer_sync=True, framing=None):
+        self.answer_sync = answer_sync
+        self.framing = framing
+        self.written = []
+        self.rx = Queue()
+        self.resets = 0
+        self.finished = False
+        self.read_fd = 0
+
+    def read(self, count, timeout=None):
+        try:
+            return self.rx.get(timeout=timeout)
+        except Empty:
+            return b""
+
+    def write(self, payload, log=False):
+        self.written.append(payload)
+        for key, value in self.KV_REGEX.findall(payload):
+            if key == "__sync" and self.answer_sync or key.startswith("echo"):
+                self.rx.put(("{{%s;%s}}\n" % (key, value)).encode("utf-8"))
+            if key == "__sync" and self.framing:
+                self.rx.put(("{{__framing;%s}}\n" % self.framing).encode("utf-8"))
+        return True
+
+    def write_kv(self, key, value):
+        kv_buff = "{{%s;%s}}\n" % (key, value)
+        return kv_buff if self.write(kv_buff) else None
+
+    def reset(self):
+        self.resets += 1
+
+    def connected(self):
+        return not self.finished
+
+    def error(self):
+        return "error"
+
+    def finish(self):
+        self.finished = True
+
+
+class ConnProcessTestCase(unittest.TestCase):
+
+    def _start(self, connector, **config):
+        self.event_queue = Queue()
+        self.dut_event_queue = Queue()
+        config.setdefault("sync_behavior", 1)
+        config.setdefault("sync_timeout", 0.1)
+        patcher = patch(
+            "mbed_os_tools.test.host_tests_conn_proxy.conn_proxy.conn_primitive_factory",
+            return_value=connector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        thread = threading.Thread(
+            target=conn_process, args=(self.event_queue, self.dut_event_queue, config))
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _wait_for(self, key, timeout=5):
+        deadline = time() + timeout
+        while True:
+            event = self.event_queue.get(timeout=max(0, deadline - time()))
+            if event[0] == key:
+                return event
+
+    def test_echo(self):
+        connector = FakeConnector()
+        thread = self._start(connector)
+        self._wait_for("__conn_process_start")
+        self._wait_for("__sync")
+
+        self.dut_event_queue.put(("echo", "1234", time()))
+        self.assertEqual(self._wait_for("echo")[1], "1234")
+
+        self.dut_event_queue.put(("__host_test_finished", True, time()))
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertTrue(connector.finished)
+
+    def _wait_for_write(self, connector, prefix, timeout=5):
+        deadline = time() + timeout
+        while time() < deadline:
+            if [p for p in connector.written if p.startswith(prefix)]:
+                return
+            sleep(0.01)
+        self.fail("%s not written" % prefix)
+
+    def test_framing(self):
+        connector = FakeConnector(framing=2)
+        thread = self._start(connector)
+        self._wait_for("__sync")
+        self._wait_for_write(connector, "{{__framing;2;b64")
+
+        # Binary values are sent encoded and come back as bytes
+        self.dut_event_queue.put(("echo", b"\x00}}\n\xff", time()))
+        self.assertEqual(self._wait_for("echo")[1], b"\x00}}\n\xff")
+        self.dut_event_queue.put(("echo", "{{a;b}}", time()))
+        self.assertEqual(self._wait_for("echo")[1], "{{a;b}}")
+
+        self.dut_event_queue.put(("__host_test_finished", True, time()))
+        thread.join(5)
+
+    def test_framing_disabled(self):
+        connector = FakeConnector(framing=2)
+        thread = self._start(connector, kv_framing=1)
+        self._wait_for("__sync")
+        self._wait_for_write(connector, "{{__framing;1;")
+        self.dut_event_queue.put(("echo", "a\\b", time()))
+        self.assertEqual(self._wait_for("echo")[1], "a\\b")
+        self.dut_event_queue.put(("__host_test_finished", True, time()))
+        thread.join(5)
+
+    def test_sync_failed(self):
+        connector = FakeConnector(answer_sync=False)
+        thread = self._start(connector, sync_behavior=2)
+        self._wait_for("__notify_sync_failed")
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        # The second __sync packet is sent after a reset
+        self.assertEqual(connector.resets, 1)
+
+    def test_sync_failed_after_last_sync(self):
+        connector = FakeConnector(answer_sync=False)
+        self._start(connector, sync_behavior=2, sync_timeout=1.0)
+        start = time()
+        self._wait_for("__notify_sync_failed")
+        # One sync_timeout before the second __sync, not another one after it
+        self.assertLess(time() - start, 1.7)
+
+    def test_reset_waits_for_read(self):
+        connector = FakeConnector()
+        overlaps = []
+        reading = threading.Event()
+        read = connector.read
+
+        def slow_read(count, timeout=None):
+            reading.set()
+            try:
+                return read(count, timeout)
+            finally:
+                reading.clear()
+
+        def reset():
+            overlaps.append(reading.is_set())
+            connector.resets += 1
+
+        connector.read = slow_read
+        connector.reset = reset
+        thread = self._start(connector)
+        self._wait_for("__sync")
+        for _ in range(3):
+            self.dut_event_queue.put(("__reset", 0, time()))
+            self._wait_for("reset_complete")
+        self.assertEqual(overlaps, [False, False, False])
+
+        self.dut_event_queue.put(("__host_test_finished", True, time()))
+        thread.join(5)
+
+    def test_conn_lost(self):
+        connector = FakeConnector()
+        thread = self._start(connector)
+        self._wait_for("__sync")
+        connector.finished = True
+        self.assertEqual(self._wait_for("__notify_conn_lost")[1], "error")
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+
+class ConnThreadTestCase(unittest.TestCase):
+
+    def test_terminate(self):
+        connector = FakeConnector(answer_sync=False)
+        event_queue, dut_event_queue = Queue(), Queue()
+        with patch(
+                "mbed_os_tools.test.host_tests_conn_proxy.conn_proxy.conn_primitive_factory",
+                return_value=connector):
+            # Sends __sync packets until terminated
+            thread = ConnThread(event_queue, dut_event_queue,
+                                {"sync_behavior": -1, "sync_timeout": 0.1})
+            thread.start()
+            self.assertEqual(event_queue.get(timeout=5)[0], "__conn_process_start")
+            thread.terminate(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(thread.exitcode, 0)
+        self.assertTrue(connector.finished)
+
+
+class KiViBufferWalkerTestCase(unittest.TestCase):
+
+    def test_split_reads(self):
+        walker = KiViBufferWalker()
+        self.assertEqual(walker.append(b"hello\n{{ti"), ["hello"])
+        self.assertFalse(walker.search())
+        self.assertEqual(walker.append(b"meout;10}}"), [])
+        self.assertFalse(walker.search())
+        self.assertEqual(walker.append(b" tail\r\n{{end;success}}\n"), [" tail"])
+        self.assertEqual(walker.pop_kv()[:2], ("timeout", "10"))
+        self.assertEqual(walker.pop_kv()[:2], ("end", "success"))
+        self.assertFalse(walker.search())
+        self.assertEqual(walker.pop_kv()[:2], (None, None))
+        self.assertEqual(walker.buff, bytearray())
+
+    def test_multibyte_character_split(self):
+        walker = KiViBufferWalker()
+        payload = u"caf\u00e9\n".encode("utf-8")
+        self.assertEqual(walker.append(payload[:4]), [])
+        self.assertEqual(walker.append(payload[4:]), [u"caf\u00e9"])
+
+    def test_original_framing_one_kv_per_line(self):
+        walker = KiViBufferWalker()
+        self.assertEqual(walker.append(b"{{a;1}}{{b;2\\}}\n"), ["{{b;2\\}}"])
+        self.assertEqual(walker.pop_kv()[:2], ("a", "1"))
+        self.assertFalse(walker.search())
+
+    def test_framing_2(self):
+        walker = KiViBufferWalker()
+        walker.framing = 2
+        key, value = kv_encode("bin", bytearray(range(256)), 2)
+        line = "pre {{a;1}} mid{{b;x\\}y\\\\}}{{%s;%s}}{{c#b64;AAE=}} post\n" % (key, value)
+        self.assertEqual(walker.append(line.encode("utf-8")), ["pre", "mid", "post"])
+        self.assertEqual(walker.pop_kv()[:2], ("a", "1"))
+        self.assertEqual(walker.pop_kv()[:2], ("b", "x}y\\"))
+        self.assertEqual(walker.pop_kv()[:2], ("bin", bytes(bytearray(range(256)))))
+        self.assertEqual(walker.pop_kv()[:2], ("c", b"\x00\x01"))
+        self.assertFalse(walker.search())
+
+    def test_framing_2_malformed_binary(self):
+        walker = KiViBufferWalker()
+        walker.framing = 2
+        self.assertEqual(walker.append(b"{{c#b64;A}}\n"), ["{{c#b64;A}}"])
+        self.assertFalse(walker.search())
+
+    def test_escape_round_trip(self):
+        for value in ["", "a;b", "}}{{", "\\", "line\r\n", "\\n"]:
+            key, encoded = kv_encode("k", value, 2)
+            self.assertNotIn("}", encoded.replace("\\}", ""))
+            self.assertEqual(kv_decode(encoded), value)
+
+    def test_invalid_utf8(self):
+        walker = KiViBufferWalker()
+        self.assertEqual(walker.append(b"{{key;va\xfflue}}\n"), [])
+        self.assertEqual(walker.pop_kv()[:2], ("key", "value"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import unittest
+from multiprocessing import Process
+from time import time
+
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
+from mbed_os_tools.test.host_tests_conn_proxy.event_pipe import EventPipe
+
+
+def produce(event_queue, batches):
+    for batch in batches:
+        event_queue.put_many(batch)
+    event_queue.put(('done', None, 3.0))
+
+
+class EventPipeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.event_queue = EventPipe()
+
+    def tearDown(self):
+        self.event_queue.close()
+
+    def test_events_from_other_process(self):
+        batches = [
+            [('__rxd_line', 'line %d' % i, 1.0 + i) for i in range(j, j + 10)]
+            for j in range(0, 100, 10)
+        ]
+        p = Process(target=produce, args=(self.event_queue, batches))
+        p.start()
+        received = []
+        while True:
+            event = self.event_queue.get(timeout=10)
+            if event[0] == 'done':
+                break
+            received.append(event)
+        p.join()
+        self.assertEqual(received, [e for batch in batches for e in batch])
+        self.assertTrue(self.event_queue.empty())
+
+    def test_local_events(self):
+        self.event_queue.put(('__exit_event_queue', 0, 1.0))
+        self.assertFalse(self.event_queue.empty())
+        self.assertEqual(self.event_queue.get(timeout=1), ('__exit_event_queue', 0, 1.0))
+        self.assertRaises(Empty, self.event_queue.get, timeout=0.01)
+        self.assertRaises(Empty, self.event_queue.get_nowait)
+
+    def test_get_wakes_up_on_put(self):
+        timer = threading.Timer(0.1, self.event_queue.put, args=(('key', 'value', 1.0),))
+        timer.start()
+        start = time()
+        self.assertEqual(self.event_queue.get(timeout=10), ('key', 'value', 1.0))
+        self.assertLess(time() - start, 5)
+        timer.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,10 +13,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import unittest
 from copy import copy
 from mbed_os_tools.test import init_host_test_cli_params
 from mbed_os_tools.test.host_tests_runner.host_test_default  import DefaultTestSelector
+from mbed_os_tools.test.mbed_test_api import run_htrun_in_process
 
 from .mocks.environment.linux import MockTestEnvironmentLinux
 from .mocks.environment.darwin import MockTestEnvironmentDarwin
@@ -58,5 +60,27 @@ class BlackBoxHostTestTestCase(unittest.TestCase):
             MockTestEnvironmentWindows(self, win_mock_platform_info, mock_image_path)
         )
 
+    def test_host_test_in_process(self):
+        with MockTestEnvironmentLinux(self, mock_platform_info, mock_image_path):
+            returncode, capture = run_htrun_in_process(sys.argv, False)
+        output = capture.getvalue()
+
+        self.assertEqual(returncode, 0)
+        self.assertIn("[HTST][INF] {{result;success}}\n", output)
+        self.assertIn("[HTST][INF] CONN exited with code: 0\n", output)
+        self.assertIn("[CONN][INF] starting connection process...\n", output)
+
+    def test_host_test_timeout(self):
+        with MockTestEnvironmentLinux(self, mock_platform_info, mock_image_path):
+            returncode, capture = run_htrun_in_process(sys.argv + ["--test-timeout", "7"], False)
+        output = capture.getvalue()
+
+        self.assertEqual(returncode, 0)
+        # The 60 sec polling timeout (-P 60) is longer, it is kept
+        polling = output.index("[HTST][INF] setting timeout to: 60 sec\n")
+        # Instead of the 15 sec the device asks for
+        self.assertGreater(output.index("[HTST][INF] setting timeout to: 7 sec\n"), polling)
+        self.assertNotIn("setting timeout to: 15 sec", output)
+
 if __name__ == '__main__':
     unittest.main()
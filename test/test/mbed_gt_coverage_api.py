@@ -43,6 +43,31 @@ class GreenteaCoverageAPI(unittest.TestCase):
         r = mbed_coverage_api.coverage_pack_hex_payload('.6164636772.')    # '.' -> 0x00
         self.assertEqual(bytearray(b'\x00adcgr\x00'), r)
 
+    def test_coverage_unpack_hex_chunks(self):
+        payload = '.6164..636772.' * 10 + '6'
+        expected = b''.join(mbed_coverage_api.coverage_unpack_hex_chunks(payload))
+        self.assertEqual(expected, b'\x00ad\x00\x00cgr\x00' * 10)
+        # Dots and hex digit pairs may be split over chunks
+        for chunk_size in (1, 2, 3, 7):
+            chunks = list(mbed_coverage_api.coverage_unpack_hex_chunks(payload, chunk_size))
+            self.assertEqual(b''.join(chunks), expected)
+
+        with self.assertRaises(ValueError):
+            mbed_coverage_api.coverage_pack_hex_payload('61zz')
+
+    def test_coverage_dump_hex_payload(self):
+        import shutil
+        import tempfile
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            size = mbed_coverage_api.coverage_dump_hex_payload(tmp_dir, "no-such-dir/a.gcda", ".6164636772.")
+            self.assertEqual(size, 7)
+            with open(os.path.join(tmp_dir, "a.gcda"), "rb") as f:
+                self.assertEqual(f.read(), b'\x00adcgr\x00')
+        finally:
+            shutil.rmtree(tmp_dir)
+
     def test_coverage_dump_file_valid(self):
         import tempfile
 
@@ -0,0 +1,126 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from appdirs import user_data_dir
+
+from mbed_os_tools.test.mbed_duration_store import (
+    DurationStore,
+    binary_hash,
+    percentile,
+)
+
+
+def make_result(duration, image_path=None):
+    return {
+        "K64F-GCC_ARM": {
+            "tests-basic": {
+                "platform_name": "K64F",
+                "elapsed_time": duration,
+                "image_path": image_path,
+                "single_test_result": "OK",
+                "testcase_result": {
+                    "case-1": {"duration": duration / 2},
+                    "case-2": {"duration": 1.0},
+                },
+            },
+        },
+    }
+
+
+class DurationStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = DurationStore(os.path.join(self.tmp_dir, "durations.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_default_path(self):
+        self.assertEqual(os.path.dirname(DurationStore.DEFAULT_PATH), user_data_dir("mbedgt"))
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([3.0], 0.95), 3.0)
+
+    def test_binary_hash(self):
+        path = os.path.join(self.tmp_dir, "test.bin")
+        with open(path, "wb") as f:
+            f.write(b"abc")
+        self.assertEqual(binary_hash(path), "a9993e364706816aba3e25717850c26c9cd0d89d")
+        self.assertEqual(binary_hash(os.path.join(self.tmp_dir, "missing.bin")), "")
+
+    def test_record_test_results(self):
+        for duration in (10.0, 20.0, 30.0):
+            self.store.record_test_results(make_result(duration))
+        self.assertEqual(self.store.stats("tests-basic", "K64F"), (20.0, 30.0))
+        self.assertEqual(self.store.stats("tests-basic", "K64F", "case-1"), (10.0, 15.0))
+        self.assertIsNone(self.store.stats("tests-basic", "NRF51_DK"))
+        self.assertEqual(self.store.expected_durations(), {("K64F", "tests-basic"): 20.0})
+        self.assertEqual(self.store.expected_durations("NRF51_DK"), {})
+
+    def test_timeout(self):
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600), 600)
+        self.store.record("b", "tests-basic", "K64F", 20.0)
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600), 50)
+
+    def test_timeout_binary_hash(self):
+        old_path = os.path.join(self.tmp_dir, "old.bin")
+        new_path = os.path.join(self.tmp_dir, "new.bin")
+        for path, content in ((old_path, b"old"), (new_path, b"new")):
+            with open(path, "wb") as f:
+                f.write(content)
+        self.store.record("b", "tests-basic", "K64F", 100.0, image_path=old_path)
+        # Without runs of the binary all runs are used
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600, image_path=new_path), 210)
+        self.store.record("b", "tests-basic", "K64F", 20.0, image_path=new_path)
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600, image_path=new_path), 50)
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600, image_path=old_path), 210)
+        self.assertEqual(self.store.timeout("tests-basic", "K64F", 600), 210)
+
+    def test_regressions(self):
+        for _ in range(5):
+            self.store.record_test_results(make_result(10.0))
+        self.assertEqual(self.store.regressions(make_result(12.0)), [])
+        self.assertEqual(
+            self.store.regressions(make_result(40.0)),
+            [("K64F-GCC_ARM", "tests-basic", 40.0, 10.0)])
+
+    def test_concurrent_writes(self):
+        def worker(index):
+            for i in range(20):
+                self.store.record("b", "test-%d" % index, "K64F", float(i))
+            self.store.close()
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        durations = self.store.expected_durations("K64F")
+        self.assertEqual(len(durations), 4)
+        self.assertEqual(len(self.store.durations("test-0", "K64F")), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
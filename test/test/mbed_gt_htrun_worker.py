@@ -0,0 +1,113 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import os
+import unittest
+from mock import patch
+
+from mbed_os_tools.test.mbed_htrun_worker import HtrunWorker
+from mbed_os_tools.test.mbed_test_api import (
+    RUN_HOST_TEST_POPEN_ERROR,
+    HtrunOutputCapture,
+    HtrunOutputParser,
+    TEST_RESULT_ERROR,
+    TEST_RESULT_OK,
+)
+
+HTRUN_OUTPUT = (
+    "[1459246276.95][CONN][INF] found KV pair in stream: {{__testcase_start;A}}, queued...\n"
+    "[1459246276.96][CONN][INF] found KV pair in stream: {{__testcase_finish;A;1;0}}, queued...\n"
+    "[1459246276.97][HTST][INF] {{result;success}}\n"
+)
+
+
+def fake_run_htrun_in_process(cmd, verbose, parser=None, capture=None):
+    if cmd[1:] == ["--crash"]:
+        os._exit(1)
+    output = "pid=%d\n%s" % (os.getpid(), HTRUN_OUTPUT)
+    if cmd[1:] == ["--long"]:
+        output += "[1459246277.00][CONN][RXD] %s\n" % ("x" * 100) * 20000
+    if parser is not None:
+        parser.feed(output)
+    if capture is None:
+        capture = HtrunOutputCapture()
+    capture.write(output)
+    return 0, capture
+
+
+# The worker process inherits the patch only when it is forked
+@unittest.skipIf(multiprocessing.get_start_method() != "fork", "requires fork")
+class HtrunWorkerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch(
+            "mbed_os_tools.test.mbed_htrun_worker.run_htrun_in_process",
+            new=fake_run_htrun_in_process)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_runs_jobs_in_one_process(self):
+        with HtrunWorker("K64F") as worker:
+            first = worker.run(["mbedhtrun", "-f", "a.bin"])
+            second = worker.run(["mbedhtrun", "-f", "b.bin"])
+            pid = worker.process.pid
+        self.assertIsNone(worker.process)
+
+        for result in (first, second):
+            self.assertEqual(result.returncode, 0)
+            self.assertEqual(result.result, TEST_RESULT_OK)
+            self.assertEqual(result.testcase_result["A"]["result_text"], TEST_RESULT_OK)
+            self.assertTrue(result.output.startswith("pid=%d\n" % pid))
+
+    def test_parser(self):
+        parser = HtrunOutputParser()
+        with HtrunWorker() as worker:
+            result = worker.run(["mbedhtrun"], parser=parser)
+        # The worker fed its copy
+        self.assertIsNot(result.parser, parser)
+        self.assertEqual(result.parser.test_result(), TEST_RESULT_OK)
+        self.assertEqual(result.parser.testcase_count_and_names(), (0, []))
+
+    def test_long_output(self):
+        with HtrunWorker() as worker:
+            result = worker.run(["mbedhtrun", "--long"], prefix="htrun-long-")
+        try:
+            # Only the tail is sent back, the worker wrote the rest to a log file
+            self.assertEqual(len(result.output), HtrunOutputCapture.TAIL_SIZE)
+            self.assertTrue(os.path.basename(result.output_path).startswith("htrun-long-"))
+            with open(result.output_path) as f:
+                output = f.read()
+            self.assertTrue(output.startswith("pid="))
+            self.assertTrue(output.endswith(result.output))
+        finally:
+            os.remove(result.output_path)
+
+        with HtrunWorker() as worker:
+            self.assertIsNone(worker.run(["mbedhtrun"]).output_path)
+
+    def test_worker_died(self):
+        with HtrunWorker() as worker:
+            result = worker.run(["mbedhtrun", "--crash"])
+            self.assertEqual(result.returncode, RUN_HOST_TEST_POPEN_ERROR)
+            self.assertEqual(result.result, TEST_RESULT_ERROR)
+            self.assertIsNone(worker.process)
+
+            # The next job starts a new worker
+            self.assertEqual(worker.run(["mbedhtrun"]).returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
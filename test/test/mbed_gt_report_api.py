@@ -15,6 +15,7 @@
 
 import json
 import os
+import shutil
 import six
 import sys
 import tempfile
@@ -155,6 +156,18 @@ class GreenteaReportApiFunctionality(unittest.TestCase):
         self.assertIn("suite", line)
         self.assertIn("case-1", line)
 
+    def test_get_test_output(self):
+        suite = self.test_case_data["K64F-ARM"]["suite"]
+        self.assertEqual(mbed_report_api.get_test_output(suite), "OK")
+
+        suite["single_test_output_path"] = "/tmp/htrun-suite.log"
+        output = mbed_report_api.get_test_output(suite)
+        self.assertIn("/tmp/htrun-suite.log", output)
+        self.assertTrue(output.endswith("\nOK"))
+
+        result = mbed_report_api.exporter_testcase_junit(self.test_case_data)
+        self.assertIn("/tmp/htrun-suite.log", result)
+
     def test_exporter_testcase_junit(self):
         result = mbed_report_api.exporter_testcase_junit(self.test_case_data)
         self.assertIsNotNone(result)
@@ -174,3 +187,70 @@ class GreenteaReportApiFunctionality(unittest.TestCase):
         self.assertEqual(child.attrib["tests"], "3")
         self.assertEqual(child.attrib["errors"], "1")
         self.assertEqual(child.attrib["time"], "3.0")
+
+    def test_report_writers(self):
+        test_result_ext = {
+            "K64F-ARM": {
+                "test-1": self.make_suite_results("OK"),
+                "test-2": self.make_suite_results("FAIL"),
+            },
+            "K64F-GCC_ARM": {
+                "test-1": self.make_suite_results("OK"),
+            },
+        }
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            paths = [os.path.join(tmp_dir, "report" + ext) for ext in (".json", ".xml", ".html")]
+            writers = [
+                mbed_report_api.JsonReportWriter(paths[0]),
+                mbed_report_api.JUnitReportWriter(paths[1]),
+                mbed_report_api.HtmlReportWriter(paths[2]),
+            ]
+            with mbed_report_api.ReportWriterGroup(writers) as group:
+                group.add_test_results(test_result_ext)
+
+            with open(paths[0]) as f:
+                report = f.read()
+            self.assertEqual(json.loads(report), test_result_ext)
+            self.assertEqual(report, mbed_report_api.exporter_json(test_result_ext))
+
+            from xml.etree import ElementTree as ET
+            xml = ET.parse(paths[1]).getroot()
+            expected = ET.fromstring(mbed_report_api.exporter_testcase_junit(test_result_ext))
+            self.assertEqual(xml.attrib, expected.attrib)
+            self.assertEqual(len(xml), 3)
+            self.assertEqual(len(xml.findall("testsuite/testcase")), 6)
+
+            with open(paths[2]) as f:
+                html = f.read()
+            self.assertTrue(html.endswith("</html>"))
+            self.assertEqual(html.count('<div class="result '), 4)
+            self.assertIn("NOT_RAN", html)
+            self.assertIn("target_K64F_toolchain_GCC_ARM_test_test_1", html)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_report_writer_abstract(self):
+        self.assertRaises(TypeError, mbed_report_api.ReportWriter, "report.txt")
+
+    def make_suite_results(self, result):
+        return {
+            "single_test_result": result,
+            "single_test_output": "output of the test\n",
+            "elapsed_time": 1.5,
+            "build_path": "build",
+            "build_path_abs": "/build",
+            "copy_method": "shell",
+            "image_path": "build/test.bin",
+            "platform_name": "K64F",
+            "testcase_result": {
+                "case-1": {"passed": 1, "failed": 0, "result_text": "OK", "duration": 0.5,
+                           "time_start": 1.0, "time_end": 1.5, "utest_log": ["a", "b"]},
+                "case-2": {"passed": 0, "failed": 1, "result_text": result, "duration": 0.5,
+                           "time_start": 1.5, "time_end": 2.0, "utest_log": ["\x01c"]},
+            },
+        }
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+from appdirs import user_data_dir
+
+from mbed_os_tools.test import mbed_report_api
+from mbed_os_tools.test.mbed_results_store import ResultsStore, get_testcase_rows
+
+
+def make_result(k64f_result="OK", duration=1.0):
+    return {
+        "K64F-GCC_ARM": {
+            "tests-basic": {
+                "platform_name": "K64F",
+                "single_test_result": k64f_result,
+                "elapsed_time": 10.0,
+                "copy_method": "shell",
+                "memory_metrics": {
+                    "max_heap": 2284,
+                    "reserved_heap": 124124,
+                    "thread_stack_summary": {
+                        "max_stack_size": 4096,
+                        "max_stack_usage": 1024,
+                        "max_stack_usage_total": 2048,
+                        "reserved_stack_total": 8192,
+                    },
+                },
+                "testcase_result": {
+                    "case-1": {"result_text": k64f_result, "passed": 1, "failed": 0, "duration": duration},
+                    "case-2": {"result_text": "OK", "passed": 1, "failed": 0, "duration": 0.5},
+                },
+            },
+        },
+        "frdm-k64f-ARM": {
+            "tests-empty": {
+                "platform_name": "frdm-k64f",
+                "single_test_result": "TIMEOUT",
+                "elapsed_time": 60.0,
+                "testcase_result": {},
+            },
+        },
+    }
+
+
+class ResultsStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "results.db")
+        self.store = ResultsStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_default_path(self):
+        self.assertEqual(os.path.dirname(ResultsStore.DEFAULT_PATH), user_data_dir("mbedgt"))
+
+    def test_testcase_rows(self):
+        rows = sorted(get_testcase_rows(1, make_result()))
+        self.assertEqual(len(rows), 3)
+        row = rows[0]
+        self.assertEqual(row[:6], (1, "K64F-GCC_ARM", "K64F", "GCC_ARM", "tests-basic", "case-1"))
+        self.assertEqual(row[-6:], (2284, 124124, 4096, 1024, 2048, 8192))
+        # Test suites without test cases get a row of their own
+        row = rows[2]
+        self.assertEqual(row[2:6], ("frdm-k64f", "ARM", "tests-empty", ""))
+        self.assertEqual(row[8], "TIMEOUT")
+
+    def test_queries(self):
+        self.store.add_run(make_result("FAIL", 3.0), name="job-1")
+        self.store.add_run(make_result("OK", 2.0), name="job-2")
+        self.assertEqual([run[1] for run in self.store.runs()], ["job-2", "job-1"])
+
+        rates = self.store.failure_rate_by_platform()
+        self.assertEqual(rates[0], ("frdm-k64f", 2, 2, 1.0))
+        self.assertEqual(rates[1], ("K64F", 1, 4, 0.25))
+        rates = self.store.failure_rate_by_platform(last_runs=1)
+        self.assertEqual(rates[1], ("K64F", 0, 2, 0.0))
+
+        slowest = self.store.slowest_testcases(limit=2, platform="K64F")
+        self.assertEqual(slowest[0], ("tests-basic", "case-1", "K64F", 2.5, 3.0, 2))
+        self.assertEqual(len(slowest), 2)
+        self.assertEqual(self.store.slowest_testcases(limit=1)[0][1], "")
+        # Aggregates over all runs match the test case rows
+        self.assertEqual(self.store.slowest_testcases(), self.store.slowest_testcases(last_runs=2))
+        self.assertEqual(self.store.failure_rate_by_platform(), self.store.failure_rate_by_platform(last_runs=2))
+
+        metrics = self.store.memory_metrics("tests-basic", last_runs=1)
+        self.assertEqual(len(metrics), 1)
+        self.assertEqual(metrics[0][2:], (2284, 124124, 4096, 1024, 2048, 8192))
+
+    def test_export_to_results_store(self):
+        self.assertTrue(mbed_report_api.export_to_results_store(self.path, make_result(), name="ci"))
+        self.assertEqual(self.store.runs()[0][1], "ci")
+        self.assertEqual(self.store.query("SELECT COUNT(*) FROM testcases")[0][0], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
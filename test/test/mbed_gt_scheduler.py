@@ -0,0 +1,139 @@
+# Copyright (c) 2018, Arm Limited and affiliates.
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+try:
+    from Queue import Empty
+except ImportError:
+    # Python 3
+    from queue import Empty
+
+from mbed_os_tools.test.tests_spec import TestSpec
+from mbed_os_tools.test.mbed_greentea_scheduler import (
+    TestJob,
+    TestScheduler,
+    jobs_from_test_spec,
+)
+
+from .mbed_gt_tests_spec import simple_test_spec
+
+k64f_1 = {"platform_name": "K64F", "target_id": "0240_1"}
+k64f_2 = {"platform_name": "K64F", "target_id": "0240_2"}
+nrf51 = {"platform_name": "NRF51_DK", "target_id": "1100_1"}
+
+
+class TestSchedulerTestCase(unittest.TestCase):
+
+    def test_jobs_from_test_spec(self):
+        test_spec = TestSpec()
+        test_spec.parse(simple_test_spec)
+        durations = {("K64F", "mbed-drivers-test-c_strings"): 12.0}
+        jobs = jobs_from_test_spec(test_spec, durations)
+        self.assertEqual(len(jobs), 3)
+        job = [j for j in jobs if j.test_name == "mbed-drivers-test-c_strings"][0]
+        self.assertEqual(job.build_name, "K64F-ARM")
+        self.assertEqual(job.platform_name, "K64F")
+        self.assertEqual(job.image_path, "./.build/K64F/ARM/mbed-drivers-test-c_strings.bin")
+        self.assertEqual(job.expected_duration, 12.0)
+
+    def test_longest_first(self):
+        jobs = [
+            TestJob("b", "short", "K64F", "short.bin", 1),
+            TestJob("b", "unknown", "K64F", "unknown.bin"),
+            TestJob("b", "long", "K64F", "long.bin", 9),
+        ]
+        scheduler = TestScheduler([k64f_1], jobs)
+        names = [scheduler.next_job(k64f_1).test_name for _ in range(3)]
+        # Jobs without history are expected to take the average time
+        self.assertEqual(names, ["long", "unknown", "short"])
+        self.assertIsNone(scheduler.next_job(k64f_1))
+
+    def test_platform_and_image_affinity(self):
+        jobs = [
+            TestJob("b", "a", "K64F", "a.bin", 10),
+            TestJob("b", "nrf", "NRF51_DK", "nrf.bin", 8),
+            TestJob("b", "b", "K64F", "b.bin", 5),
+            TestJob("c", "a", "K64F", "a.bin", 1),
+        ]
+        scheduler = TestScheduler([k64f_1, nrf51], jobs)
+        self.assertEqual(scheduler.next_job(nrf51).test_name, "nrf")
+        self.assertIsNone(scheduler.next_job(nrf51))
+        self.assertEqual(scheduler.next_job(k64f_1).image_path, "a.bin")
+        # Same image as the device already has, before the longer job
+        job = scheduler.next_job(k64f_1)
+        self.assertEqual((job.build_name, job.image_path), ("c", "a.bin"))
+        self.assertEqual(scheduler.next_job(k64f_1).image_path, "b.bin")
+
+    def test_work_stealing(self):
+        jobs = [TestJob("b", str(i), "K64F", "%d.bin" % i, d) for i, d in enumerate([8, 6, 4, 3, 2, 1])]
+        jobs.append(TestJob("b", "nrf", "NRF51_DK", "nrf.bin", 1))
+        scheduler = TestScheduler([k64f_1, k64f_2, nrf51], jobs)
+        # Dealt longest first to the device with the least work queued
+        self.assertEqual([j.test_name for j in scheduler.queues["0240_1"].jobs], ["0", "3", "5"])
+        self.assertEqual([j.test_name for j in scheduler.queues["0240_2"].jobs], ["1", "2", "4"])
+
+        self.assertEqual(scheduler.next_job(k64f_1).test_name, "0")
+        for name in ["1", "2", "4"]:
+            self.assertEqual(scheduler.next_job(k64f_2).test_name, name)
+        # Steals the shortest job of the other K64F, never the NRF51_DK's
+        self.assertEqual(scheduler.next_job(k64f_2).test_name, "5")
+        self.assertEqual(scheduler.next_job(k64f_2).test_name, "3")
+        self.assertIsNone(scheduler.next_job(k64f_2))
+        self.assertIsNone(scheduler.next_job(k64f_1))
+        self.assertEqual(scheduler.next_job(nrf51).test_name, "nrf")
+
+    def test_same_image_dealt_together(self):
+        jobs = [
+            TestJob("b", "a", "K64F", "a.bin", 10),
+            TestJob("b", "b", "K64F", "b.bin", 9),
+            TestJob("c", "a", "K64F", "a.bin", 8),
+        ]
+        scheduler = TestScheduler([k64f_1, k64f_2], jobs)
+        self.assertEqual([j.image_path for j in scheduler.queues["0240_1"].jobs], ["a.bin", "a.bin"])
+
+    def test_queue(self):
+        jobs = [TestJob("b", "a", "K64F", "a.bin", 1), TestJob("b", "b", "K64F", "b.bin", 2)]
+        scheduler = TestScheduler([k64f_1, k64f_2], jobs)
+        queue_1, queue_2 = scheduler.queue(k64f_1), scheduler.queue(k64f_2)
+        self.assertFalse(queue_1.empty())
+        # The job queue_1 has taken can't be stolen
+        self.assertEqual(queue_2.get(False).test_name, "a")
+        self.assertTrue(queue_2.empty())
+        self.assertRaises(Empty, queue_2.get, False)
+        self.assertEqual(queue_1.get(False).test_name, "b")
+        self.assertTrue(queue_1.empty())
+
+    def test_run(self):
+        jobs = [TestJob("b", str(i), "K64F", "%d.bin" % i, i) for i in range(10)]
+        jobs.append(TestJob("b", "other", "NUCLEO_F401RE", "other.bin", 1))
+        scheduler = TestScheduler([k64f_1, k64f_2], jobs)
+
+        def run_job(mut, job):
+            if job.test_name == "3":
+                raise ValueError("device lost")
+            return mut["target_id"]
+
+        done = scheduler.run(run_job)
+        self.assertEqual(sorted(job.test_name for job in done), [str(i) for i in range(10)])
+        for job in done:
+            if job.test_name == "3":
+                self.assertIsNone(job.result)
+            else:
+                self.assertEqual(job.result, job.mut["target_id"])
+        self.assertEqual([job.test_name for job in scheduler.unschedulable()], ["other"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from __future__ import print_function
+
+import os
 import unittest
 from mbed_os_tools.test import mbed_test_api
 from mock import patch, MagicMock
@@ -589,6 +592,147 @@ Plugin info: HostTestPluginBase::BasePlugin: Waiting up to 60 sec for '024000003
         result = mbed_test_api.get_testcase_result(self.OUTPUT_STARTTAG_MISSING)
         self.assertEqual(result['DNS query']['utest_log'], "__testcase_start tag not found.")
 
+    def test_htrun_output_parser(self):
+        outputs = [v for k, v in sorted(vars(self).items()) if k.startswith("OUT")]
+        for output in outputs:
+            parser = mbed_test_api.HtrunOutputParser()
+            for line in output.splitlines(True):
+                parser.feed(line)
+            self.assertEqual(parser.test_result(), mbed_test_api.get_test_result(output))
+            self.assertEqual(parser.testcase_summary(), mbed_test_api.get_testcase_summary(output))
+            self.assertEqual(parser.memory_metrics(), mbed_test_api.get_memory_metrics(output))
+            self.assertEqual(
+                parser.testcase_count_and_names(),
+                mbed_test_api.get_testcase_count_and_names(output))
+            testcase_result = parser.testcase_result()
+            for testcase_id, tc in testcase_result.items():
+                if isinstance(tc['utest_log'], list) and tc['utest_log']:
+                    self.assertEqual(
+                        tc['utest_log'],
+                        mbed_test_api.get_testcase_utest(output, testcase_id))
+            self.assertEqual(testcase_result, mbed_test_api.get_testcase_result(output))
+
+    def test_htrun_output_parser_utest_log(self):
+        output = (
+            "[1.00][CONN][RXD] >>> Running case #1: 'it's'...\n"
+            "[1.01][CONN][RXD] {{__testcase_start;it's}}\n"
+            "[1.02][CONN][RXD] >>> Running case #2: 'it'...\n"
+            "[1.03][CONN][RXD] {{__testcase_finish;it's;1;0}}\n"
+            "[1.04][CONN][RXD] >>> 'it's': 1 passed, 0 failed\n"
+            "[1.05][CONN][RXD] {{__testcase_finish;it;0;1}}\n"
+            "[1.06][CONN][RXD] >>> 'it': 0 passed, 1 failed"
+        )
+        parser = mbed_test_api.HtrunOutputParser()
+        # Lines may be split anywhere
+        for i in range(0, len(output), 7):
+            parser.feed(output[i:i + 7])
+        result = parser.testcase_result()
+        self.assertEqual(result["it's"]['utest_log'], mbed_test_api.get_testcase_utest(output, "it's"))
+        self.assertEqual(len(result["it's"]['utest_log']), 5)
+        self.assertEqual(result["it's"]['result_text'], 'OK')
+        self.assertEqual(result["it"]['utest_log'], "__testcase_start tag not found.")
+        self.assertEqual(parser.testcase_utest("it"), mbed_test_api.get_testcase_utest(output, "it"))
+
+    def test_htrun_output_parser_printable_only(self):
+        output = (
+            u"[1.00][CONN][RXD] >>> Running case #1: 'Caf\xe9 \ufffd'...\n"
+            u"[1.01][CONN][INF] found KV pair in stream: {{__testcase_start;Caf\xe9 \ufffd}}, queued...\n"
+            u"[1.02][CONN][RXD] \x00\x01noise\n"
+            u"[1.03][CONN][INF] found KV pair in stream: {{__testcase_finish;Caf\xe9 \ufffd;1;0}}, queued...\n"
+            u"[1.04][CONN][RXD] >>> 'Caf\xe9 \ufffd': 1 passed, 0 failed\n"
+        )
+        printable = mbed_test_api.get_printable_string(output)
+        parser = mbed_test_api.HtrunOutputParser(printable_only=True)
+        for line in output.splitlines(True):
+            parser.feed(line)
+        result = parser.testcase_result()
+        # Same results as the get_*() functions on the printable output
+        self.assertEqual(result, mbed_test_api.get_testcase_result(printable))
+        self.assertEqual(list(result), ["Caf "])
+        self.assertIn("[1.02][CONN][RXD] noise", result["Caf "]["utest_log"])
+
+    def test_htrun_output_parser_coverage(self):
+        import shutil
+        import tempfile
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            parser = mbed_test_api.HtrunOutputParser(coverage_build_path=tmp_dir)
+            parser.feed("[1.00][CONN][RXD] {{__coverage_start;no-such-dir/a.gcda;.6164636772.}}\n")
+            # Written while the test still runs
+            with open(os.path.join(tmp_dir, "a.gcda"), "rb") as f:
+                self.assertEqual(f.read(), b"\x00adcgr\x00")
+            self.assertEqual(parser.coverage_data, [])
+
+            parser.feed("[1.01][CONN][RXD] {{__coverage_start;no-such-dir/b.gcda;6x}}\n")
+            # No partial file is left for an invalid payload
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, "b.gcda")))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_htrun_output_capture(self):
+        capture = mbed_test_api.HtrunOutputCapture(max_memory=100, tail_size=30)
+        capture.write(u"line 0\n")
+        self.assertFalse(capture.spilled())
+        self.assertEqual(capture.tail(), u"line 0\n")
+        lines = [u"line %d \u036b\n" % i for i in range(50)]
+        for line in lines:
+            capture.write(line)
+        try:
+            self.assertTrue(capture.spilled())
+            output = u"line 0\n" + u"".join(lines)
+            self.assertEqual(capture.getvalue(), output)
+            self.assertEqual(capture.tail(), output[-30:])
+            # Only the tail stays in memory
+            self.assertLess(capture.size, 30 + len(lines[-1]))
+
+            parser = mbed_test_api.HtrunOutputParser()
+            capture.feed(parser, chunk_size=16)
+            self.assertEqual(parser.test_result(), mbed_test_api.TEST_RESULT_TIMEOUT)
+            capture.close()
+            self.assertTrue(os.path.isfile(capture.path))
+        finally:
+            capture.remove()
+        self.assertFalse(os.path.exists(capture.path))
+
+    def test_htrun_output_capture_from_log(self):
+        capture = mbed_test_api.HtrunOutputCapture(max_memory=100, tail_size=30)
+        for i in range(50):
+            capture.write(u"line %d\n" % i)
+        capture.close()
+        try:
+            # E.g. sent back by an HtrunWorker
+            copy = mbed_test_api.HtrunOutputCapture.from_log(capture.tail(), capture.path, tail_size=30)
+            self.assertTrue(copy.spilled())
+            self.assertEqual(copy.tail(), capture.tail())
+            self.assertEqual(copy.getvalue(), capture.getvalue())
+            copy.remove()
+            self.assertFalse(os.path.exists(capture.path))
+        finally:
+            capture.remove()
+
+        copy = mbed_test_api.HtrunOutputCapture.from_log(u"line 0\n", None)
+        self.assertFalse(copy.spilled())
+        self.assertEqual(copy.getvalue(), u"line 0\n")
+
+    def test_run_htrun_capture(self):
+        with patch("mbed_os_tools.test.mbed_test_api.run_command") as _run_command:
+            p_mock = MagicMock()
+            p_mock.wait = MagicMock(return_value=0)
+            p_mock.stdout.readline = MagicMock(side_effect=[b"a\n", b"{{result;success}}\n", b""])
+            _run_command.return_value = p_mock
+            capture = mbed_test_api.HtrunOutputCapture()
+            returncode, htrun_output = mbed_test_api.run_htrun("dummy", False, capture=capture)
+            self.assertIs(htrun_output, capture)
+            self.assertEqual(capture.getvalue(), "a\n{{result;success}}\n")
+
+    def test_run_htrun_popen_error(self):
+        with patch("mbed_os_tools.test.mbed_test_api.run_command") as _run_command:
+            _run_command.return_value = None
+            returncode, htrun_output = mbed_test_api.run_htrun("dummy", False)
+            self.assertEqual(returncode, mbed_test_api.RUN_HOST_TEST_POPEN_ERROR)
+            self.assertEqual(htrun_output.getvalue(), "")
+
     def test_run_htrun_unicode(self):
         with patch("mbed_os_tools.test.mbed_test_api.run_command") as _run_command:
             read_line_mock = MagicMock()
@@ -599,6 +743,62 @@ Plugin info: HostTestPluginBase::BasePlugin: Waiting up to 60 sec for '024000003
             _run_command.return_value = p_mock
             returncode, htrun_output = mbed_test_api.run_htrun("dummy", True)
 
+    def test_run_htrun_in_process_overlap(self):
+        import logging
+        import sys
+        import threading
+        from mbed_os_tools.test.host_tests_logger import with_thread_output
+
+        barrier = threading.Event()
+        running = []
+        overlapped = []
+
+        class FakeTestSelector(object):
+            def __init__(self, options):
+                self.name = options.micro
+
+            def execute(self):
+                running.append(self.name)
+                if len(running) == 2:
+                    barrier.set()
+                # Both runs are in progress while they print
+                overlapped.append(barrier.wait(5))
+                print("stdout of %s" % self.name)
+                logging.getLogger("HTST").debug("[INF] log of %s" % self.name)
+                thread = threading.Thread(
+                    target=with_thread_output(lambda: print("thread of %s" % self.name)))
+                thread.start()
+                thread.join()
+                return 0
+
+            def finish(self):
+                pass
+
+        outputs = {}
+
+        def run(name):
+            outputs[name] = mbed_test_api.run_htrun_in_process(["mbedhtrun", "-m", name], False)
+
+        stdout = sys.stdout
+        with patch("mbed_os_tools.test.host_tests_runner.host_test_default.DefaultTestSelector",
+                   FakeTestSelector):
+            threads = [threading.Thread(target=run, args=(name,)) for name in ("A", "B")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        self.assertIs(sys.stdout, stdout)
+        self.assertEqual(overlapped, [True, True])
+
+        for name, other in (("A", "B"), ("B", "A")):
+            returncode, capture = outputs[name]
+            output = capture.getvalue()
+            self.assertEqual(returncode, 0)
+            self.assertIn("stdout of %s\n" % name, output)
+            self.assertIn("[HTST][INF] log of %s\n" % name, output)
+            self.assertIn("thread of %s\n" % name, output)
+            self.assertNotIn(other, output)
+
     def test_parse_global_resource_mgr(self):
         expected = ("K64F", "module_name", "10.2.123.43", "3334")
         result = mbed_test_api.parse_global_resource_mgr(":".join(expected))
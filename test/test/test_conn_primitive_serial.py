@@ -13,6 +13,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import threading
+import time
 import unittest
 import mock
 
@@ -82,5 +85,58 @@ class ConnPrimitiveSerialTestCase(unittest.TestCase):
 
         mock_detect.create().list_mbeds.assert_called_once()
 
+
+@unittest.skipUnless(hasattr(os, 'openpty'), 'requires a pty')
+class ConnPrimitiveSerialReadTestCase(unittest.TestCase):
+    """Read from a pty pair standing in for the DUT"""
+
+    def setUp(self):
+        self.master, slave = os.openpty()
+        self.slave_name = os.ttyname(slave)
+        os.close(slave)
+        self.connectors = []
+
+    def tearDown(self):
+        for connector in self.connectors:
+            connector.finish()
+        os.close(self.master)
+
+    def _connector(self, **config):
+        config.update({"skip_reset": True, "polling_timeout": 1})
+        connector = SerialConnectorPrimitive("SERI", self.slave_name, 115200, config=config)
+        self.connectors.append(connector)
+        return connector
+
+    def test_select_mode_wakes_up_on_data(self):
+        connector = self._connector(serial_read_timeout=5)
+        self.assertIsNotNone(connector.read_fd)
+        threading.Timer(0.05, os.write, (self.master, b"{{__sync;1}}\n")).start()
+        start = time.time()
+        self.assertEqual(connector.read(1), b"{{__sync;1}}\n")
+        self.assertLess(time.time() - start, 2)
+
+    def test_select_mode_drains_burst(self):
+        connector = self._connector()
+        payload = b"x" * 3000
+        os.write(self.master, payload)
+        data = b""
+        deadline = time.time() + 5
+        while len(data) < len(payload) and time.time() < deadline:
+            data += connector.read(16, timeout=0.5)
+        self.assertEqual(data, payload)
+
+    def test_select_mode_timeout(self):
+        connector = self._connector(serial_read_timeout=0.05)
+        self.assertFalse(connector.read(2304))
+        self.assertTrue(connector.connected())
+
+    def test_sleep_mode(self):
+        connector = self._connector(serial_read_mode='sleep')
+        self.assertIsNone(connector.read_fd)
+        os.write(self.master, b"mbed")
+        time.sleep(0.1)
+        self.assertEqual(connector.read(2304), b"mbed")
+
+
 if __name__ == '__main__':
       unittest.main()
@@ -19,6 +19,7 @@ import unittest
 from tempfile import mkdtemp
 
 from mbed_os_tools.test.host_tests_runner.mbed_base import Mbed
+from mbed_os_tools.test.host_tests_runner.flashed_images import FlashedImages
 
 class TemporaryDirectory(object):
     def __init__(self):
@@ -34,6 +35,14 @@ class TemporaryDirectory(object):
 @mock.patch("mbed_os_tools.test.host_tests_runner.mbed_base.ht_plugins")
 @mock.patch("mbed_os_tools.test.host_tests_runner.mbed_base.detect")
 class TestMbed(unittest.TestCase):
+    def setUp(self):
+        # Keep records of flashed images out of the user's data directory
+        self.state_dir = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.state_dir)
+        patcher = mock.patch.object(FlashedImages, "DEFAULT_DIR", self.state_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def test_skips_discover_mbed_if_non_mbed_copy_method_used(
         self, mock_detect, mock_ht_plugins
     ):
@@ -51,6 +60,7 @@ class TestMbed(unittest.TestCase):
                 target_id="BK99",
                 polling_timeout=5,
                 program_cycle_s=None,
+                skip_identical_flash=False,
                 json_test_configuration=None,
                 format="blah",
             )
@@ -87,6 +97,7 @@ class TestMbed(unittest.TestCase):
                 target_id="BK99",
                 polling_timeout=5,
                 program_cycle_s=None,
+                skip_identical_flash=False,
                 json_test_configuration=None,
                 format="blah",
             )
@@ -107,6 +118,96 @@ class TestMbed(unittest.TestCase):
                 format=options.format,
             )
 
+    def test_skips_copy_of_image_already_on_target(
+        self, mock_detect, mock_ht_plugins
+    ):
+        mock_ht_plugins.call_plugin.return_value = True
+        with TemporaryDirectory() as tmpdir:
+            image_path = os.path.join(tmpdir, "test.elf")
+            with open(image_path, "w") as f:
+                f.write("1234")
+            disk = os.path.join(tmpdir, "disk")
+            os.mkdir(disk)
+            with open(os.path.join(disk, "DETAILS.TXT"), "w") as f:
+                f.write("Remount count: 3\n")
+            options = mock.Mock(
+                copy_method="pyocd",
+                image_path=image_path,
+                disk=disk,
+                port="port",
+                micro="mcu",
+                target_id="BK99",
+                polling_timeout=5,
+                program_cycle_s=0,
+                skip_identical_flash=True,
+                json_test_configuration=None,
+                format="blah",
+            )
+
+            mbed = Mbed(options)
+            mbed.flashed_images = FlashedImages(os.path.join(tmpdir, "state"))
+            self.assertTrue(mbed.copy_image())
+            self.assertTrue(mbed.copy_image())
+            self.assertEqual(mock_ht_plugins.call_plugin.call_count, 1)
+
+            # A different image is flashed
+            with open(image_path, "w") as f:
+                f.write("5678")
+            self.assertTrue(mbed.copy_image())
+            self.assertEqual(mock_ht_plugins.call_plugin.call_count, 2)
+
+            # A failed copy leaves an unknown image on the target
+            mock_ht_plugins.call_plugin.return_value = False
+            with open(image_path, "w") as f:
+                f.write("1234")
+            self.assertFalse(mbed.copy_image(retry_copy=1))
+            self.assertIsNone(mbed.flashed_images.get("BK99"))
+
+    def test_copies_image_without_remount_count(
+        self, mock_detect, mock_ht_plugins
+    ):
+        mock_ht_plugins.call_plugin.return_value = True
+        with TemporaryDirectory() as tmpdir:
+            image_path = os.path.join(tmpdir, "test.elf")
+            with open(image_path, "w") as f:
+                f.write("1234")
+            options = mock.Mock(
+                copy_method="pyocd",
+                image_path=image_path,
+                disk=None,
+                port="port",
+                micro="mcu",
+                target_id="BK99",
+                polling_timeout=5,
+                program_cycle_s=0,
+                skip_identical_flash=True,
+                json_test_configuration=None,
+                format="blah",
+            )
+
+            mbed = Mbed(options)
+            self.assertEqual(mbed.flashed_images.state_dir, self.state_dir)
+            self.assertTrue(mbed.copy_image())
+            self.assertTrue(mbed.copy_image())
+            self.assertEqual(mock_ht_plugins.call_plugin.call_count, 2)
+
+
+class TestFlashedImages(unittest.TestCase):
+    def test_remount_count_invalidates_record(self):
+        with TemporaryDirectory() as tmpdir:
+            image_path = os.path.join(tmpdir, "test.bin")
+            with open(image_path, "wb") as f:
+                f.write(b"1234")
+            images = FlashedImages(os.path.join(tmpdir, "state"))
+            self.assertFalse(images.is_flashed("0240", image_path, 3))
+            images.record("0240", image_path, 3)
+            self.assertTrue(images.is_flashed("0240", image_path, 3))
+            self.assertFalse(images.is_flashed("0240", image_path))
+            self.assertFalse(images.is_flashed("0240", image_path, 4))
+            self.assertFalse(images.is_flashed("0241", image_path, 3))
+            images.forget("0240")
+            self.assertFalse(images.is_flashed("0240", image_path, 3))
+
 
 if __name__ == "__main__":
     unittest.main()